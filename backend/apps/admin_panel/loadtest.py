@@ -0,0 +1,251 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client
+
+SHIPPING_ADDRESS = 'AIT Campus, Benchmark Hall'
+
+
+def add_confirm_argument(parser):
+    parser.add_argument(
+        '--yes-i-mean-it', action='store_true',
+        help='Run with DEBUG off, writing benchmark data into the configured database',
+    )
+
+
+def require_scratch_database(options, action):
+    """Benchmark data (active accounts with a published password, carts, orders) only goes into development databases"""
+    if settings.DEBUG or options['yes_i_mean_it']:
+        return
+    database = settings.DATABASES['default']
+    raise CommandError(
+        f"{action} in {database['ENGINE']} database {database['NAME']!s} with DEBUG off. "
+        'Point the settings at a scratch database and pass --yes-i-mean-it to continue.'
+    )
+
+
+class ClientDriver:
+    """In-process requests through django.test.Client: the full middleware and view stack, no sockets"""
+
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, method, path, data=None, token=None):
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        body = json.dumps(data) if data is not None else ''
+        response = self.client.generic(method, path, body, content_type='application/json', **extra)
+        is_json = response.get('Content-Type', '').startswith('application/json') and not response.streaming
+        return response.status_code, json.loads(response.content) if is_json and response.content else None
+
+    def close(self):
+        connection.close()
+
+
+class HttpDriver:
+    """Requests over HTTP to a running server (e.g. the runserver workers started by run_benchmarks --serve)"""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, data=None, token=None):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, content, content_type = response.status, response.read(), response.headers.get('Content-Type', '')
+        except urllib.error.HTTPError as exc:
+            status, content, content_type = exc.code, exc.read(), exc.headers.get('Content-Type', '')
+        return status, json.loads(content) if content_type.startswith('application/json') and content else None
+
+    def close(self):
+        pass
+
+
+def relative(url):
+    """The path and query of an absolute `next` link, to send through either driver"""
+    parts = urlsplit(url)
+    return f'{parts.path}?{parts.query}' if parts.query else parts.path
+
+
+def results_of(body):
+    return body.get('results', []) if isinstance(body, dict) else body if isinstance(body, list) else []
+
+
+class Session:
+    """One virtual user: a driver, a JWT access token and the timings of every request it made"""
+
+    def __init__(self, driver, fixtures, user, rng):
+        self.driver = driver
+        self.fixtures = fixtures
+        self.user = user
+        self.rng = rng
+        self.token = None
+        self.records = []
+
+    def request(self, label, method, path, data=None):
+        started = time.perf_counter()
+        try:
+            status, body = self.driver.request(method, path, data, self.token)
+        except Exception:
+            status, body = 0, None  # connection errors count as failed requests
+        self.records.append((label, status, (time.perf_counter() - started) * 1000))
+        return body if 200 <= status < 300 else None
+
+    def get(self, label, path):
+        return self.request(label, 'GET', path)
+
+    def post(self, label, path, data):
+        return self.request(label, 'POST', path, data)
+
+    def login(self):
+        body = self.post('POST /api/users/token/', '/api/users/token/', {
+            'username': self.user['username'], 'password': self.fixtures['password'],
+        })
+        self.token = body['access'] if body else None
+
+    def other_item(self):
+        """An available item this user does not own (cart and orders reject one's own items)"""
+        while True:
+            item_id, owner_id = self.rng.choice(self.fixtures['items'])
+            if owner_id != self.user['id']:
+                return item_id
+
+
+def browse(session):
+    page = session.get('GET /api/items/', '/api/items/')
+    if page and page.get('next'):
+        session.get('GET /api/items/?cursor', relative(page['next']))
+    items = results_of(page)
+    if items:
+        session.get('GET /api/items/{id}/', f"/api/items/{session.rng.choice(items)['id']}/")
+    posts = results_of(session.get('GET /api/forum/posts/', '/api/forum/posts/'))
+    if posts:
+        session.get('GET /api/forum/posts/{id}/', f"/api/forum/posts/{session.rng.choice(posts)['id']}/")
+
+
+def search(session):
+    term = session.rng.choice(session.fixtures['terms'])
+    session.get('GET /api/search/suggestions/', f'/api/search/suggestions/?q={quote(term[:3])}')
+    session.get('GET /api/search/items/?q', f'/api/search/items/?q={quote(term)}')
+    session.get('GET /api/search/items/?q&sort_by=price', f'/api/search/items/?q={quote(term)}&sort_by=price&sort_order=asc')
+
+
+def add_to_cart(session):
+    item_id = session.other_item()
+    session.post('POST /api/cart/add/', '/api/cart/add/', {'item_id': item_id, 'quantity': 1})
+    session.get('GET /api/cart/', '/api/cart/')
+    session.request('DELETE /api/cart/item/{id}/remove/', 'DELETE', f'/api/cart/item/{item_id}/remove/')
+
+
+def checkout(session):
+    session.post('POST /api/orders/', '/api/orders/', {
+        'item': session.other_item(), 'quantity': 1, 'shipping_address': SHIPPING_ADDRESS,
+    })
+    orders = results_of(session.get('GET /api/orders/', '/api/orders/'))
+    if orders:
+        session.get('GET /api/orders/{id}/', f"/api/orders/{orders[0]['id']}/")
+
+
+def inbox(session):
+    session.get('GET /api/notifications/unread-count/', '/api/notifications/unread-count/')
+    threads = results_of(session.get('GET /api/chat/conversations/', '/api/chat/conversations/'))
+    if threads:
+        thread = session.rng.choice(threads)
+        session.get('GET /api/chat/conversations/{id}/messages/', f"/api/chat/conversations/{thread['id']}/messages/")
+    session.get('GET /api/notifications/?is_read=false', '/api/notifications/?is_read=false')
+
+
+SCENARIOS = {
+    'browse': browse,
+    'search': search,
+    'add_to_cart': add_to_cart,
+    'checkout': checkout,
+    'inbox': inbox,
+}
+
+
+def run(driver_factory, fixtures, scenarios, virtual_users, iterations, seed=42):
+    """
+    Run every scenario `iterations` times for each of `virtual_users`
+    concurrent users; returns (records, wall seconds).
+    """
+    records = []
+    lock = threading.Lock()
+
+    def virtual_user(index):
+        driver = driver_factory(index)
+        user = fixtures['users'][index % len(fixtures['users'])]
+        session = Session(driver, fixtures, user, random.Random(seed + index))
+        try:
+            session.login()
+            for _ in range(iterations):
+                for name in scenarios:
+                    SCENARIOS[name](session)
+        finally:
+            driver.close()
+            with lock:
+                records.extend(session.records)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=virtual_users, thread_name_prefix='loadtest') as pool:
+        for future in [pool.submit(virtual_user, index) for index in range(virtual_users)]:
+            future.result()
+    return records, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(records, wall_seconds):
+    """Per-endpoint and overall request counts, errors, throughput and p50/p95/p99 latency"""
+    def stats(rows):
+        timings = [ms for _, _, ms in rows]
+        return {
+            'requests': len(rows),
+            'errors': sum(1 for _, status, _ in rows if not 200 <= status < 400),
+            'throughput_rps': round(len(rows) / wall_seconds, 2) if wall_seconds else 0.0,
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'max_ms': round(max(timings), 3),
+        }
+
+    grouped = {}
+    for record in records:
+        grouped.setdefault(record[0], []).append(record)
+    return {
+        'overall': dict(stats(records), wall_seconds=round(wall_seconds, 3)) if records else {},
+        'endpoints': {label: stats(rows) for label, rows in sorted(grouped.items())},
+    }
+
+
+def compare(baseline, current, tolerance):
+    """(label, metric, before, after, change) for every endpoint whose p95 or throughput got worse than tolerance"""
+    regressions = []
+    for label, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(label)
+        if not before:
+            continue
+        if before['p95_ms'] and now['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append((label, 'p95_ms', before['p95_ms'], now['p95_ms'], now['p95_ms'] / before['p95_ms'] - 1))
+        if before['throughput_rps'] and now['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            regressions.append((
+                label, 'throughput_rps', before['throughput_rps'], now['throughput_rps'],
+                now['throughput_rps'] / before['throughput_rps'] - 1,
+            ))
+    return regressions
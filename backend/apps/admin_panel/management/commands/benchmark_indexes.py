@@ -0,0 +1,154 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from apps.items.models import Item
+from apps.notifications.models import Notification
+from apps.orders.models import Order
+from apps.users.models import User
+from marketplace.querylog import explain, plan_problems
+
+CONDITIONS = ['new', 'like_new', 'good', 'fair', 'poor']
+CATEGORIES = ['books', 'furniture', 'sports', 'phone', 'games', 'electronics', 'clothing']
+STATUSES = ['pending', 'confirmed', 'shipped', 'delivered', 'cancelled']
+PAYMENT_STATUSES = ['pending', 'paid', 'failed', 'refunded']
+# Single-column foreign key indexes the composite indexes replaced
+FOREIGN_KEY_INDEXES = [(Item, 'owner_id'), (Order, 'buyer_id'), (Order, 'seller_id'), (Notification, 'user_id')]
+ADDED_INDEXES = [
+    'item_available_recent_idx', 'item_owner_recent_idx', 'item_featured_recent_idx', 'item_barter_recent_idx',
+    'item_condition_recent_idx', 'item_available_price_idx', 'item_available_category_idx',
+    'order_buyer_recent_idx', 'order_seller_recent_idx', 'order_status_idx',
+    'notification_user_recent_idx', 'notification_unread_idx',
+]
+
+
+def hot_queries(user_id):
+    """The listing and counting queries of the item, order and notification endpoints, one page each"""
+    items = Item.objects.filter(is_available=True)
+    recent = ('-created_at', '-id')
+    return {
+        'items: list': items.order_by(*recent)[:21],
+        'items: owner': items.filter(owner_id=user_id).order_by(*recent)[:21],
+        'items: my': Item.objects.filter(owner_id=user_id).order_by(*recent)[:21],
+        'items: featured': items.filter(is_featured=True).order_by(*recent)[:21],
+        'items: barter': items.filter(Q(is_barter=True) | Q(allow_barter=True)).order_by(*recent)[:21],
+        'items: condition': items.filter(condition='poor').order_by(*recent)[:21],
+        'items: by price': items.order_by('-price', '-id')[:21],
+        'items: categories': items.values('category').annotate(count=Count('id')).order_by('-count')[:10],
+        'orders: buyer': Order.objects.filter(buyer_id=user_id).order_by(*recent)[:21],
+        'orders: seller': Order.objects.filter(seller_id=user_id).order_by(*recent)[:21],
+        'orders: status': Order.objects.filter(status='pending', payment_status='paid').order_by('-created_at')[:21],
+        'notifications: list': Notification.objects.filter(user_id=user_id).order_by(*recent)[:21],
+        'notifications: unread': Notification.objects.filter(user_id=user_id, is_read=False).order_by(*recent)[:21],
+        'notifications: all unread': Notification.objects.filter(user_id=user_id, is_read=False).values('pk'),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the hot item, order and notification queries on a seeded dataset with the composite '
+        'and partial indexes, then without them (as before); everything is rolled back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--items', type=int, default=50000)
+        parser.add_argument('--orders', type=int, default=50000)
+        parser.add_argument('--notifications', type=int, default=200000)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query (the median is reported)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        with transaction.atomic():
+            user_ids = self.seed(rng, options)
+            probe_users = rng.sample(user_ids, min(len(user_ids), options['repeat']))
+            after = self.measure(probe_users)
+            self.drop_indexes()
+            before = self.measure(probe_users)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'query':<30}{'before ms':>11}{'after ms':>10}{'speedup':>9}  plan before -> after")
+        for name in after:
+            (old_ms, old_problems), (new_ms, new_problems) = before[name], after[name]
+            self.stdout.write(
+                f'{name:<30}{old_ms:>11.3f}{new_ms:>10.3f}{old_ms / max(new_ms, 1e-6):>8.1f}x'
+                f'  {self.describe(old_problems)} -> {self.describe(new_problems)}'
+            )
+
+    def seed(self, rng, options):
+        now = timezone.now()
+        users = User.objects.bulk_create([
+            User(username=f'bench_index_{n}', email=f'bench_index_{n}@ait.ac.th') for n in range(options['users'])
+        ], batch_size=2000)
+        user_ids = [user.pk for user in users]
+        items = Item.objects.bulk_create([
+            Item(
+                owner_id=rng.choice(user_ids), title=f'Bench item {n}', category=rng.choice(CATEGORIES),
+                price=Decimal(rng.randint(10, 5000)), condition=rng.choice(CONDITIONS),
+                is_available=rng.random() < 0.7, is_featured=rng.random() < 0.02,
+                is_barter=rng.random() < 0.05, allow_barter=rng.random() < 0.1,
+            )
+            for n in range(options['items'])
+        ], batch_size=2000)
+        item_ids = [item.pk for item in items]
+        Order.objects.bulk_create([
+            Order(
+                buyer_id=rng.choice(user_ids), seller_id=rng.choice(user_ids), item_id=rng.choice(item_ids),
+                total_price=Decimal(rng.randint(10, 5000)), status=rng.choice(STATUSES),
+                payment_status=rng.choice(PAYMENT_STATUSES), shipping_address='AIT Campus',
+            )
+            for _ in range(options['orders'])
+        ], batch_size=2000)
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=rng.choice(user_ids), notification_type='system_announcement', title='Bench',
+                message='Bench notification', is_read=rng.random() < 0.8,
+            )
+            for _ in range(options['notifications'])
+        ], batch_size=2000)
+        # auto_now_add stamps every row alike; spread creation over a year so ordering is realistic
+        with connection.cursor() as cursor:
+            for model in (Item, Order, Notification):
+                table = connection.ops.quote_name(model._meta.db_table)
+                rows = [
+                    (now - timedelta(seconds=rng.randint(0, 365 * 86400)), pk)
+                    for pk in model.objects.values_list('pk', flat=True)
+                ]
+                cursor.executemany(f'UPDATE {table} SET created_at = %s WHERE id = %s', rows)
+            cursor.execute('ANALYZE')
+        return user_ids
+
+    def drop_indexes(self):
+        """Back to the previous schema: no composite or partial indexes, one index per foreign key"""
+        with connection.cursor() as cursor:
+            for name in ADDED_INDEXES:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+            for model, column in FOREIGN_KEY_INDEXES:
+                table = model._meta.db_table
+                cursor.execute(
+                    f'CREATE INDEX {connection.ops.quote_name(f"bench_{table}_{column}")} '
+                    f'ON {connection.ops.quote_name(table)} ({connection.ops.quote_name(column)})'
+                )
+            cursor.execute('ANALYZE')
+
+    def measure(self, probe_users):
+        """{name: (median ms, plan problems)}; each run probes a different user"""
+        results = {}
+        for name in hot_queries(probe_users[0]):
+            timings = []
+            for user_id in probe_users:
+                queryset = hot_queries(user_id)[name]
+                started = time.perf_counter()
+                list(queryset)
+                timings.append((time.perf_counter() - started) * 1000)
+            sql, params = hot_queries(probe_users[0])[name].query.sql_with_params()
+            results[name] = (statistics.median(timings), plan_problems(explain(sql, params)))
+        return results
+
+    def describe(self, problems):
+        return ', '.join(kind for kind, _ in problems) or 'indexed'
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from marketplace.querylog import explain, plan_problems, read_log
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a query log recorded with QUERY_LOG_PATH through EXPLAIN and flag full table scans '
+        'and sorts that no index serves, most frequent queries first'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', nargs='?', help='Query log to replay (default: QUERY_LOG_PATH)')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--ignore-table', action='append', default=[], help='Tables whose scans are expected')
+        parser.add_argument('--plans', action='store_true', help='Print the plan of every flagged query')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit with an error when any query is flagged')
+
+    def handle(self, *args, **options):
+        path = options['log'] or getattr(settings, 'QUERY_LOG_PATH', '')
+        if not path:
+            raise CommandError('No query log: pass a path or set QUERY_LOG_PATH')
+        try:
+            queries = read_log(path)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+
+        flagged = 0
+        for sql, query in sorted(queries.items(), key=lambda entry: -entry[1]['count']):
+            try:
+                plan = explain(sql, query['params'], using=options['database'])
+            except DatabaseError as exc:
+                self.stderr.write(f'Cannot explain ({exc}): {sql[:120]}')
+                continue
+            problems = [
+                (kind, detail) for kind, detail in plan_problems(plan)
+                if not (kind == 'full scan' and detail.strip('"') in options['ignore_table'])
+            ]
+            if not problems:
+                continue
+            flagged += 1
+            paths = ', '.join(sorted(query['paths'])[:3]) or '-'
+            self.stdout.write(self.style.WARNING(
+                f"{query['count']:>6}x  " + '; '.join(f'{kind}: {detail}' for kind, detail in problems)
+            ))
+            self.stdout.write(f'        paths: {paths}')
+            self.stdout.write(f'        {sql[:300]}')
+            if options['plans']:
+                for line in plan:
+                    self.stdout.write(f'          | {line}')
+
+        summary = f'{len(queries)} distinct queries, {flagged} flagged'
+        if flagged and options['fail_on_scan']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not flagged else summary)
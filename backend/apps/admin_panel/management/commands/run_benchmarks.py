@@ -0,0 +1,192 @@
+import json
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.admin_panel import loadtest
+from apps.chat.models import Message
+from apps.forum.models import ForumPost
+from apps.items.models import Item
+from apps.notifications.models import Notification
+from apps.orders.models import Order
+from apps.users.models import User
+from .seed_benchmark_data import PASSWORD, USERNAME_PREFIX
+
+SERVERS = ('runserver', 'daphne')
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def worker_command(server, port):
+    if server == 'daphne':
+        module, attribute = settings.ASGI_APPLICATION.rsplit('.', 1)
+        return [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(port), f'{module}:{attribute}']
+    return [sys.executable, 'manage.py', 'runserver', '--noreload', '--nothreading', f'127.0.0.1:{port}']
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive scripted scenarios (browse, search, add_to_cart, checkout, inbox) as concurrent virtual users, '
+        'report throughput and p50/p95/p99 per endpoint and save the results as JSON. '
+        'Needs seed_benchmark_data; cart and checkout scenarios write orders, so with DEBUG off it only runs '
+        'against the local database with --yes-i-mean-it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', nargs='+', choices=loadtest.SCENARIOS, default=list(loadtest.SCENARIOS))
+        parser.add_argument('--users', type=int, default=4, help='Concurrent virtual users')
+        parser.add_argument('--iterations', type=int, default=10, help='Runs of every scenario per virtual user')
+        parser.add_argument('--seed', type=int, default=42)
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--base-url', help='Benchmark a running server over HTTP instead of the test client')
+        target.add_argument('--serve', type=int, metavar='WORKERS', help='Start this many server workers and benchmark them over HTTP')
+        parser.add_argument(
+            '--server', choices=SERVERS, default='runserver',
+            help='What --serve starts: single-threaded runserver, or daphne on ASGI_APPLICATION as in production',
+        )
+        parser.add_argument('--port', type=int, default=8700, help='First port for --serve workers')
+        loadtest.add_confirm_argument(parser)
+        parser.add_argument('--output', help='Results file (default: benchmark_results/<commit>-<timestamp>.json)')
+        parser.add_argument('--compare', help='Earlier results file to diff p95 and throughput against')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown before a regression is reported')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['base_url']:
+            # The test client and --serve workers share this process's settings, so they write to its database
+            loadtest.require_scratch_database(options, 'Refusing to write benchmark carts and orders')
+        fixtures = self.load_fixtures()
+        workers = []
+        try:
+            if options['serve']:
+                workers = self.start_workers(options['server'], options['serve'], options['port'])
+                base_urls = [f"http://127.0.0.1:{options['port'] + index}" for index in range(options['serve'])]
+                driver_factory = lambda index: loadtest.HttpDriver(base_urls[index % len(base_urls)])
+                driver = f"http ({options['serve']} {options['server']} workers)"
+            elif options['base_url']:
+                driver_factory = lambda index: loadtest.HttpDriver(options['base_url'])
+                driver = f"http ({options['base_url']})"
+            else:
+                driver_factory = lambda index: loadtest.ClientDriver()
+                driver = 'test client'
+            records, wall_seconds = loadtest.run(
+                driver_factory, fixtures, options['scenarios'], options['users'], options['iterations'], options['seed']
+            )
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.wait(timeout=10)
+
+        results = {
+            'meta': {
+                'commit': git_commit(), 'timestamp': datetime.now().isoformat(timespec='seconds'), 'driver': driver,
+                'scenarios': options['scenarios'], 'virtual_users': options['users'],
+                'iterations': options['iterations'], 'seed': options['seed'],
+                'python': platform.python_version(), 'django': django.get_version(),
+                'database': settings.DATABASES['default']['ENGINE'], 'dataset': self.dataset_counts(),
+            },
+            **loadtest.summarize(records, wall_seconds),
+        }
+        self.report(results)
+        path = self.save(results, options['output'])
+        self.stdout.write(f'Results saved to {path}')
+        if options['compare']:
+            self.diff(results, options['compare'], options['tolerance'], options['fail_on_regression'])
+
+    def load_fixtures(self):
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX, is_active=True).order_by('pk').values('id', 'username')[:1000])
+        if not users:
+            raise CommandError('No benchmark users: run `manage.py seed_benchmark_data` first')
+        items = list(Item.objects.filter(is_available=True).order_by('?').values_list('id', 'owner_id')[:2000])
+        titles = Item.objects.filter(is_available=True).values_list('title', flat=True)[:500]
+        terms = sorted({word.lower() for title in titles for word in title.split() if len(word) >= 4})
+        return {'users': users, 'password': PASSWORD, 'items': items, 'terms': terms or ['book']}
+
+    def dataset_counts(self):
+        return {
+            'users': User.objects.count(), 'items': Item.objects.count(), 'orders': Order.objects.count(),
+            'messages': Message.objects.count(), 'notifications': Notification.objects.count(),
+            'forum_posts': ForumPost.objects.count(),
+        }
+
+    def start_workers(self, server, count, first_port):
+        workers = []
+        for index in range(count):
+            workers.append(subprocess.Popen(
+                worker_command(server, first_port + index),
+                cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            ))
+        for index, worker in enumerate(workers):
+            if not wait_for_port(first_port + index):
+                for started in workers:
+                    started.terminate()
+                raise CommandError(f'{server} worker on port {first_port + index} did not start')
+        return workers
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<50}{'requests':>9}{'errors':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for label, row in results['endpoints'].items():
+            self.stdout.write(
+                f"{label:<50}{row['requests']:>9}{row['errors']:>7}{row['throughput_rps']:>9.1f}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            )
+        overall = results['overall']
+        if overall:
+            self.stdout.write(self.style.SUCCESS(
+                f"{overall['requests']} requests in {overall['wall_seconds']:.1f}s: {overall['throughput_rps']:.1f} req/s, "
+                f"p50 {overall['p50_ms']:.1f}ms p95 {overall['p95_ms']:.1f}ms p99 {overall['p99_ms']:.1f}ms, "
+                f"{overall['errors']} errors"
+            ))
+
+    def save(self, results, path):
+        if not path:
+            directory = settings.BASE_DIR / 'benchmark_results'
+            directory.mkdir(exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            path = directory / f"{results['meta']['commit']}-{stamp}.json"
+        with open(path, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+        return path
+
+    def diff(self, results, baseline_path, tolerance, fail):
+        try:
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read {baseline_path}: {exc}')
+        regressions = loadtest.compare(baseline, results, tolerance)
+        against = f"{baseline.get('meta', {}).get('commit', '?')} ({baseline_path})"
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f'No regressions beyond {tolerance:.0%} against {against}'))
+            return
+        self.stdout.write(self.style.WARNING(f'Regressions against {against}:'))
+        for label, metric, before, after, change in regressions:
+            self.stdout.write(f'  {label:<50}{metric:>16} {before:>10.1f} -> {after:>10.1f} ({change:+.0%})')
+        if fail:
+            raise CommandError(f'{len(regressions)} regressions beyond {tolerance:.0%}')
@@ -0,0 +1,216 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.admin_panel.loadtest import add_confirm_argument, require_scratch_database
+from apps.chat.models import Conversation, ConversationParticipant, Message
+from apps.forum.models import ForumCategory, ForumPost, ForumReply, make_excerpt
+from apps.items.models import Item
+from apps.notifications.models import Notification
+from apps.orders.models import Order, OrderItem
+from apps.users.models import User
+
+USERNAME_PREFIX = 'bench_user_'
+PASSWORD = 'password123'
+SCALES = {
+    'small': dict(users=200, items=2000, orders=500, conversations=300, messages=3000, notifications=5000, forum_posts=200, forum_replies=1000),
+    'medium': dict(users=2000, items=20000, orders=5000, conversations=3000, messages=30000, notifications=50000, forum_posts=2000, forum_replies=10000),
+    'large': dict(users=20000, items=200000, orders=50000, conversations=30000, messages=300000, notifications=500000, forum_posts=20000, forum_replies=100000),
+}
+FORUM_CATEGORIES = ['General', 'Buying & Selling', 'Campus Life', 'Help']
+ADJECTIVES = ['Used', 'Almost new', 'Cheap', 'Vintage', 'Spare', 'Barely used', 'Second-hand', 'Great']
+MESSAGES = [
+    'Is this still available?', 'Can you do a lower price?', 'I can pick it up tomorrow.',
+    'Where on campus are you?', 'Deal, see you at the library.', 'Does it come with the charger?',
+]
+BATCH_SIZE = 2000
+HISTORY_DAYS = 180  # items and orders are spread over this many days; the daily rollups are rebuilt for them
+
+
+def spread_created_at(model, rng, days, ids):
+    """auto_now_add stamps every bulk-created row alike; spread them over the last `days` days"""
+    now = timezone.now()
+    table = connection.ops.quote_name(model._meta.db_table)
+    rows = [(now - timedelta(seconds=rng.randint(0, days * 86400)), pk) for pk in ids]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'UPDATE {table} SET created_at = %s WHERE id = %s', rows)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed benchmark volumes of users, items, orders, chat, notifications and forum posts with bulk_create, '
+        f'on top of add_sample_items (users are {USERNAME_PREFIX}N, password {PASSWORD})'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='small')
+        for name in SCALES['small']:
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, help=f'Override the scale\'s {name} count')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--flush', action='store_true', help=f'Delete earlier {USERNAME_PREFIX}* users and their data first')
+        add_confirm_argument(parser)
+
+    def handle(self, *args, **options):
+        require_scratch_database(options, f'Refusing to create {USERNAME_PREFIX}* accounts with password {PASSWORD}')
+        counts = {name: options[name] if options[name] is not None else value for name, value in SCALES[options['scale']].items()}
+        rng = random.Random(options['seed'])
+        if options['flush']:
+            deleted, _ = User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+            self.stdout.write(f'Deleted {deleted} rows of earlier benchmark data')
+        call_command('add_sample_items', stdout=self.stdout)
+        templates = list(Item.objects.exclude(owner__username__startswith=USERNAME_PREFIX).values(
+            'title', 'description', 'category', 'condition', 'price', 'location'
+        )) or [{'title': 'Textbook', 'description': '', 'category': 'books', 'condition': 'good', 'price': Decimal('100'), 'location': 'AIT Campus'}]
+
+        with transaction.atomic():
+            user_ids = self.seed_users(counts['users'])
+            item_ids = self.seed_items(rng, user_ids, templates, counts['items'])
+            self.seed_orders(rng, user_ids, item_ids, counts['orders'])
+            self.seed_chat(rng, user_ids, item_ids, counts['conversations'], counts['messages'])
+            self.seed_notifications(rng, user_ids, counts['notifications'])
+            self.seed_forum(rng, user_ids, counts['forum_posts'], counts['forum_replies'])
+        # Search index, caches and daily rollups follow post_save signals, which bulk_create skips
+        call_command('rebuild_search_index', stdout=self.stdout)
+        call_command('reconcile_unread_counters', stdout=self.stdout)
+        call_command('backfill_daily_metrics', days=HISTORY_DAYS + 1, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded ' + ', '.join(f'{value} {name.replace("_", " ")}' for name, value in counts.items())
+        ))
+
+    def seed_users(self, count):
+        start = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+        password = make_password(PASSWORD)  # hashed once: the hasher is deliberately slow
+        users = User.objects.bulk_create([
+            User(
+                username=f'{USERNAME_PREFIX}{n}', email=f'{USERNAME_PREFIX}{n}@ait.ac.th',
+                ait_email=f'{USERNAME_PREFIX}{n}@ait.ac.th', password=password, is_verified=True,
+            )
+            for n in range(start, start + count)
+        ], batch_size=BATCH_SIZE)
+        return [user.pk for user in users]
+
+    def seed_items(self, rng, user_ids, templates, count):
+        items = []
+        for n in range(count):
+            template = rng.choice(templates)
+            price = template['price'] or Decimal(rng.randint(50, 5000))
+            items.append(Item(
+                owner_id=rng.choice(user_ids), title=f"{rng.choice(ADJECTIVES)} {template['title']}"[:200],
+                description=template['description'], category=template['category'],
+                condition=template['condition'], location=template['location'],
+                price=(price * Decimal(rng.randint(50, 150)) / 100).quantize(Decimal('0.01')),
+                is_available=rng.random() < 0.85, is_featured=rng.random() < 0.03,
+                is_barter=rng.random() < 0.05, allow_barter=rng.random() < 0.15,
+            ))
+        item_ids = [item.pk for item in Item.objects.bulk_create(items, batch_size=BATCH_SIZE)]
+        spread_created_at(Item, rng, HISTORY_DAYS, item_ids)
+        return item_ids
+
+    def seed_orders(self, rng, user_ids, item_ids, count):
+        seeded = Item.objects.filter(pk__range=(item_ids[0], item_ids[-1]))
+        items = dict(seeded.values_list('pk', 'owner_id'))
+        prices = dict(seeded.values_list('pk', 'price'))
+        orders = []
+        for _ in range(count):
+            item_id = rng.choice(item_ids)
+            quantity = rng.randint(1, 2)
+            orders.append(Order(
+                buyer_id=rng.choice(user_ids), seller_id=items[item_id], item_id=item_id, quantity=quantity,
+                total_price=prices[item_id] * quantity, shipping_address='AIT Campus',
+                status=rng.choice([choice for choice, _ in Order.STATUS_CHOICES]),
+                payment_status=rng.choice([choice for choice, _ in Order.PAYMENT_STATUS_CHOICES]),
+            ))
+        orders = Order.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, item_id=order.item_id, quantity=order.quantity, price=prices[order.item_id])
+            for order in orders
+        ], batch_size=BATCH_SIZE)
+        spread_created_at(Order, rng, HISTORY_DAYS, [order.pk for order in orders])
+
+    def seed_chat(self, rng, user_ids, item_ids, conversations, messages):
+        pairs = set()
+        while len(pairs) < min(conversations, len(user_ids) * (len(user_ids) - 1) // 2):
+            low, high = sorted(rng.sample(user_ids, 2))
+            pairs.add((low, high))
+        threads = Conversation.objects.bulk_create([
+            Conversation(user_low_id=low, user_high_id=high, item_id=rng.choice(item_ids)) for low, high in pairs
+        ], batch_size=BATCH_SIZE)
+        ConversationParticipant.objects.bulk_create([
+            ConversationParticipant(conversation=thread, user_id=user, other_user_id=other)
+            for thread in threads
+            for user, other in ((thread.user_low_id, thread.user_high_id), (thread.user_high_id, thread.user_low_id))
+        ], batch_size=BATCH_SIZE)
+        rows = []
+        for _ in range(messages if threads else 0):
+            thread = rng.choice(threads)
+            sender, receiver = rng.sample([thread.user_low_id, thread.user_high_id], 2)
+            rows.append(Message(
+                conversation=thread, sender_id=sender, receiver_id=receiver, item_id=thread.item_id,
+                text=rng.choice(MESSAGES), is_read=rng.random() < 0.7,
+            ))
+        message_ids = [message.pk for message in Message.objects.bulk_create(rows, batch_size=BATCH_SIZE)]
+        spread_created_at(Message, rng, 60, message_ids)
+
+        # The summaries chat/signals.py keeps on save, set-based
+        if not threads:
+            return
+        thread_ids = (threads[0].pk, threads[-1].pk)
+        newest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id')
+        Conversation.objects.filter(pk__range=thread_ids).update(
+            last_message=Subquery(newest.values('pk')[:1]), last_message_at=Subquery(newest.values('created_at')[:1])
+        )
+        unread = Message.objects.filter(
+            conversation=OuterRef('conversation'), receiver=OuterRef('user'), is_read=False
+        ).order_by().values('conversation').annotate(count=Count('id')).values('count')
+        latest = Message.objects.filter(conversation=OuterRef('conversation')).order_by().values(
+            'conversation'
+        ).annotate(latest=Max('created_at')).values('latest')
+        ConversationParticipant.objects.filter(conversation__gte=thread_ids[0], conversation__lte=thread_ids[1]).update(
+            unread_count=Coalesce(Subquery(unread[:1]), 0), last_message_at=Subquery(latest[:1])
+        )
+
+    def seed_notifications(self, rng, user_ids, count):
+        types = [choice for choice, _ in Notification.NOTIFICATION_TYPES]
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=rng.choice(user_ids), notification_type=rng.choice(types), title='Benchmark notification',
+                message='Something happened to one of your listings.', is_read=rng.random() < 0.75, is_sent=True,
+            )
+            for _ in range(count)
+        ], batch_size=BATCH_SIZE)
+        spread_created_at(Notification, rng, 90, [notification.pk for notification in notifications])
+
+    def seed_forum(self, rng, user_ids, posts, replies):
+        categories = [ForumCategory.objects.get_or_create(name=name)[0].pk for name in FORUM_CATEGORIES]
+        rows = []
+        for n in range(posts):
+            content = f'Benchmark thread {n}: ' + ' '.join(rng.choice(MESSAGES) for _ in range(6))
+            rows.append(ForumPost(
+                author_id=rng.choice(user_ids), category_id=rng.choice(categories), title=f'Benchmark thread {n}',
+                content=content, excerpt=make_excerpt(content),
+                post_type=rng.choice([choice for choice, _ in ForumPost.POST_TYPES]), view_count=rng.randint(0, 500),
+            ))
+        post_ids = [post.pk for post in ForumPost.objects.bulk_create(rows, batch_size=BATCH_SIZE)]
+        spread_created_at(ForumPost, rng, 120, post_ids)
+        reply_ids = [reply.pk for reply in ForumReply.objects.bulk_create([
+            ForumReply(post_id=rng.choice(post_ids), author_id=rng.choice(user_ids), content=rng.choice(MESSAGES))
+            for _ in range(replies if post_ids else 0)
+        ], batch_size=BATCH_SIZE)]
+        spread_created_at(ForumReply, rng, 60, reply_ids)
+
+        # The counters forum/signals.py keeps on save, set-based
+        post_replies = ForumReply.objects.filter(post=OuterRef('pk')).order_by()
+        newest = ForumReply.objects.filter(post=OuterRef('pk')).order_by('-created_at', '-id')
+        if not post_ids:
+            return
+        ForumPost.objects.filter(pk__range=(post_ids[0], post_ids[-1])).update(
+            reply_count=Coalesce(Subquery(post_replies.values('post').annotate(count=Count('id')).values('count')[:1]), 0),
+            last_reply_at=Subquery(newest.values('created_at')[:1]),
+            last_reply_author=Subquery(newest.values('author')[:1]),
+        )
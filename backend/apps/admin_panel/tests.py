@@ -0,0 +1,152 @@
+import io
+import json
+import os
+import tempfile
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from apps.items.models import Item
+from apps.users.models import User
+from apps.admin_panel.management.commands.run_benchmarks import worker_command
+from marketplace.profiling import endpoint_report, get_store, prometheus_text
+from marketplace.querylog import QueryLogMiddleware, explain, plan_problems, read_log
+
+
+@override_settings(PERF_SAMPLE_RATE=1)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        get_store().clear()
+        owner = User.objects.create_user(username='seller', email='seller@ait.ac.th')
+        Item.objects.bulk_create([Item(owner=owner, title=f'Textbook {n}', price=100 + n) for n in range(30)])
+
+    def tearDown(self):
+        get_store().clear()
+
+    def test_serializer_time_is_reported_apart_from_render_time(self):
+        client = APIClient()
+        for url in ('/api/items/', '/api/forum/posts/'):
+            self.assertEqual(client.get(url).status_code, 200)
+
+        samples, totals = get_store().snapshot()
+        self.assertEqual(len(samples), 2)
+        for sample in samples:
+            self.assertGreater(sample['serialize_ms'], 0, sample['endpoint'])
+            self.assertGreater(sample['render_ms'], 0, sample['endpoint'])
+            self.assertLess(sample['serialize_ms'] + sample['render_ms'], sample['duration_ms'])
+        self.assertEqual({row['endpoint'] for row in endpoint_report(samples) if row['avg_serialize_ms'] > 0}, {
+            sample['endpoint'] for sample in samples
+        })
+        self.assertIn('marketplace_serialize_seconds_total{', prometheus_text(totals))
+
+    def test_serializers_are_not_patched(self):
+        APIClient().get('/api/forum/posts/')
+        self.assertEqual(serializers.Serializer.data.fget.__module__, 'rest_framework.serializers')
+        self.assertEqual(serializers.ListSerializer.data.fget.__module__, 'rest_framework.serializers')
+
+    async def test_async_requests_profile_sync_views_and_skip_async_ones(self):
+        response = await self.async_client.get('/api/forum/posts/')
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get('/api/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+
+        samples, _ = get_store().snapshot()
+        self.assertEqual([sample['path'] for sample in samples], ['/api/forum/posts/'])
+        self.assertGreater(samples[0]['queries'], 0)
+        self.assertGreater(samples[0]['serialize_ms'], 0)
+
+
+class QueryLogTests(TestCase):
+    def setUp(self):
+        fd, self.log_path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        self.addCleanup(os.unlink, self.log_path)
+
+    def test_plan_problems_flags_scans_and_unindexed_sorts(self):
+        plan = [
+            'SCAN items_item',
+            'SCAN users_user AS U0',
+            'SEARCH items_item USING INDEX item_available_price_idx (price>?)',
+            'SEARCH users_user USING INTEGER PRIMARY KEY (rowid=?)',
+            'SCAN items_item USING INDEX item_created_idx',
+            'USE TEMP B-TREE FOR ORDER BY',
+            'USE TEMP B-TREE FOR RIGHT PART OF ORDER BY',
+        ]
+        self.assertEqual(plan_problems(plan), [
+            ('full scan', 'items_item'),
+            ('full scan', 'users_user'),
+            ('sort', 'USE TEMP B-TREE FOR ORDER BY'),
+            ('sort', 'USE TEMP B-TREE FOR RIGHT PART OF ORDER BY'),
+        ])
+
+    def test_explained_plans_are_flagged(self):
+        self.assertEqual(plan_problems(explain('SELECT id FROM items_item WHERE id = %s', [1])), [])
+        self.assertEqual(
+            [kind for kind, detail in plan_problems(explain('SELECT id FROM items_item ORDER BY description'))],
+            ['full scan', 'sort'],
+        )
+
+    def test_middleware_records_only_selects(self):
+        def view(request):
+            owner = User.objects.create_user(username='seller', email='seller@ait.ac.th')
+            Item.objects.filter(owner=owner).update(price=5)
+            list(Item.objects.filter(owner=owner))
+            return HttpResponse()
+
+        with override_settings(QUERY_LOG_PATH=self.log_path):
+            QueryLogMiddleware(view)(RequestFactory().get('/api/items/'))
+
+        with open(self.log_path) as log:
+            entries = [json.loads(line) for line in log]
+        self.assertTrue(entries)
+        self.assertTrue(all(entry['sql'].startswith('SELECT') for entry in entries))
+        self.assertEqual({entry['path'] for entry in entries}, {'/api/items/'})
+        self.assertTrue(any('"items_item"' in entry['sql'] for entry in entries))
+
+    @override_settings(QUERY_LOG_PATH='')
+    def test_middleware_is_skipped_without_a_log_path(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryLogMiddleware(lambda request: HttpResponse())
+
+    def test_explain_command_reports_flagged_queries(self):
+        with open(self.log_path, 'w') as log:
+            for sql, params in [
+                ('SELECT id FROM items_item ORDER BY description', []),
+                ('SELECT id FROM items_item ORDER BY description', []),
+                ('SELECT id FROM items_item WHERE id = %s', [1]),
+            ]:
+                log.write(json.dumps({'sql': sql, 'params': params, 'path': '/api/items/'}) + '\n')
+        self.assertEqual(read_log(self.log_path)['SELECT id FROM items_item ORDER BY description']['count'], 2)
+
+        out = io.StringIO()
+        call_command('explain_query_log', self.log_path, stdout=out)
+        self.assertIn('2x  full scan: items_item; sort: USE TEMP B-TREE FOR ORDER BY', out.getvalue())
+        self.assertIn('2 distinct queries, 1 flagged', out.getvalue())
+
+        with self.assertRaisesMessage(CommandError, '1 flagged'):
+            call_command('explain_query_log', self.log_path, fail_on_scan=True, stdout=io.StringIO())
+
+        out = io.StringIO()
+        call_command('explain_query_log', self.log_path, ignore_table=['items_item'], stdout=out)
+        self.assertIn('2x  sort: USE TEMP B-TREE FOR ORDER BY\n', out.getvalue())
+
+
+class BenchmarkCommandTests(TestCase):
+    @override_settings(DEBUG=False)
+    def test_benchmark_data_is_only_written_on_request(self):
+        with self.assertRaisesMessage(CommandError, '--yes-i-mean-it'):
+            call_command('seed_benchmark_data', stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, '--yes-i-mean-it'):
+            call_command('run_benchmarks', stdout=io.StringIO())
+        self.assertFalse(User.objects.exists())
+        # Confirmed, run_benchmarks gets as far as asking for seeded users
+        with self.assertRaisesMessage(CommandError, 'No benchmark users'):
+            call_command('run_benchmarks', yes_i_mean_it=True, stdout=io.StringIO())
+
+    def test_workers_can_run_the_production_server(self):
+        self.assertEqual(worker_command('daphne', 8700)[1:], [
+            '-m', 'daphne', '-b', '127.0.0.1', '-p', '8700', 'marketplace.asgi:application',
+        ])
+        self.assertIn('--nothreading', worker_command('runserver', 8700))
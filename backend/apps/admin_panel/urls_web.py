@@ -10,6 +10,9 @@ urlpatterns = [
     path('items/<int:item_id>/action/', views_web.admin_items_action, name='admin_items_action'),
     path('orders/', views_web.admin_orders, name='admin_orders'),
     path('memberships/', views_web.admin_memberships, name='admin_memberships'),
+    path('perf/', views_web.admin_perf, name='admin_perf'),
+    path('perf/reset/', views_web.admin_perf_reset, name='admin_perf_reset'),
+    path('perf/metrics/', views_web.admin_perf_metrics, name='admin_perf_metrics'),
 ]
 
 
@@ -2,7 +2,7 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Avg
+from django.db.models import Count, Sum, Avg, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 from apps.users.models import User
@@ -13,86 +13,49 @@ from apps.wishlist.models import WantToBuy
 from apps.forum.models import ForumPost
 from apps.advertisements.models import Advertisement
 from apps.notifications.models import Notification
+from apps.statistics.dashboard import get_dashboard
+from apps.statistics.rollups import monthly_totals
+from marketplace.pagination import KeysetPagination
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def admin_dashboard(request):
     """Admin dashboard with comprehensive statistics"""
     
-    # Basic counts
-    total_users = User.objects.count()
-    verified_users = User.objects.filter(is_verified=True).count()
-    total_items = Item.objects.count()
-    available_items = Item.objects.filter(is_available=True).count()
-    total_orders = Order.objects.count()
-    completed_orders = Order.objects.filter(status='delivered').count()
-    total_barter_requests = BarterTransaction.objects.count()
-    total_forum_posts = ForumPost.objects.count()
-    total_advertisements = Advertisement.objects.count()
+    data = get_dashboard([
+        'users', 'items', 'orders', 'barter', 'forum', 'advertisements',
+        'popular_categories', 'order_status',
+    ])
+    users, items, orders = data['users'], data['items'], data['orders']
     
-    # Revenue statistics
-    total_revenue = Order.objects.filter(
-        payment_status='paid'
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    monthly_revenue = Order.objects.filter(
-        payment_status='paid',
-        created_at__gte=timezone.now() - timedelta(days=30)
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    # Recent activity (last 7 days)
-    week_ago = timezone.now() - timedelta(days=7)
-    recent_users = User.objects.filter(date_joined__gte=week_ago).count()
-    recent_items = Item.objects.filter(created_at__gte=week_ago).count()
-    recent_orders = Order.objects.filter(created_at__gte=week_ago).count()
-    recent_posts = ForumPost.objects.filter(created_at__gte=week_ago).count()
-    
-    # Popular categories
-    popular_categories = Item.objects.filter(
-        is_available=True
-    ).values('category').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]
-    
-    # Order status distribution
-    order_status_dist = Order.objects.values('status').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    # User registration over time (last 12 months)
-    twelve_months_ago = timezone.now() - timedelta(days=365)
-    monthly_registrations = User.objects.filter(
-        date_joined__gte=twelve_months_ago
-    ).extra(
-        select={'month': "DATE_TRUNC('month', date_joined)"}
-    ).values('month').annotate(
-        count=Count('id')
-    ).order_by('month')
+    # User registration over time (last 12 months), from the daily rollup rows
+    twelve_months_ago = timezone.localdate() - timedelta(days=365)
+    monthly_registrations = monthly_totals(twelve_months_ago, count='new_users')
     
     return Response({
         'overview': {
-            'total_users': total_users,
-            'verified_users': verified_users,
-            'total_items': total_items,
-            'available_items': available_items,
-            'total_orders': total_orders,
-            'completed_orders': completed_orders,
-            'total_barter_requests': total_barter_requests,
-            'total_forum_posts': total_forum_posts,
-            'total_advertisements': total_advertisements,
+            'total_users': users['total'],
+            'verified_users': users['verified'],
+            'total_items': items['total'],
+            'available_items': items['available'],
+            'total_orders': orders['total'],
+            'completed_orders': orders['delivered'],
+            'total_barter_requests': data['barter']['total'],
+            'total_forum_posts': data['forum']['total'],
+            'total_advertisements': data['advertisements']['total'],
         },
         'revenue': {
-            'total_revenue': float(total_revenue),
-            'monthly_revenue': float(monthly_revenue),
+            'total_revenue': orders['revenue'],
+            'monthly_revenue': orders['revenue_30d'],
         },
         'recent_activity': {
-            'recent_users': recent_users,
-            'recent_items': recent_items,
-            'recent_orders': recent_orders,
-            'recent_posts': recent_posts,
+            'recent_users': users['created_7d'],
+            'recent_items': items['created_7d'],
+            'recent_orders': orders['created_7d'],
+            'recent_posts': data['forum']['created_7d'],
         },
-        'popular_categories': list(popular_categories),
-        'order_status_distribution': list(order_status_dist),
+        'popular_categories': data['popular_categories']['top'],
+        'order_status_distribution': data['order_status']['distribution'],
         'monthly_registrations': list(monthly_registrations)
     })
 
@@ -125,14 +88,11 @@ def user_management(request):
             Q(ait_email__icontains=search)
         )
     
-    # Pagination
-    page_size = int(request.query_params.get('page_size', 20))
-    page = int(request.query_params.get('page', 1))
-    start = (page - 1) * page_size
-    end = start + page_size
+    # Keyset pagination (no OFFSET scan, count only on request)
+    paginator = KeysetPagination()
     
     users_data = []
-    for user in users[start:end]:
+    for user in paginator.paginate_queryset(users, request):
         users_data.append({
             'id': user.id,
             'username': user.username,
@@ -149,9 +109,7 @@ def user_management(request):
     
     return Response({
         'users': users_data,
-        'total_count': users.count(),
-        'page': page,
-        'page_size': page_size
+        **paginator.get_page_metadata()
     })
 
 @api_view(['GET'])
@@ -184,14 +142,11 @@ def item_management(request):
             Q(owner__username__icontains=search)
         )
     
-    # Pagination
-    page_size = int(request.query_params.get('page_size', 20))
-    page = int(request.query_params.get('page', 1))
-    start = (page - 1) * page_size
-    end = start + page_size
+    # Keyset pagination (no OFFSET scan, count only on request)
+    paginator = KeysetPagination()
     
     items_data = []
-    for item in items[start:end]:
+    for item in paginator.paginate_queryset(items, request):
         items_data.append({
             'id': item.id,
             'title': item.title,
@@ -207,9 +162,7 @@ def item_management(request):
     
     return Response({
         'items': items_data,
-        'total_count': items.count(),
-        'page': page,
-        'page_size': page_size
+        **paginator.get_page_metadata()
     })
 
 @api_view(['GET'])
@@ -237,14 +190,11 @@ def order_management(request):
             Q(item__title__icontains=search)
         )
     
-    # Pagination
-    page_size = int(request.query_params.get('page_size', 20))
-    page = int(request.query_params.get('page', 1))
-    start = (page - 1) * page_size
-    end = start + page_size
+    # Keyset pagination (no OFFSET scan, count only on request)
+    paginator = KeysetPagination()
     
     orders_data = []
-    for order in orders[start:end]:
+    for order in paginator.paginate_queryset(orders, request):
         orders_data.append({
             'id': order.id,
             'buyer': order.buyer.username,
@@ -261,9 +211,7 @@ def order_management(request):
     
     return Response({
         'orders': orders_data,
-        'total_count': orders.count(),
-        'page': page,
-        'page_size': page_size
+        **paginator.get_page_metadata()
     })
 
 @api_view(['POST'])
@@ -299,6 +247,7 @@ def system_health(request):
     """System health check"""
     from django.db import connection
     from django.core.cache import cache
+    from marketplace.response_cache import stats as response_cache_stats
     
     # Database health
     try:
@@ -321,6 +270,7 @@ def system_health(request):
     return Response({
         'database': db_status,
         'cache': cache_status,
+        'response_cache': response_cache_stats.snapshot(),
         'recent_errors': recent_errors,
         'timestamp': timezone.now().isoformat()
     })
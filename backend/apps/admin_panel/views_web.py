@@ -1,4 +1,8 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse
 from django.shortcuts import render, redirect
+from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.contrib.auth import login as auth_login
@@ -11,6 +15,9 @@ from apps.items.models import Item
 from apps.orders.models import Order
 from apps.barter.models import BarterTransaction
 from apps.wanted.models import WantedItem
+from apps.statistics.dashboard import get_dashboard
+from apps.statistics.rollups import daily_series
+from marketplace.profiling import endpoint_report, get_store, prometheus_text
 
 def is_admin(user):
     return user.is_authenticated and user.is_staff
@@ -26,62 +33,19 @@ def admin_login_view(request):
 @user_passes_test(is_admin)
 def admin_dashboard(request):
     """Main admin dashboard"""
-    # Basic counts
-    total_users = User.objects.count()
-    verified_users = User.objects.filter(is_verified=True).count()
-    total_items = Item.objects.count()
-    available_items = Item.objects.filter(is_available=True).count()
-    total_orders = Order.objects.count()
-    completed_orders = Order.objects.filter(status='delivered').count()
-    total_barter = BarterTransaction.objects.count()
-    total_wanted = WantedItem.objects.filter(is_active=True).count()
+    data = get_dashboard(['users', 'items', 'orders', 'barter', 'wanted', 'memberships'])
+    users, items, orders = data['users'], data['items'], data['orders']
     
-    # Memberships
-    active_memberships = UserMembership.objects.filter(
-        is_active=True,
-        end_date__gt=timezone.now()
-    ).count()
+    # Recent activity (last 7 days) and previous week for comparison
+    recent_users, prev_week_users = users['created_7d'], users['created_prev_7d']
+    recent_items, prev_week_items = items['created_7d'], items['created_prev_7d']
+    recent_orders, prev_week_orders = orders['created_7d'], orders['created_prev_7d']
     
-    # Revenue
-    total_revenue = Order.objects.filter(
-        payment_status='paid'
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    monthly_revenue = Order.objects.filter(
-        payment_status='paid',
-        created_at__gte=timezone.now() - timedelta(days=30)
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    # Recent activity (last 7 days)
-    week_ago = timezone.now() - timedelta(days=7)
-    recent_users = User.objects.filter(date_joined__gte=week_ago).count()
-    recent_items = Item.objects.filter(created_at__gte=week_ago).count()
-    recent_orders = Order.objects.filter(created_at__gte=week_ago).count()
-    
-    # Previous week for comparison
-    two_weeks_ago = timezone.now() - timedelta(days=14)
-    prev_week_users = User.objects.filter(date_joined__gte=two_weeks_ago, date_joined__lt=week_ago).count()
-    prev_week_items = Item.objects.filter(created_at__gte=two_weeks_ago, created_at__lt=week_ago).count()
-    prev_week_orders = Order.objects.filter(created_at__gte=two_weeks_ago, created_at__lt=week_ago).count()
-    
-    # Daily trends (last 7 days)
-    daily_stats = []
-    for i in range(7):
-        day_start = timezone.now() - timedelta(days=i+1)
-        day_end = timezone.now() - timedelta(days=i)
-        daily_stats.append({
-            'date': day_start.date(),
-            'users': User.objects.filter(date_joined__gte=day_start, date_joined__lt=day_end).count(),
-            'items': Item.objects.filter(created_at__gte=day_start, created_at__lt=day_end).count(),
-            'orders': Order.objects.filter(created_at__gte=day_start, created_at__lt=day_end).count(),
-        })
-    daily_stats.reverse()
-    
-    # Featured items
-    featured_items = Item.objects.filter(is_featured=True, is_available=True).count()
-    
-    # Pending orders
-    pending_orders = Order.objects.filter(status='pending').count()
+    # Daily trends (last 7 days): seven rollup rows instead of 21 count queries
+    daily_stats = [
+        {'date': day['date'], 'users': day['new_users'], 'items': day['new_items'], 'orders': day['orders']}
+        for day in daily_series(7, ['new_users', 'new_items', 'orders'])
+    ]
     
     # Calculate growth rates
     user_growth = ((recent_users - prev_week_users) / prev_week_users * 100) if prev_week_users > 0 else 0
@@ -89,25 +53,25 @@ def admin_dashboard(request):
     order_growth = ((recent_orders - prev_week_orders) / prev_week_orders * 100) if prev_week_orders > 0 else 0
     
     context = {
-        'total_users': total_users,
-        'verified_users': verified_users,
-        'total_items': total_items,
-        'available_items': available_items,
-        'total_orders': total_orders,
-        'completed_orders': completed_orders,
-        'pending_orders': pending_orders,
-        'total_barter': total_barter,
-        'total_wanted': total_wanted,
-        'active_memberships': active_memberships,
-        'total_revenue': float(total_revenue),
-        'monthly_revenue': float(monthly_revenue),
+        'total_users': users['total'],
+        'verified_users': users['verified'],
+        'total_items': items['total'],
+        'available_items': items['available'],
+        'total_orders': orders['total'],
+        'completed_orders': orders['delivered'],
+        'pending_orders': orders['pending'],
+        'total_barter': data['barter']['total'],
+        'total_wanted': data['wanted']['active'],
+        'active_memberships': data['memberships']['active'],
+        'total_revenue': orders['revenue'],
+        'monthly_revenue': orders['revenue_30d'],
         'recent_users': recent_users,
         'recent_items': recent_items,
         'recent_orders': recent_orders,
         'user_growth': round(user_growth, 1),
         'item_growth': round(item_growth, 1),
         'order_growth': round(order_growth, 1),
-        'featured_items': featured_items,
+        'featured_items': items['featured'],
         'daily_stats': daily_stats,
     }
     return render(request, 'admin/dashboard.html', context)
@@ -307,3 +271,37 @@ def admin_memberships(request):
     }
     return render(request, 'admin/memberships.html', context)
 
+
+@login_required
+@user_passes_test(is_admin)
+def admin_perf(request):
+    """Per-endpoint latency, query counts and N+1 flags of the sampled requests in this process"""
+    samples, _ = get_store().snapshot()
+    context = {
+        'endpoints': endpoint_report(samples),
+        'n_plus_one': [sample for sample in reversed(samples) if sample['n_plus_one']][:20],
+        'sample_count': len(samples),
+        'sample_rate': getattr(settings, 'PERF_SAMPLE_RATE', 0),
+        'threshold': getattr(settings, 'PERF_N_PLUS_ONE_THRESHOLD', 5),
+    }
+    return render(request, 'admin/perf.html', context)
+
+@login_required
+@user_passes_test(is_admin)
+@require_POST
+def admin_perf_reset(request):
+    get_store().clear()
+    messages.success(request, 'Performance samples cleared')
+    return redirect('admin_perf')
+
+def admin_perf_metrics(request):
+    """Prometheus text endpoint: a staff session, or `Authorization: Bearer <PERF_METRICS_TOKEN>` for scrapers"""
+    token = getattr(settings, 'PERF_METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    authorized = is_admin(request.user) or (
+        token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    )
+    if not authorized:
+        return HttpResponse(status=401)
+    _, totals = get_store().snapshot()
+    return HttpResponse(prometheus_text(totals), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Advertisement, AdClick, AdView
+from .models import Advertisement, AdClick, AdView, AdStatBucket
 
 @admin.register(Advertisement)
 class AdvertisementAdmin(admin.ModelAdmin):
@@ -27,3 +27,9 @@ class AdViewAdmin(admin.ModelAdmin):
     list_filter = ['viewed_at', 'advertisement__ad_type']
     search_fields = ['advertisement__title', 'user__username', 'ip_address']
     readonly_fields = ['viewed_at']
+
+@admin.register(AdStatBucket)
+class AdStatBucketAdmin(admin.ModelAdmin):
+    list_display = ['advertisement', 'granularity', 'bucket_start', 'views', 'clicks']
+    list_filter = ['granularity', 'bucket_start']
+    search_fields = ['advertisement__title']
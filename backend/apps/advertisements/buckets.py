@@ -0,0 +1,89 @@
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from .models import AdStatBucket, AdClick, AdView
+
+
+def bucket_starts(at):
+    """Start of the hour (UTC) and of the local day an event falls in"""
+    hour = at.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    day = timezone.localtime(at).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (('hour', hour), ('day', day))
+
+
+def local_day_start(at):
+    return timezone.localtime(at).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def count_events(events):
+    """{(ad_id, granularity, bucket_start): [views, clicks]} for (kind, ad_id, at) triples"""
+    counts = defaultdict(lambda: [0, 0])
+    for kind, ad_id, at in events:
+        for granularity, start in bucket_starts(at):
+            counts[(ad_id, granularity, start)][1 if kind == 'click' else 0] += 1
+    return counts
+
+
+def add_to_buckets(counts):
+    """Apply counts with F() increments, creating bucket rows the first time they are hit"""
+    for (ad_id, granularity, start), (views, clicks) in counts.items():
+        lookup = {'advertisement_id': ad_id, 'granularity': granularity, 'bucket_start': start}
+        changes = {'views': F('views') + views, 'clicks': F('clicks') + clicks}
+        if AdStatBucket.objects.filter(**lookup).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                AdStatBucket.objects.create(views=views, clicks=clicks, **lookup)
+        except IntegrityError:
+            # Another writer created the bucket first
+            AdStatBucket.objects.filter(**lookup).update(**changes)
+
+
+def rebuild_buckets(since, hourly_since=None):
+    """
+    Recompute buckets from the raw AdView/AdClick rows on or after ``since``.
+
+    ``since`` should be a local midnight so daily buckets are rebuilt whole;
+    hourly buckets are only rebuilt from ``hourly_since`` onwards.
+    """
+    hourly_since = max(since, hourly_since or since)
+    counts = defaultdict(lambda: [0, 0])
+    truncations = [
+        ('day', since, lambda field: TruncDay(field, tzinfo=timezone.get_current_timezone())),
+        ('hour', hourly_since, lambda field: TruncHour(field, tzinfo=dt_timezone.utc)),
+    ]
+    for granularity, start, trunc in truncations:
+        for model, field, slot in ((AdView, 'viewed_at', 0), (AdClick, 'clicked_at', 1)):
+            rows = model.objects.filter(**{f'{field}__gte': start}).annotate(
+                bucket=trunc(field)
+            ).values('advertisement_id', 'bucket').annotate(count=Count('id')).order_by()
+            for row in rows:
+                counts[(row['advertisement_id'], granularity, row['bucket'])][slot] = row['count']
+
+    with transaction.atomic():
+        AdStatBucket.objects.filter(granularity='day', bucket_start__gte=since).delete()
+        AdStatBucket.objects.filter(granularity='hour', bucket_start__gte=hourly_since).delete()
+        AdStatBucket.objects.bulk_create(
+            [
+                AdStatBucket(advertisement_id=ad_id, granularity=granularity, bucket_start=start,
+                             views=views, clicks=clicks)
+                for (ad_id, granularity, start), (views, clicks) in counts.items()
+            ],
+            batch_size=1000
+        )
+    return len(counts)
+
+
+def bucket_series(ad, granularity, since):
+    return list(
+        AdStatBucket.objects.filter(
+            advertisement=ad, granularity=granularity, bucket_start__gte=since
+        ).values('bucket_start', 'views', 'clicks')
+    )
+
+
+def recent_window(days):
+    return local_day_start(timezone.now()) - timedelta(days=days - 1)
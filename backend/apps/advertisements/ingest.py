@@ -0,0 +1,375 @@
+import atexit
+import ipaddress
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from django.conf import settings
+from django.db import DataError, DatabaseError, IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+# Spool files are named ads-<pid>-<token>-<n>: pids are reused across restarts
+# (always 1 in a container), the random per-process token is not
+PROCESS_TOKEN = secrets.token_hex(4)
+DEAD_LETTER_FILE = 'dead-letter.jsonl'
+# ip_address is NOT NULL; beacons without a usable client address get this
+UNKNOWN_IP = '0.0.0.0'
+URL_MAX_LENGTH = 200
+
+
+class BufferFull(Exception):
+    """Raised when events arrive faster than they can be written"""
+
+
+def write_events(events):
+    """Insert a batch of beacon events and apply the counter deltas with F() updates, in one transaction"""
+    from apps.users.models import User
+    from .buckets import add_to_buckets, count_events
+    from .models import Advertisement, AdClick, AdView
+
+    ad_ids = {event['ad'] for event in events}
+    known_ads = set(Advertisement.objects.filter(pk__in=ad_ids).values_list('pk', flat=True))
+    user_ids = {event['user'] for event in events if event['user']}
+    known_users = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True)) if user_ids else set()
+
+    views, clicks, bucketed = [], [], []
+    deltas = {'view': Counter(), 'click': Counter()}
+    for event in events:
+        if event['ad'] not in known_ads:
+            continue  # the ad was deleted (or never existed) before the batch was written
+        common = {
+            'advertisement_id': event['ad'],
+            'user_id': event['user'] if event['user'] in known_users else None,
+            'ip_address': event['ip'],
+            'user_agent': event['ua'],
+        }
+        at = datetime.fromisoformat(event['at'])
+        if event['kind'] == 'click':
+            clicks.append(AdClick(referer=event['url'], clicked_at=at, **common))
+        else:
+            views.append(AdView(page_url=event['url'], viewed_at=at, **common))
+        deltas[event['kind']][event['ad']] += 1
+        bucketed.append((event['kind'], event['ad'], at))
+
+    with transaction.atomic():
+        AdView.objects.bulk_create(views, batch_size=500)
+        AdClick.objects.bulk_create(clicks, batch_size=500)
+        for ad_id in deltas['view'].keys() | deltas['click'].keys():
+            Advertisement.objects.filter(pk=ad_id).update(
+                view_count=F('view_count') + deltas['view'][ad_id],
+                click_count=F('click_count') + deltas['click'][ad_id],
+            )
+        add_to_buckets(count_events(bucketed))
+    return len(views) + len(clicks)
+
+
+def clean_ip(value):
+    try:
+        return str(ipaddress.ip_address((value or '').strip()))
+    except ValueError:
+        return UNKNOWN_IP
+
+
+def make_event(kind, ad_id, user_id=None, ip=None, user_agent='', url=''):
+    """A beacon event with every value the insert needs already valid"""
+    if kind not in ('view', 'click'):
+        raise ValueError(f'Unknown ad event kind: {kind}')
+    return {
+        'kind': kind, 'ad': int(ad_id), 'user': int(user_id) if user_id else None, 'ip': clean_ip(ip),
+        'ua': user_agent or '', 'url': (url or '')[:URL_MAX_LENGTH], 'at': timezone.now().isoformat(),
+    }
+
+
+def write_bisecting(events, dead_letter):
+    """
+    Write events, splitting a batch the database rejects until the bad
+    events are isolated and handed to ``dead_letter``. Returns (written,
+    unwritten): the unwritten events are those left when some other
+    DatabaseError (an outage, a lock timeout) stopped the writes.
+    """
+    written = 0
+    chunks = [events]
+    while chunks:
+        chunk = chunks.pop()
+        try:
+            written += write_events(chunk)
+        except (DataError, IntegrityError, KeyError, TypeError, ValueError) as exc:
+            if len(chunk) == 1:
+                dead_letter(chunk[0], exc)
+            else:
+                middle = len(chunk) // 2
+                chunks += [chunk[middle:], chunk[:middle]]
+        except DatabaseError:
+            logger.exception('Writing %s ad events failed', len(chunk))
+            return written, chunk + [event for rest in reversed(chunks) for event in rest]
+    return written, []
+
+
+def dead_letter_to(spool_dir):
+    """A dead_letter callback that logs the event and keeps it in the spool directory's dead-letter file"""
+    def dead_letter(event, exc):
+        logger.error('Dropping ad event the database rejects (%s): %r', exc, event)
+        if spool_dir:
+            with open(Path(spool_dir) / DEAD_LETTER_FILE, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(event, separators=(',', ':'), default=str) + '\n')
+    return dead_letter
+
+
+def read_spool(path):
+    events = []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                # A torn final line from a crash mid-write; everything before it is intact
+                logger.warning('Skipping unreadable line in %s', path)
+    return events
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_orphan(path):
+    """Whether a spool file was left behind by a process that is gone (possibly an earlier one with our pid)"""
+    try:
+        _, pid, token = path.name.split('-')[:3]
+        pid = int(pid)
+    except ValueError:
+        return False
+    if pid == os.getpid():
+        return token != PROCESS_TOKEN
+    return not pid_alive(pid)
+
+
+def claim_orphans(spool_dir):
+    """Rename orphaned spool files to names owned by this process; returns the claimed paths"""
+    claimed = []
+    for path in sorted(Path(spool_dir).glob('ads-*-*.*')):
+        if path.suffix not in ('.spool', '.flushing') or not is_orphan(path):
+            continue
+        # If another process claimed the file first the rename fails
+        target = path.with_name(f'ads-{os.getpid()}-{PROCESS_TOKEN}-replay{time.time_ns()}.flushing')
+        try:
+            os.replace(path, target)
+        except FileNotFoundError:
+            continue
+        claimed.append(target)
+    return claimed
+
+
+def write_spool_file(path, chunk_size=1000):
+    """Write the events of a claimed spool file and delete it; on a database outage keep the unwritten rest in it"""
+    events = read_spool(path)
+    dead_letter = dead_letter_to(path.parent)
+    written = 0
+    for start in range(0, len(events), chunk_size):
+        count, unwritten = write_bisecting(events[start:start + chunk_size], dead_letter)
+        written += count
+        if unwritten:
+            rest = path.with_suffix('.rest')
+            rest.write_text(''.join(
+                json.dumps(event, separators=(',', ':')) + '\n' for event in unwritten + events[start + chunk_size:]
+            ), encoding='utf-8')
+            os.replace(rest, path)
+            raise DatabaseError(f'{len(unwritten)} events of {path.name} could not be written yet')
+    path.unlink()
+    return written
+
+
+class AdEventBuffer:
+    """
+    Buffers ad impressions and clicks and writes them in batches.
+
+    Every event is appended to an in-memory list and, when a spool directory
+    is configured, to an append-only JSON-lines spool file owned by this
+    process. A batch is written with bulk_create plus one F() counter update
+    per ad (and per hourly/daily AdStatBucket) when ``flush_size`` events
+    are pending or every ``flush_interval`` seconds from a background
+    thread. On flush the spool is rotated and the old file is deleted only
+    after the batch commits, so a crashed process leaves its events on disk.
+    A new buffer claims such orphaned files before opening its own spool
+    and its flusher thread writes them (so does the replay_ad_spool
+    command). Delivery is at-least-once: a crash
+    between commit and unlink replays that batch again.
+
+    A batch the database rejects (bad data rather than an outage) is split
+    until the offending events are isolated; those go to the dead-letter
+    file in the spool directory instead of being retried forever.
+
+    Backpressure: once ``max_pending`` events are waiting, the request that
+    hits the limit flushes inline; if the database cannot keep up either,
+    ``record`` raises BufferFull.
+    """
+
+    def __init__(self, flush_size=500, flush_interval=2.0, max_pending=20000, spool_dir=None):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.pending = []
+        self.claimed = []
+        self.sequence = 0
+        self.spool = None
+        self.spool_path = None
+        self.flusher = None
+        self.stopped = threading.Event()
+        self.written = 0
+        self.rejected = 0
+        self.dead_lettered = 0
+        self.orphans = []
+        if self.spool_dir:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            self.orphans = claim_orphans(self.spool_dir)
+            self.open_spool()
+
+    def open_spool(self):
+        self.sequence += 1
+        self.spool_path = self.spool_dir / f'ads-{os.getpid()}-{PROCESS_TOKEN}-{self.sequence}.spool'
+        self.spool = open(self.spool_path, 'a', encoding='utf-8')
+
+    def rotate_spool(self):
+        """Hand the current spool file over to the flush in progress; called with self.lock held"""
+        if self.spool is None:
+            return
+        self.spool.close()
+        flushing = self.spool_path.with_suffix('.flushing')
+        os.replace(self.spool_path, flushing)
+        self.claimed.append(flushing)
+        self.open_spool()
+
+    def record(self, kind, ad_id, user_id=None, ip=None, user_agent='', url=''):
+        event = make_event(kind, ad_id, user_id, ip, user_agent, url)
+        if not self.append(event):
+            self.flush()
+            if not self.append(event):
+                self.rejected += 1
+                raise BufferFull('Ad event buffer is full')
+        self.start_flusher()
+        if len(self.pending) >= self.flush_size:
+            self.flush(blocking=False)
+
+    def append(self, event):
+        with self.lock:
+            if len(self.pending) >= self.max_pending:
+                return False
+            self.pending.append(event)
+            if self.spool is not None:
+                self.spool.write(json.dumps(event, separators=(',', ':')) + '\n')
+                self.spool.flush()
+                if getattr(settings, 'AD_EVENT_SPOOL_FSYNC', False):
+                    os.fsync(self.spool.fileno())
+            return True
+
+    def flush(self, blocking=True):
+        """Write pending events; returns how many were written"""
+        if not self.flush_lock.acquire(blocking=blocking):
+            return 0
+        try:
+            with self.lock:
+                events, self.pending = self.pending, []
+                if events:
+                    self.rotate_spool()
+            if not events:
+                return 0
+            written, unwritten = write_bisecting(events, self.dead_letter)
+            self.written += written
+            if unwritten:
+                logger.warning('Keeping %s unwritten ad events for the next attempt', len(unwritten))
+                with self.lock:
+                    self.pending[:0] = unwritten
+                return written
+            for path in self.claimed:
+                path.unlink(missing_ok=True)
+            self.claimed = []
+            return written
+        finally:
+            self.flush_lock.release()
+
+    def dead_letter(self, event, exc):
+        self.dead_lettered += 1
+        dead_letter_to(self.spool_dir)(event, exc)
+
+    def start_flusher(self):
+        if self.flusher is not None:
+            return
+        with self.lock:
+            if self.flusher is not None:
+                return
+            self.flusher = threading.Thread(target=self.run_flusher, name='ad-event-flusher', daemon=True)
+            self.flusher.start()
+
+    def replay_orphans(self):
+        """Write the spool files claimed at startup; a file that fails stays claimed for the next round"""
+        while self.orphans:
+            self.written += write_spool_file(self.orphans[0])
+            self.orphans.pop(0)
+
+    def run_flusher(self):
+        while True:
+            if self.orphans:
+                try:
+                    self.replay_orphans()
+                except Exception:
+                    logger.exception('Replaying orphaned ad spool files failed')
+            if self.stopped.wait(self.flush_interval):
+                return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Ad event flush failed')
+
+    def close(self):
+        self.stopped.set()
+        self.flush()
+        with self.lock:
+            if self.spool is not None:
+                self.spool.close()
+                self.spool = None
+                if self.spool_path.exists() and self.spool_path.stat().st_size == 0:
+                    self.spool_path.unlink()
+
+    def stats(self):
+        return {
+            'pending': len(self.pending), 'written': self.written, 'rejected': self.rejected,
+            'dead_lettered': self.dead_lettered,
+        }
+
+
+def replay_orphans(spool_dir, chunk_size=1000):
+    """Write events from spool files left behind by processes that are no longer running"""
+    return sum(write_spool_file(path, chunk_size) for path in claim_orphans(spool_dir))
+
+
+def get_ad_event_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = AdEventBuffer(
+                flush_size=getattr(settings, 'AD_EVENT_FLUSH_SIZE', 500),
+                flush_interval=getattr(settings, 'AD_EVENT_FLUSH_INTERVAL', 2.0),
+                max_pending=getattr(settings, 'AD_EVENT_MAX_PENDING', 20000),
+                spool_dir=getattr(settings, 'AD_EVENT_SPOOL_DIR', None),
+            )
+            atexit.register(_buffer.close)
+        return _buffer
@@ -0,0 +1,91 @@
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from apps.advertisements import ingest
+from apps.advertisements.ingest import AdEventBuffer
+from apps.advertisements.models import Advertisement, AdView
+from apps.advertisements.views import track_ad_view
+from apps.users.models import User
+
+
+def legacy_track_view(ad_id):
+    """What track_ad_view used to do per beacon: lookup, insert, read-modify-write"""
+    ad = Advertisement.objects.get(id=ad_id)
+    AdView.objects.create(advertisement=ad, ip_address='127.0.0.1', user_agent='bench', page_url='')
+    ad.view_count += 1
+    ad.save(update_fields=['view_count'])
+
+
+class Command(BaseCommand):
+    help = 'Fire concurrent ad view beacons and compare legacy per-request writes with the buffered pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--beacons', type=int, default=5000, help='Beacons per strategy')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--flush-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        owner, _ = User.objects.get_or_create(username='bench_ads', defaults={'email': 'bench_ads@ait.ac.th'})
+        now = timezone.now()
+        ads = [
+            Advertisement.objects.create(
+                title=f'Bench ad {label}', image_url='https://example.com/ad.png', status='active',
+                start_date=now - timedelta(days=1), end_date=now + timedelta(days=1), created_by=owner,
+            )
+            for label in ('legacy', 'buffered')
+        ]
+        try:
+            self.run('legacy per-request writes', ads[0], options, lambda ad_id: legacy_track_view(ad_id))
+
+            factory = APIRequestFactory()
+            with tempfile.TemporaryDirectory() as spool_dir:
+                buffer = AdEventBuffer(flush_size=options['flush_size'], flush_interval=0.5,
+                                       max_pending=options['beacons'] * 2, spool_dir=spool_dir)
+                original, ingest._buffer = ingest._buffer, buffer
+                try:
+                    def beacon(ad_id):
+                        response = track_ad_view(factory.post(f'/api/advertisements/{ad_id}/view/'), ad_id=ad_id)
+                        if response.status_code != 202:
+                            raise DatabaseError(f'HTTP {response.status_code}')
+                    self.run('buffered pipeline (view)', ads[1], options, beacon, finish=buffer.close)
+                finally:
+                    ingest._buffer = original
+        finally:
+            Advertisement.objects.filter(pk__in=[ad.pk for ad in ads]).delete()
+
+    def run(self, label, ad, options, send, finish=None):
+        per_thread = options['beacons'] // options['threads']
+        errors = []
+
+        def worker():
+            for _ in range(per_thread):
+                try:
+                    send(ad.pk)
+                except (DatabaseError, Advertisement.DoesNotExist) as exc:
+                    errors.append(exc)
+            connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        accepted_seconds = time.perf_counter() - started
+        if finish:
+            finish()
+        total_seconds = time.perf_counter() - started
+
+        sent = per_thread * options['threads']
+        ad.refresh_from_db()
+        rows = AdView.objects.filter(advertisement=ad).count()
+        self.stdout.write(
+            f'{label:<28} {sent / accepted_seconds:9.0f} beacons/s accepted, '
+            f'{sent / total_seconds:9.0f}/s incl. final flush | '
+            f'errors {len(errors)}, rows {rows}, view_count {ad.view_count} (sent {sent})'
+        )
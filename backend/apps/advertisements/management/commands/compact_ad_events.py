@@ -0,0 +1,58 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+from apps.advertisements.buckets import local_day_start, rebuild_buckets
+from apps.advertisements.models import AdClick, AdStatBucket, AdView
+
+
+class Command(BaseCommand):
+    help = 'Prune raw ad views/clicks and old hourly buckets; daily buckets keep the history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--raw-days', type=int, default=getattr(settings, 'AD_RAW_EVENT_RETENTION_DAYS', 30),
+                            help='Keep raw AdView/AdClick rows for this many days')
+        parser.add_argument('--hourly-days', type=int, default=getattr(settings, 'AD_HOURLY_BUCKET_RETENTION_DAYS', 14),
+                            help='Keep hourly buckets for this many days')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='First recompute buckets from the raw rows that are still kept')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        # Cut at local midnight so a daily bucket is never backed by a partially pruned day
+        raw_cutoff = local_day_start(timezone.now()) - timedelta(days=options['raw_days'])
+        hourly_cutoff = local_day_start(timezone.now()) - timedelta(days=options['hourly_days'])
+
+        if options['rebuild'] and not options['dry_run']:
+            earliest = [
+                AdView.objects.aggregate(first=Min('viewed_at'))['first'],
+                AdClick.objects.aggregate(first=Min('clicked_at'))['first'],
+            ]
+            earliest = [value for value in earliest if value]
+            if earliest:
+                since = max(local_day_start(min(earliest)), raw_cutoff)
+                buckets = rebuild_buckets(since, hourly_since=hourly_cutoff)
+                self.stdout.write(f'Rebuilt {buckets} buckets from raw events since {since:%Y-%m-%d}')
+
+        views = self.prune(AdView.objects.filter(viewed_at__lt=raw_cutoff), options)
+        clicks = self.prune(AdClick.objects.filter(clicked_at__lt=raw_cutoff), options)
+        hourly = self.prune(AdStatBucket.objects.filter(granularity='hour', bucket_start__lt=hourly_cutoff), options)
+
+        verb = 'Would prune' if options['dry_run'] else 'Pruned'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {views} views and {clicks} clicks before {raw_cutoff:%Y-%m-%d}, '
+            f'{hourly} hourly buckets before {hourly_cutoff:%Y-%m-%d}'
+        ))
+
+    def prune(self, queryset, options):
+        """Delete in primary-key chunks so a large backlog never holds one long write lock"""
+        if options['dry_run']:
+            return queryset.count()
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                return deleted
+            deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
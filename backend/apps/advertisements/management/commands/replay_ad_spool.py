@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.advertisements.ingest import replay_orphans
+
+
+class Command(BaseCommand):
+    help = 'Write ad impression/click events left in spool files by processes that are no longer running'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spool-dir', default=getattr(settings, 'AD_EVENT_SPOOL_DIR', ''))
+
+    def handle(self, *args, **options):
+        if not options['spool_dir']:
+            raise CommandError('No spool directory configured (AD_EVENT_SPOOL_DIR)')
+        replayed = replay_orphans(options['spool_dir'])
+        self.stdout.write(self.style.SUCCESS(f'Replayed {replayed} events'))
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:35
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='adclick',
+            name='clicked_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='adview',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
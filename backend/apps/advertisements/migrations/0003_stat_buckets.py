@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:36
+
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_buckets(apps, schema_editor):
+    """Roll the raw views/clicks recorded so far into hourly and daily buckets"""
+    AdStatBucket = apps.get_model('advertisements', 'AdStatBucket')
+    sources = [
+        (apps.get_model('advertisements', 'AdView'), 'viewed_at', 'views'),
+        (apps.get_model('advertisements', 'AdClick'), 'clicked_at', 'clicks'),
+    ]
+    truncations = [
+        ('day', lambda field: TruncDay(field, tzinfo=timezone.get_current_timezone())),
+        ('hour', lambda field: TruncHour(field, tzinfo=dt_timezone.utc)),
+    ]
+    counts = defaultdict(lambda: {'views': 0, 'clicks': 0})
+    for granularity, trunc in truncations:
+        for model, field, column in sources:
+            rows = model.objects.annotate(bucket=trunc(field)).values('advertisement_id', 'bucket').annotate(
+                count=Count('id')
+            ).order_by()
+            for row in rows:
+                counts[(row['advertisement_id'], granularity, row['bucket'])][column] = row['count']
+    AdStatBucket.objects.bulk_create(
+        [
+            AdStatBucket(advertisement_id=ad_id, granularity=granularity, bucket_start=start, **values)
+            for (ad_id, granularity, start), values in counts.items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0002_event_time_defaults'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdStatBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('advertisement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stat_buckets', to='advertisements.advertisement')),
+            ],
+            options={
+                'ordering': ['advertisement', 'granularity', 'bucket_start'],
+                'unique_together': {('advertisement', 'granularity', 'bucket_start')},
+            },
+        ),
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
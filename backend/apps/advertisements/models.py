@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
@@ -70,7 +71,7 @@ class AdClick(models.Model):
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField(blank=True)
     referer = models.URLField(blank=True)
-    clicked_at = models.DateTimeField(auto_now_add=True)
+    clicked_at = models.DateTimeField(default=timezone.now)  # set from the beacon time when ingested in batches
     
     class Meta:
         ordering = ['-clicked_at']
@@ -84,10 +85,36 @@ class AdView(models.Model):
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField(blank=True)
     page_url = models.URLField(blank=True)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    viewed_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-viewed_at']
     
     def __str__(self):
         return f"View of {self.advertisement.title} at {self.viewed_at}"
+
+class AdStatBucket(models.Model):
+    """Views and clicks per ad per hour or per (local) day, kept current by event ingestion"""
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    advertisement = models.ForeignKey(Advertisement, on_delete=models.CASCADE, related_name='stat_buckets')
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['advertisement', 'granularity', 'bucket_start']
+        unique_together = ['advertisement', 'granularity', 'bucket_start']
+    
+    def __str__(self):
+        return f"{self.advertisement_id} {self.granularity} {self.bucket_start}"
+    
+    @property
+    def click_through_rate(self):
+        if self.views == 0:
+            return 0
+        return (self.clicks / self.views) * 100
@@ -0,0 +1,142 @@
+import threading
+import time
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_ad_index():
+    """Return this process's ad serving index, (re)loading it when it is dirty or too old"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = AdServingIndex(max_age=getattr(settings, 'AD_INDEX_MAX_AGE', 60))
+                index.load_from_database()
+                _index = index
+    index = _index
+    # One request reloads; concurrent ones keep serving the current entries instead of reloading alongside it
+    if index.is_stale() and _index_lock.acquire(blocking=False):
+        try:
+            if index.is_stale():
+                index.load_from_database()
+        finally:
+            _index_lock.release()
+    return index
+
+
+def warm_up_ad_index():
+    try:
+        get_ad_index()
+    except DatabaseError:
+        # Tables not migrated yet; the index is built lazily on first use instead
+        pass
+
+
+def mark_ad_index_dirty():
+    if _index is not None:
+        _index.dirty = True
+
+
+def parse_targets(value):
+    """'Books, furniture ,' -> frozenset({'books', 'furniture'}); empty means untargeted"""
+    return frozenset(part.strip().lower() for part in (value or '').split(',') if part.strip())
+
+
+class AdServingIndex:
+    """
+    In-process index of servable advertisements.
+
+    One query loads every active ad whose end_date has not passed, already
+    serialized, with targeting parsed into normalized sets. Selections are
+    memoized per (position, category, location) until the next moment an ad
+    starts or ends, so serving is a dict lookup; ad writes mark the index
+    dirty (this process) and ``max_age`` bounds staleness across processes.
+    """
+
+    max_selections = 1024
+
+    def __init__(self, max_age=60):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries = []
+        self.ids = frozenset()
+        self.by_position = {}
+        self.selections = {}
+        self.valid_until = None
+        self.loaded_at = 0
+        self.dirty = False
+
+    def is_stale(self):
+        return self.dirty or (self.max_age and time.monotonic() - self.loaded_at > self.max_age)
+
+    def load_from_database(self):
+        from .models import Advertisement
+        from .serializers import AdvertisementSerializer
+
+        self.dirty = False
+        now = timezone.now()
+        ads = Advertisement.objects.filter(status='active', end_date__gte=now).select_related(
+            'created_by'
+        ).order_by('sort_order', '-created_at')
+        entries = [
+            {
+                'position': ad.position,
+                'start': ad.start_date,
+                'end': ad.end_date,
+                'categories': parse_targets(ad.target_categories),
+                'locations': parse_targets(ad.target_locations),
+                'data': AdvertisementSerializer(ad).data,
+            }
+            for ad in ads
+        ]
+        by_position = {}
+        for entry in entries:
+            by_position.setdefault(entry['position'], []).append(entry)
+        with self.lock:
+            self.entries = entries
+            self.ids = frozenset(entry['data']['id'] for entry in entries)
+            self.by_position = by_position
+            self.selections = {}
+            self.valid_until = None
+            self.loaded_at = time.monotonic()
+
+    def is_servable(self, ad_id):
+        """Whether the ad was active and not yet ended when the index was loaded"""
+        return ad_id in self.ids
+
+    def next_boundary(self, now):
+        """The next start_date or end_date after now, when memoized selections expire"""
+        moments = [entry['start'] for entry in self.entries if entry['start'] > now]
+        moments += [entry['end'] for entry in self.entries if entry['end'] >= now]
+        return min(moments) if moments else None
+
+    def select(self, position=None, category=None, location=None):
+        """Active ads for a slot, ordered like the model (sort_order, newest first)"""
+        now = timezone.now()
+        key = (position, (category or '').strip().lower(), (location or '').strip().lower())
+        with self.lock:
+            if self.valid_until is not None and now > self.valid_until:
+                self.selections = {}
+                self.valid_until = None
+            if key in self.selections:
+                return self.selections[key]
+
+            candidates = self.entries if position is None else self.by_position.get(position, [])
+            # Entries are kept in model order (sort_order, newest first), so filtering preserves it
+            selected = [
+                {**entry['data'], 'is_active': True} for entry in candidates
+                if entry['start'] <= now <= entry['end']
+                and (not key[1] or not entry['categories'] or key[1] in entry['categories'])
+                and (not key[2] or not entry['locations'] or key[2] in entry['locations'])
+            ]
+            if len(self.selections) >= self.max_selections:
+                # Arbitrary category/location strings must not grow the memo without bound
+                self.selections = {}
+            self.selections[key] = selected
+            if self.valid_until is None:
+                self.valid_until = self.next_boundary(now)
+            return selected
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Advertisement
+from .serving import mark_ad_index_dirty
+
+COUNTER_FIELDS = {'view_count', 'click_count'}
+
+@receiver(post_save, sender=Advertisement)
+@receiver(post_delete, sender=Advertisement)
+def refresh_ad_index(sender, raw=False, update_fields=None, **kwargs):
+    # Counter-only saves do not change what is served
+    if raw or (update_fields and COUNTER_FIELDS.issuperset(update_fields)):
+        return
+    mark_ad_index_dirty()
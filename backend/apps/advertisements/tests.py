@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.users.models import User
+from .ingest import DEAD_LETTER_FILE, UNKNOWN_IP, AdEventBuffer, make_event
+from .models import Advertisement, AdView
+from .serving import AdServingIndex, get_ad_index, mark_ad_index_dirty
+
+
+def beacon(ad_id, **overrides):
+    return dict({
+        'kind': 'view', 'ad': ad_id, 'user': None, 'ip': '10.0.0.1',
+        'ua': 'test', 'url': '', 'at': timezone.now().isoformat(),
+    }, **overrides)
+
+
+class AdEventBufferTests(TestCase):
+    def setUp(self):
+        self.spool_dir = Path(tempfile.mkdtemp())
+        owner = User.objects.create_user(username='advertiser', email='advertiser@ait.ac.th')
+        now = timezone.now()
+        self.ad = Advertisement.objects.create(
+            title='Campus cafe', image_url='https://example.com/ad.png', status='active',
+            start_date=now - timedelta(days=1), end_date=now + timedelta(days=1), created_by=owner,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def test_replays_spool_left_by_an_earlier_process_with_the_same_pid(self):
+        # A restarted container reuses the pid; only the token tells the runs apart
+        leftover = self.spool_dir / f'ads-{os.getpid()}-0ld0ld00-1.spool'
+        leftover.write_text(json.dumps(beacon(self.ad.pk)) + '\n')
+
+        buffer = AdEventBuffer(spool_dir=self.spool_dir)
+        self.assertFalse(leftover.exists())
+        self.assertNotEqual(buffer.spool_path.name, leftover.name)
+        buffer.replay_orphans()
+        buffer.close()
+
+        self.assertEqual(AdView.objects.filter(advertisement=self.ad).count(), 1)
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.view_count, 1)
+        self.assertEqual(list(self.spool_dir.iterdir()), [])
+
+    def test_live_buffer_spool_is_not_claimed(self):
+        first = AdEventBuffer(spool_dir=self.spool_dir)
+        first.append(beacon(self.ad.pk))
+        second = AdEventBuffer(spool_dir=self.spool_dir)
+        self.assertEqual(second.orphans, [])
+        self.assertTrue(first.spool_path.exists())
+        self.assertEqual(first.flush(), 1)
+        first.close()
+        second.close()
+
+    def test_beacon_without_client_address_is_stored(self):
+        event = make_event('view', self.ad.pk, ip=None, url='https://example.com/' + 'x' * 300)
+        self.assertEqual(event['ip'], UNKNOWN_IP)
+        self.assertEqual(len(event['url']), 200)
+        self.assertEqual(make_event('click', self.ad.pk, ip=' 10.1.2.3 ')['ip'], '10.1.2.3')
+
+        buffer = AdEventBuffer()
+        buffer.append(event)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(AdView.objects.get().ip_address, UNKNOWN_IP)
+
+    def test_rejected_event_is_dead_lettered_and_the_rest_written(self):
+        buffer = AdEventBuffer(spool_dir=self.spool_dir)
+        for n in range(6):
+            # The fourth one skipped cleaning: NULL into the NOT NULL ip_address column
+            buffer.append(beacon(self.ad.pk, ip=None) if n == 3 else beacon(self.ad.pk))
+
+        self.assertEqual(buffer.flush(), 5)
+        self.assertEqual(buffer.stats()['pending'], 0)
+        self.assertEqual(buffer.stats()['dead_lettered'], 1)
+        self.assertEqual(AdView.objects.count(), 5)
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.view_count, 5)
+        dead = [json.loads(line) for line in (self.spool_dir / DEAD_LETTER_FILE).read_text().splitlines()]
+        self.assertEqual([event['ip'] for event in dead], [None])
+        buffer.close()
+
+
+class AdServingIndexTests(TestCase):
+    def test_stale_index_is_reloaded_by_one_request_at_a_time(self):
+        get_ad_index()
+        mark_ad_index_dirty()
+        reloads = []
+        original = AdServingIndex.load_from_database
+
+        def slow_load(index):
+            reloads.append(threading.get_ident())
+            time.sleep(0.05)
+            original(index)
+
+        barrier = threading.Barrier(8)
+
+        def request():
+            barrier.wait()
+            try:
+                get_ad_index()
+            finally:
+                connection.close()
+
+        with patch.object(AdServingIndex, 'load_from_database', slow_load):
+            threads = [threading.Thread(target=request) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(reloads), 1)
+        self.assertFalse(get_ad_index().is_stale())
+
+    def test_beacons_for_unknown_or_inactive_ads_get_404(self):
+        owner = User.objects.create_user(username='advertiser', email='advertiser@ait.ac.th')
+        now = timezone.now()
+        active, paused = [
+            Advertisement.objects.create(
+                title=title, image_url='https://example.com/ad.png', status=ad_status,
+                start_date=now - timedelta(days=1), end_date=now + timedelta(days=1), created_by=owner,
+            )
+            for title, ad_status in (('Campus cafe', 'active'), ('Old promo', 'paused'))
+        ]
+        client = APIClient()
+        with patch('apps.advertisements.views.get_ad_event_buffer') as buffer:
+            self.assertEqual(client.post(f'/api/advertisements/{active.pk}/view/').status_code, 202)
+            self.assertEqual(client.post(f'/api/advertisements/{paused.pk}/click/').status_code, 404)
+            self.assertEqual(client.post(f'/api/advertisements/{active.pk + 100}/view/').status_code, 404)
+            # An ad this process's index has not loaded yet is found in the database
+            with patch.object(AdServingIndex, 'is_servable', return_value=False):
+                self.assertEqual(client.post(f'/api/advertisements/{active.pk}/click/').status_code, 202)
+        self.assertEqual([call.args[:2] for call in buffer.return_value.record.call_args_list], [
+            ('view', active.pk), ('click', active.pk),
+        ])
@@ -2,9 +2,14 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from datetime import timedelta
 from django.db.models import Q
+from .buckets import bucket_series, recent_window
+from .ingest import BufferFull, get_ad_event_buffer
+from .serving import get_ad_index
 from .models import Advertisement, AdClick, AdView
 from .serializers import (
     AdvertisementSerializer, AdvertisementCreateSerializer,
@@ -35,14 +40,16 @@ class AdvertisementDetailView(generics.RetrieveUpdateDestroyAPIView):
 class PublicAdvertisementListView(generics.ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = AdvertisementSerializer
-    
-    def get_queryset(self):
-        now = timezone.now()
-        return Advertisement.objects.filter(
-            status='active',
-            start_date__lte=now,
-            end_date__gte=now
-        ).order_by('sort_order', '-created_at')
+    # The set of live ads is small and served from memory, so it is returned whole
+    pagination_class = None
+    
+    def list(self, request, *args, **kwargs):
+        ads = get_ad_index().select(
+            position=request.query_params.get('position'),
+            category=request.query_params.get('category'),
+            location=request.query_params.get('location'),
+        )
+        return Response(ads)
 
 class AdvertisementStatsView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
@@ -55,22 +62,24 @@ class AdvertisementStatsView(generics.ListAPIView):
 @permission_classes([AllowAny])
 def get_advertisements_by_position(request, position):
     """Get active advertisements for a specific position"""
-    now = timezone.now()
-    ads = Advertisement.objects.filter(
-        status='active',
-        start_date__lte=now,
-        end_date__gte=now,
-        position=position
-    ).order_by('sort_order', '-created_at')
+    # Optional ?category= and ?location= match the ads' targeting lists
+    ads = get_ad_index().select(
+        position=position,
+        category=request.query_params.get('category'),
+        location=request.query_params.get('location'),
+    )
     
-    return Response(AdvertisementSerializer(ads, many=True).data)
+    return Response(ads)
+
+def record_ad_event(request, kind, ad_id):
+    """Queue a beacon in the ingestion buffer; rows and counters are written in batches"""
+    # Unknown and inactive ads get a 404; the index answers without a query, the database covers
+    # ads activated in another process since this one's index was loaded
+    if not get_ad_index().is_servable(ad_id) and not Advertisement.objects.filter(
+        pk=ad_id, status='active', end_date__gte=timezone.now()
+    ).exists():
+        raise Http404
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def track_ad_view(request, ad_id):
-    """Track advertisement view"""
-    ad = get_object_or_404(Advertisement, id=ad_id)
-    
     # Get client IP
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
@@ -78,48 +87,31 @@ def track_ad_view(request, ad_id):
     else:
         ip_address = request.META.get('REMOTE_ADDR')
     
-    # Create view record
-    AdView.objects.create(
-        advertisement=ad,
-        user=request.user if request.user.is_authenticated else None,
-        ip_address=ip_address,
-        user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        page_url=request.META.get('HTTP_REFERER', '')
-    )
-    
-    # Update view count
-    ad.view_count += 1
-    ad.save(update_fields=['view_count'])
-    
-    return Response({'status': 'success'})
+    try:
+        get_ad_event_buffer().record(
+            kind, ad_id,
+            user_id=request.user.pk if request.user.is_authenticated else None,
+            ip=ip_address,
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            url=request.META.get('HTTP_REFERER', '')[:200],
+        )
+    except BufferFull:
+        return Response({'error': 'Too many events, retry later'}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        headers={'Retry-After': '1'})
+    
+    return Response({'status': 'success'}, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def track_ad_view(request, ad_id):
+    """Track advertisement view"""
+    return record_ad_event(request, 'view', ad_id)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def track_ad_click(request, ad_id):
     """Track advertisement click"""
-    ad = get_object_or_404(Advertisement, id=ad_id)
-    
-    # Get client IP
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip_address = x_forwarded_for.split(',')[0]
-    else:
-        ip_address = request.META.get('REMOTE_ADDR')
-    
-    # Create click record
-    AdClick.objects.create(
-        advertisement=ad,
-        user=request.user if request.user.is_authenticated else None,
-        ip_address=ip_address,
-        user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        referer=request.META.get('HTTP_REFERER', '')
-    )
-    
-    # Update click count
-    ad.click_count += 1
-    ad.save(update_fields=['click_count'])
-    
-    return Response({'status': 'success'})
+    return record_ad_event(request, 'click', ad_id)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -128,35 +120,26 @@ def advertisement_analytics(request, ad_id):
     ad = get_object_or_404(Advertisement, id=ad_id, created_by=request.user)
     
     # Get recent clicks and views
-    recent_clicks = AdClick.objects.filter(advertisement=ad).order_by('-clicked_at')[:10]
-    recent_views = AdView.objects.filter(advertisement=ad).order_by('-viewed_at')[:10]
-    
-    # Get daily stats for the last 30 days
-    from datetime import timedelta
-    thirty_days_ago = timezone.now() - timedelta(days=30)
+    recent_clicks = AdClick.objects.filter(advertisement=ad).select_related('advertisement').order_by('-clicked_at')[:10]
+    recent_views = AdView.objects.filter(advertisement=ad).select_related('advertisement').order_by('-viewed_at')[:10]
     
-    daily_clicks = AdClick.objects.filter(
-        advertisement=ad,
-        clicked_at__gte=thirty_days_ago
-    ).extra(
-        select={'day': "DATE(clicked_at)"}
-    ).values('day').annotate(
-        count=models.Count('id')
-    ).order_by('day')
+    # Daily stats for the last 30 days and hourly for the last 48 hours, from the bucket table
+    daily = bucket_series(ad, 'day', recent_window(30))
+    hourly = bucket_series(ad, 'hour', timezone.now() - timedelta(hours=48))
     
-    daily_views = AdView.objects.filter(
-        advertisement=ad,
-        viewed_at__gte=thirty_days_ago
-    ).extra(
-        select={'day': "DATE(viewed_at)"}
-    ).values('day').annotate(
-        count=models.Count('id')
-    ).order_by('day')
+    daily_clicks = [{'day': timezone.localtime(b['bucket_start']).date(), 'count': b['clicks']} for b in daily if b['clicks']]
+    daily_views = [{'day': timezone.localtime(b['bucket_start']).date(), 'count': b['views']} for b in daily if b['views']]
+    views_30d = sum(b['views'] for b in daily)
+    clicks_30d = sum(b['clicks'] for b in daily)
     
     return Response({
         'advertisement': AdvertisementSerializer(ad).data,
         'recent_clicks': AdClickSerializer(recent_clicks, many=True).data,
         'recent_views': AdViewSerializer(recent_views, many=True).data,
-        'daily_clicks': list(daily_clicks),
-        'daily_views': list(daily_views)
+        'daily_clicks': daily_clicks,
+        'daily_views': daily_views,
+        'hourly': [
+            {'hour': b['bucket_start'], 'views': b['views'], 'clicks': b['clicks']} for b in hourly
+        ],
+        'click_through_rate_30d': (clicks_30d / views_30d) * 100 if views_30d else 0,
     })
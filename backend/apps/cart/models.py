@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import DecimalField, F, Sum
 from django.conf import settings
 from apps.items.models import Item
 
@@ -14,11 +15,22 @@ class Cart(models.Model):
     
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.totals()['total_items']
     
     @property
     def total_price(self):
-        return sum(item.total_price for item in self.items.all())
+        return self.totals()['total_price']
+    
+    def totals(self):
+        """Item count and price in one aggregate query, kept for the life of this instance"""
+        if not hasattr(self, '_totals'):
+            totals = self.items.aggregate(
+                total_items=Sum('quantity'),
+                total_price=Sum(F('quantity') * F('item__price'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+            )
+            # Unpriced (barter) items count as 0, as in CartItem.total_price
+            self._totals = {name: value or 0 for name, value in totals.items()}
+        return self._totals
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
@@ -0,0 +1,34 @@
+from decimal import Decimal
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.items.models import Item
+from apps.users.models import User
+from .models import Cart, CartItem
+
+
+class CartQueryCountTests(TestCase):
+    """The cart response costs the same number of queries however many lines it has"""
+
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', email='seller@ait.ac.th')
+
+    def client_with_cart(self, lines):
+        buyer = User.objects.create_user(username=f'buyer{lines}', email=f'buyer{lines}@ait.ac.th')
+        items = Item.objects.bulk_create([
+            Item(owner=self.seller, title=f'Textbook {n}', price=Decimal('10.50'), category='Books') for n in range(lines)
+        ])
+        cart = Cart.objects.create(user=buyer)
+        CartItem.objects.bulk_create([CartItem(cart=cart, item=item, quantity=2) for item in items])
+        client = APIClient()
+        client.force_authenticate(buyer)
+        return client
+
+    def test_cart_queries_are_constant(self):
+        for lines in (1, 10, 100):
+            with self.subTest(lines=lines):
+                client = self.client_with_cart(lines)
+                with self.assertNumQueries(3):
+                    response = client.get('/api/cart/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['items']), lines)
+                self.assertEqual(response.data['total_items'], 2 * lines)
@@ -3,16 +3,18 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from marketplace.prefetch import prefetch_for
+from marketplace.profiling import SerializationTimingMixin
 from .models import Cart, CartItem
 from .serializers import CartSerializer, AddToCartSerializer, UpdateCartItemSerializer
 
-class CartView(generics.RetrieveAPIView):
+class CartView(SerializationTimingMixin, generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = CartSerializer
     
     def get_object(self):
         cart, created = Cart.objects.get_or_create(user=self.request.user)
-        return cart
+        return prefetch_for(cart, CartSerializer)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -40,7 +42,7 @@ def add_to_cart(request):
             cart_item.quantity += quantity
             cart_item.save()
         
-        return Response(CartSerializer(cart).data, status=status.HTTP_201_CREATED)
+        return Response(CartSerializer(prefetch_for(cart, CartSerializer)).data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -55,7 +57,7 @@ def update_cart_item(request, item_id):
         cart_item.quantity = serializer.validated_data['quantity']
         cart_item.save()
         
-        return Response(CartSerializer(cart).data)
+        return Response(CartSerializer(prefetch_for(cart, CartSerializer)).data)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -66,7 +68,7 @@ def remove_from_cart(request, item_id):
     cart_item = get_object_or_404(CartItem, cart=cart, item_id=item_id)
     cart_item.delete()
     
-    return Response(CartSerializer(cart).data)
+    return Response(CartSerializer(prefetch_for(cart, CartSerializer)).data)
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
@@ -74,4 +76,4 @@ def clear_cart(request):
     cart = get_object_or_404(Cart, user=request.user)
     cart.items.all().delete()
     
-    return Response(CartSerializer(cart).data)
+    return Response(CartSerializer(prefetch_for(cart, CartSerializer)).data)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CategoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.categories'
+
+    def ready(self):
+        from marketplace.response_cache import invalidate_on
+        from .models import Category
+        invalidate_on(Category, 'categories')
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:31
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    Category = apps.get_model('categories', 'Category')
+    categories = {category.pk: category for category in Category.objects.all()}
+
+    def fill(category):
+        if category.path:
+            return category
+        parent = categories.get(category.parent_id)
+        if parent:
+            fill(parent)
+            category.path = f"{parent.path}{category.pk}/"
+            category.full_path = f"{parent.full_path} > {category.name}"
+            category.depth = parent.depth + 1
+        else:
+            category.path, category.full_path, category.depth = f"{category.pk}/", category.name, 0
+        return category
+
+    Category.objects.bulk_update(
+        [fill(category) for category in categories.values()], ['path', 'full_path', 'depth'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='full_path',
+            field=models.CharField(blank=True, editable=False, help_text="e.g. 'Electronics > Phones > Smartphones'", max_length=500),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
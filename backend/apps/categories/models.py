@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q, Subquery
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -8,6 +9,10 @@ class Category(models.Model):
     is_active = models.BooleanField(default=True)
     sort_order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Materialized path: ancestor ids root-first, e.g. "1/4/9/" (maintained in save)
+    path = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+    full_path = models.CharField(max_length=500, blank=True, editable=False, help_text="e.g. 'Electronics > Phones > Smartphones'")
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['sort_order', 'name']
@@ -16,12 +21,54 @@ class Category(models.Model):
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.update_path()
+    
+    def update_path(self):
+        """Recompute path/full_path/depth for this node and rewrite its descendants if they changed"""
+        parent = self.parent
+        if parent:
+            path, full_path, depth = f"{parent.path}{self.pk}/", f"{parent.full_path} > {self.name}", parent.depth + 1
+        else:
+            path, full_path, depth = f"{self.pk}/", self.name, 0
+        if (path, full_path, depth) == (self.path, self.full_path, self.depth):
+            return
+        
+        old_path = self.path
+        Category.objects.filter(pk=self.pk).update(path=path, full_path=full_path, depth=depth)
+        self.path, self.full_path, self.depth = path, full_path, depth
+        if not old_path:
+            return
+        
+        # One query for the whole subtree, parents before children, then one bulk update
+        descendants = list(Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).order_by('depth'))
+        nodes = {self.pk: self}
+        for node in descendants:
+            node_parent = nodes[node.parent_id]
+            node.path = f"{node_parent.path}{node.pk}/"
+            node.full_path = f"{node_parent.full_path} > {node.name}"
+            node.depth = node_parent.depth + 1
+            nodes[node.pk] = node
+        Category.objects.bulk_update(descendants, ['path', 'full_path', 'depth'], batch_size=500)
+    
     @property
-    def full_path(self):
-        """Return the full category path (e.g., 'Electronics > Phones > Smartphones')"""
-        if self.parent:
-            return f"{self.parent.full_path} > {self.name}"
-        return self.name
+    def ancestor_ids(self):
+        return [int(part) for part in self.path.split('/') if part][:-1]
+    
+    def ancestors(self):
+        """Breadcrumb categories, root first, in one query"""
+        ancestors = Category.objects.in_bulk(self.ancestor_ids)
+        return [ancestors[pk] for pk in self.ancestor_ids if pk in ancestors]
+    
+    def descendants(self, include_self=True):
+        queryset = Category.objects.filter(path__startswith=self.path)
+        return queryset if include_self else queryset.exclude(pk=self.pk)
+
+def in_category_subtree(category_id, field='category_new'):
+    """Q for rows whose category is category_id or one of its descendants, resolved inside the same query"""
+    path = Category.objects.filter(pk=category_id).values('path')[:1]
+    return Q(**{f'{field}__path__startswith': Subquery(path)})
 
 class CategoryParameter(models.Model):
     PARAMETER_TYPES = [
@@ -14,6 +14,13 @@ class CategorySerializer(serializers.ModelSerializer):
             return CategorySerializer(obj.children.all(), many=True).data
         return []
 
+class CategoryNodeSerializer(serializers.ModelSerializer):
+    """CategorySerializer fields without the per-node children query; the tree builder attaches children"""
+    
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'description', 'parent', 'image_url', 'is_active', 'sort_order', 'created_at', 'full_path']
+
 class CategoryParameterSerializer(serializers.ModelSerializer):
     choice_list = serializers.ReadOnlyField()
     
@@ -0,0 +1,84 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.items.models import Item
+from apps.users.models import User
+from marketplace.response_cache import get_cache
+from .models import Category, in_category_subtree
+
+
+class CategoryPathTests(TestCase):
+    def setUp(self):
+        self.electronics = Category.objects.create(name='Electronics')
+        self.books = Category.objects.create(name='Books')
+        self.phones = Category.objects.create(name='Phones', parent=self.electronics)
+        self.smartphones = Category.objects.create(name='Smartphones', parent=self.phones)
+        self.cases = Category.objects.create(name='Cases', parent=self.smartphones)
+
+    def paths(self):
+        return {
+            category.name: (category.path, category.full_path, category.depth)
+            for category in Category.objects.all()
+        }
+
+    def test_paths_are_materialized_on_create(self):
+        e, p, s, c = (self.electronics.pk, self.phones.pk, self.smartphones.pk, self.cases.pk)
+        self.assertEqual(self.paths()['Cases'], (f'{e}/{p}/{s}/{c}/', 'Electronics > Phones > Smartphones > Cases', 3))
+        self.assertEqual(self.cases.ancestors(), [self.electronics, self.phones, self.smartphones])
+
+    def test_moving_a_subtree_rewrites_every_descendant(self):
+        self.phones.parent = self.books
+        self.phones.save()
+
+        b, p, s, c = (self.books.pk, self.phones.pk, self.smartphones.pk, self.cases.pk)
+        paths = self.paths()
+        self.assertEqual(paths['Phones'], (f'{b}/{p}/', 'Books > Phones', 1))
+        self.assertEqual(paths['Smartphones'], (f'{b}/{p}/{s}/', 'Books > Phones > Smartphones', 2))
+        self.assertEqual(paths['Cases'], (f'{b}/{p}/{s}/{c}/', 'Books > Phones > Smartphones > Cases', 3))
+        self.assertEqual(paths['Electronics'], (f'{self.electronics.pk}/', 'Electronics', 0))
+
+        self.smartphones.refresh_from_db()
+        self.smartphones.parent = None
+        self.smartphones.save()
+        paths = self.paths()
+        self.assertEqual(paths['Smartphones'], (f'{s}/', 'Smartphones', 0))
+        self.assertEqual(paths['Cases'], (f'{s}/{c}/', 'Smartphones > Cases', 1))
+
+    def test_renaming_rewrites_descendant_full_paths(self):
+        self.electronics.name = 'Gadgets'
+        self.electronics.save()
+        self.assertEqual(self.paths()['Cases'][1:], ('Gadgets > Phones > Smartphones > Cases', 3))
+
+    def test_subtree_filter_follows_a_move(self):
+        owner = User.objects.create_user(username='seller', email='seller@ait.ac.th')
+        case = Item.objects.create(owner=owner, title='Phone case', price=5, category_new=self.cases)
+        novel = Item.objects.create(owner=owner, title='Novel', price=5, category_new=self.books)
+
+        def subtree(category):
+            return set(Item.objects.filter(in_category_subtree(category.pk)))
+
+        self.assertEqual(subtree(self.electronics), {case})
+        self.phones.parent = self.books
+        self.phones.save()
+        self.assertEqual(subtree(self.electronics), set())
+        self.assertEqual(subtree(self.books), {case, novel})
+        self.assertEqual(subtree(self.smartphones), {case})
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    def test_tree_nests_active_categories(self):
+        electronics = Category.objects.create(name='Electronics')
+        phones = Category.objects.create(name='Phones', parent=electronics)
+        Category.objects.create(name='Hidden', parent=electronics, is_active=False)
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='buyer', email='buyer@ait.ac.th'))
+        tree = client.get('/api/categories/tree/').json()
+        self.assertEqual([node['name'] for node in tree], ['Electronics'])
+        self.assertEqual(list(tree[0])[-2:], ['children', 'full_path'])
+        self.assertEqual([(node['id'], node['full_path']) for node in tree[0]['children']], [
+            (phones.pk, 'Electronics > Phones'),
+        ])
+        self.assertEqual(tree[0]['children'][0]['children'], [])
@@ -2,8 +2,11 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from marketplace.response_cache import cache_response
 from .models import Category, CategoryParameter
-from .serializers import CategorySerializer, CategoryWithParametersSerializer, CategoryParameterSerializer
+from .serializers import (
+    CategorySerializer, CategoryNodeSerializer, CategoryWithParametersSerializer, CategoryParameterSerializer
+)
 
 class CategoryListView(generics.ListAPIView):
     queryset = Category.objects.filter(is_active=True, parent__isnull=True)
@@ -21,21 +24,23 @@ class CategoryParameterListView(generics.ListAPIView):
         return CategoryParameter.objects.filter(category_id=category_id)
 
 @api_view(['GET'])
+@cache_response('categories')
 def category_tree(request):
     """Return the complete category tree structure"""
-    def build_tree(categories):
-        tree = []
-        for category in categories:
-            category_data = CategorySerializer(category).data
-            children = category.children.filter(is_active=True)
-            if children.exists():
-                category_data['children'] = build_tree(children)
-            else:
-                category_data['children'] = []
-            tree.append(category_data)
-        return tree
+    # One query for every active category, serialized in one pass and linked by parent id
+    categories = Category.objects.filter(is_active=True)
+    nodes = CategoryNodeSerializer(categories, many=True).data
+    children = {}
+    for node in nodes:
+        # Keys in CategorySerializer's order: children before full_path
+        full_path = node.pop('full_path')
+        node['children'] = children.setdefault(node['id'], [])
+        node['full_path'] = full_path
+    for node in nodes:
+        if node['parent'] is not None:
+            children.get(node['parent'], []).append(node)
     
-    root_categories = Category.objects.filter(is_active=True, parent__isnull=True)
-    tree = build_tree(root_categories)
+    # Subtrees under an inactive category are dropped, as before
+    tree = [node for node in nodes if node['parent'] is None]
     
     return Response(tree)
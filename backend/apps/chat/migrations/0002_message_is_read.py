@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+def mark_existing_read(apps, schema_editor):
+    # Messages sent before read tracking existed should not light up every inbox badge
+    Message = apps.get_model('chat', 'Message')
+    Message.objects.update(is_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='is_read',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_existing_read, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+from django.db import migrations
+
+BATCH_SIZE = 5000
+
+
+def backfill_conversations(apps, schema_editor):
+    # Each batch of messages commits on its own (atomic = False) so a large
+    # table is never one long write transaction; the schema is already in
+    # place (0003), so rerunning after a failure resumes with the messages
+    # that have no conversation and the conversations without participants.
+    from django.db import transaction
+    from django.db.models import Count, OuterRef, Subquery
+    from django.db.models.functions import Greatest, Least
+
+    Message = apps.get_model('chat', 'Message')
+    Conversation = apps.get_model('chat', 'Conversation')
+    ConversationParticipant = apps.get_model('chat', 'ConversationParticipant')
+
+    def conversation_of(**item):
+        return Subquery(Conversation.objects.filter(
+            user_low=Least(OuterRef('sender'), OuterRef('receiver')),
+            user_high=Greatest(OuterRef('sender'), OuterRef('receiver')), **item,
+        ).values('pk')[:1])
+
+    known = set(Conversation.objects.values_list('user_low', 'user_high', 'item'))
+    while True:
+        batch = list(
+            Message.objects.filter(conversation__isnull=True).order_by('pk').values_list(
+                'pk', 'sender', 'receiver', 'item'
+            )[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        keys = {tuple(sorted([sender, receiver])) + (item,) for pk, sender, receiver, item in batch}
+        with transaction.atomic():
+            Conversation.objects.bulk_create([
+                Conversation(user_low_id=low, user_high_id=high, item_id=item) for low, high, item in keys - known
+            ])
+            known |= keys
+            # Set-based: one UPDATE per batch (two, as NULL items need IS NULL) resolved on chat_conversation_unique
+            messages = Message.objects.filter(pk__gte=batch[0][0], pk__lte=batch[-1][0], conversation__isnull=True)
+            messages.filter(item__isnull=False).update(conversation=conversation_of(item=OuterRef('item')))
+            messages.filter(item__isnull=True).update(conversation=conversation_of(item__isnull=True))
+
+    newest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id')
+    Conversation.objects.filter(last_message__isnull=True).update(
+        last_message=Subquery(newest.values('pk')[:1]), last_message_at=Subquery(newest.values('created_at')[:1])
+    )
+
+    pending = Conversation.objects.filter(participants__isnull=True).order_by('pk')
+    while True:
+        batch = list(pending.values_list('pk', 'user_low', 'user_high', 'last_message_at')[:BATCH_SIZE])
+        if not batch:
+            break
+        unread = {
+            (row['conversation'], row['receiver']): row['count']
+            for row in Message.objects.filter(conversation__in=[row[0] for row in batch], is_read=False).values(
+                'conversation', 'receiver'
+            ).annotate(count=Count('id')).order_by()
+        }
+        with transaction.atomic():
+            ConversationParticipant.objects.bulk_create([
+                ConversationParticipant(
+                    conversation_id=pk, user_id=user, other_user_id=other,
+                    unread_count=unread.get((pk, user), 0), last_message_at=last_message_at,
+                )
+                for pk, low, high, last_message_at in batch
+                for user, other in {(low, high), (high, low)}
+            ])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('chat', '0003_conversations'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
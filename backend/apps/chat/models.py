@@ -3,15 +3,78 @@ from django.conf import settings
 from apps.items.models import Item
 User = settings.AUTH_USER_MODEL
 
+class Conversation(models.Model):
+    """A thread between two users, optionally about one item; participants are stored low id first"""
+    user_low = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    user_high = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    item = models.ForeignKey(Item, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_message = models.ForeignKey("Message", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-last_message_at", "-id"]
+        constraints = [
+            # NULL items are not unique in SQL; get_or_create in between() keeps those to one thread per pair
+            models.UniqueConstraint(fields=["user_low", "user_high", "item"], name="chat_conversation_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_low_id} <-> {self.user_high_id} (item {self.item_id})"
+
+    @classmethod
+    def between(cls, user_id, other_user_id, item_id=None):
+        """The conversation of two users about an item, created with both inbox entries on first use"""
+        low, high = sorted([user_id, other_user_id])
+        conversation, created = cls.objects.get_or_create(user_low_id=low, user_high_id=high, item_id=item_id)
+        if created:
+            ConversationParticipant.objects.bulk_create([
+                ConversationParticipant(conversation=conversation, user_id=user, other_user_id=other)
+                for user, other in {(low, high), (high, low)}
+            ])
+        return conversation
+
+class ConversationParticipant(models.Model):
+    """One user's inbox entry for a conversation: their unread count and the thread's latest activity"""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="participants")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="conversations")
+    other_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    unread_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-last_message_at", "-id"]
+        constraints = [
+            models.UniqueConstraint(fields=["conversation", "user"], name="chat_participant_unique"),
+        ]
+        indexes = [
+            # The inbox: WHERE user = ? ORDER BY last_message_at DESC, id DESC
+            models.Index(fields=["user", "-last_message_at", "-id"], name="chat_inbox_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in conversation {self.conversation_id}"
+
 class Message(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, blank=True, related_name="messages")
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="messages_sent")
     receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name="messages_received")
     item = models.ForeignKey(Item, on_delete=models.SET_NULL, null=True, blank=True)
     text = models.TextField()
+    is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Thread history: WHERE conversation = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=["conversation", "-created_at", "-id"], name="chat_message_thread_idx"),
+        ]
 
     def __str__(self):
         return f"{self.sender} -> {self.receiver}: {self.text[:30]}"
+
+    def save(self, *args, **kwargs):
+        if self.conversation_id is None and self.sender_id and self.receiver_id:
+            self.conversation = Conversation.between(self.sender_id, self.receiver_id, self.item_id)
+        super().save(*args, **kwargs)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Message
+from .models import ConversationParticipant, Message
 
 class MessageSerializer(serializers.ModelSerializer):
     sender_username = serializers.CharField(source="sender.username", read_only=True)
@@ -7,5 +7,34 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = ("id", "sender", "sender_username", "receiver", "receiver_username", "item", "text", "created_at")
-        read_only_fields = ("sender", "created_at")
+        fields = ("id", "conversation", "sender", "sender_username", "receiver", "receiver_username", "item", "text", "is_read", "created_at")
+        read_only_fields = ("conversation", "sender", "is_read", "created_at")
+
+class ThreadMessageSerializer(serializers.ModelSerializer):
+    """A message inside a known thread: participants are already on the conversation"""
+
+    class Meta:
+        model = Message
+        fields = ("id", "sender", "text", "is_read", "created_at")
+
+class InboxSerializer(serializers.ModelSerializer):
+    """One inbox row: the conversation, the other participant and the latest message"""
+    id = serializers.IntegerField(source="conversation_id", read_only=True)
+    other_user = serializers.SerializerMethodField()
+    item = serializers.SerializerMethodField()
+    last_message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ConversationParticipant
+        fields = ("id", "other_user", "item", "last_message", "last_message_at", "unread_count")
+
+    def get_other_user(self, obj):
+        return {"id": obj.other_user_id, "username": obj.other_user.username}
+
+    def get_item(self, obj):
+        item = obj.conversation.item
+        return {"id": item.id, "title": item.title} if item else None
+
+    def get_last_message(self, obj):
+        message = obj.conversation.last_message
+        return ThreadMessageSerializer(message).data if message else None
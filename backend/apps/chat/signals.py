@@ -0,0 +1,41 @@
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Conversation, ConversationParticipant, Message
+
+@receiver(post_save, sender=Message)
+def summarize_message(sender, instance, created=False, raw=False, **kwargs):
+    """Keep the thread's last message and each inbox entry's time and unread count current"""
+    if not created or raw or instance.conversation_id is None:
+        return
+    Conversation.objects.filter(pk=instance.conversation_id).filter(
+        Q(last_message_at__isnull=True) | Q(last_message_at__lte=instance.created_at)
+    ).update(last_message=instance, last_message_at=instance.created_at)
+    unread = 0 if instance.is_read else 1
+    ConversationParticipant.objects.filter(conversation_id=instance.conversation_id).update(
+        last_message_at=Greatest(Coalesce("last_message_at", instance.created_at), instance.created_at),
+        unread_count=Case(
+            When(user_id=instance.receiver_id, then=F("unread_count") + unread),
+            default=F("unread_count"), output_field=PositiveIntegerField(),
+        ),
+    )
+
+@receiver(post_delete, sender=Message)
+def unsummarize_message(sender, instance, **kwargs):
+    if instance.conversation_id is None:
+        return
+    if not instance.is_read:
+        ConversationParticipant.objects.filter(
+            conversation_id=instance.conversation_id, user_id=instance.receiver_id, unread_count__gt=0
+        ).update(unread_count=F("unread_count") - 1)
+    conversation = Conversation.objects.filter(pk=instance.conversation_id).first()
+    if conversation is not None and conversation.last_message_id in (None, instance.pk):
+        newest = conversation.messages.order_by("-created_at", "-id").first()
+        conversation.last_message = newest
+        conversation.last_message_at = newest.created_at if newest else None
+        conversation.save(update_fields=["last_message", "last_message_at"])
+        # Inbox entries sort by the thread's newest remaining message
+        ConversationParticipant.objects.filter(conversation_id=conversation.pk).update(
+            last_message_at=conversation.last_message_at
+        )
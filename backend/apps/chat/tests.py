@@ -0,0 +1,57 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.users.models import User
+from .models import Conversation, ConversationParticipant, Message
+
+
+class ConversationSummaryTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", email="alice@ait.ac.th")
+        self.bob = User.objects.create_user(username="bob", email="bob@ait.ac.th")
+        self.conversation = Conversation.between(self.alice.pk, self.bob.pk)
+
+    def send(self, sender, receiver, text):
+        return Message.objects.create(conversation=self.conversation, sender=sender, receiver=receiver, text=text)
+
+    def inbox_times(self):
+        return set(ConversationParticipant.objects.filter(conversation=self.conversation).values_list("last_message_at", flat=True))
+
+    def test_deleting_the_newest_message_moves_inbox_times_back(self):
+        first = self.send(self.alice, self.bob, "Is the bike still for sale?")
+        newest = self.send(self.bob, self.alice, "Yes, come by tomorrow")
+        self.assertEqual(self.inbox_times(), {newest.created_at})
+
+        newest.delete()
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message_id, first.pk)
+        self.assertEqual(self.inbox_times(), {first.created_at})
+
+        first.delete()
+        self.assertEqual(self.inbox_times(), {None})
+
+
+class MarkReadTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", email="alice@ait.ac.th")
+        self.bob = User.objects.create_user(username="bob", email="bob@ait.ac.th")
+        self.carol = User.objects.create_user(username="carol", email="carol@ait.ac.th")
+        for sender in (self.bob, self.carol):
+            Message.objects.create(
+                conversation=Conversation.between(sender.pk, self.alice.pk), sender=sender, receiver=self.alice, text="Hi"
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_sender_must_be_an_integer(self):
+        for sender in ("bob", "1; drop", [1], True, 0):
+            response = self.client.post("/api/chat/messages/mark-read/", {"sender": sender}, format="json")
+            self.assertEqual(response.status_code, 400, sender)
+            self.assertIn("sender", response.data)
+        self.assertEqual(Message.objects.filter(is_read=False).count(), 2)
+
+    def test_marks_one_sender_or_all(self):
+        response = self.client.post("/api/chat/messages/mark-read/", {"sender": str(self.bob.pk)}, format="json")
+        self.assertEqual(response.data, {"marked_read": 1})
+        self.assertEqual(ConversationParticipant.objects.get(user=self.alice, other_user=self.carol).unread_count, 1)
+        response = self.client.post("/api/chat/messages/mark-read/", {}, format="json")
+        self.assertEqual(response.data, {"marked_read": 1})
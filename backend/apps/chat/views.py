@@ -1,6 +1,12 @@
-from rest_framework import viewsets, permissions
-from .models import Message
-from .serializers import MessageSerializer
+from django.db.models import Q
+from rest_framework import viewsets, permissions, serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from apps.notifications import unread
+from marketplace.profiling import SerializationTimingMixin
+from .models import ConversationParticipant, Message
+from .serializers import InboxSerializer, MessageSerializer, ThreadMessageSerializer
 
 class MessageViewSet(viewsets.ModelViewSet):
     serializer_class = MessageSerializer
@@ -8,7 +14,61 @@ class MessageViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        return Message.objects.filter(sender=user) | Message.objects.filter(receiver=user)
+        return Message.objects.filter(Q(sender=user) | Q(receiver=user)).select_related("sender", "receiver")
 
     def perform_create(self, serializer):
         serializer.save(sender=self.request.user)
+
+    @action(detail=False, methods=["post"], url_path="mark-read")
+    def mark_read(self, request):
+        """Mark received messages read, optionally only those from one sender"""
+        messages = Message.objects.filter(receiver=request.user, is_read=False)
+        threads = ConversationParticipant.objects.filter(user=request.user, unread_count__gt=0)
+        sender = request.data.get("sender")
+        if sender not in (None, ""):
+            try:
+                sender = serializers.IntegerField(min_value=1).run_validation(sender)
+            except ValidationError as exc:
+                raise ValidationError({"sender": exc.detail})
+            messages = messages.filter(sender_id=sender)
+            threads = threads.filter(other_user_id=sender)
+        marked = messages.update(is_read=True)
+        threads.update(unread_count=0)
+        unread.adjust(request.user.id, chat=-marked)
+        return Response({"marked_read": marked})
+
+class ConversationViewSet(SerializationTimingMixin, viewsets.ReadOnlyModelViewSet):
+    """The inbox (one row per thread, latest activity first) and each thread's message history"""
+    serializer_class = InboxSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = "conversation"
+    lookup_url_kwarg = "pk"
+
+    def get_queryset(self):
+        # One query on chat_inbox_idx; the summary columns make per-thread lookups unnecessary
+        return ConversationParticipant.objects.filter(user=self.request.user).select_related(
+            "other_user", "conversation__item", "conversation__last_message"
+        ).only(
+            "conversation", "other_user", "unread_count", "last_message_at",
+            "other_user__username", "conversation__item__title",
+            "conversation__last_message__sender", "conversation__last_message__text",
+            "conversation__last_message__is_read", "conversation__last_message__created_at",
+        )
+
+    @action(detail=True, methods=["get"])
+    def messages(self, request, pk=None):
+        """The thread's messages, newest first, keyset-paginated on chat_message_thread_idx"""
+        participant = self.get_object()
+        page = self.paginate_queryset(Message.objects.filter(conversation_id=participant.conversation_id))
+        return self.get_paginated_response(ThreadMessageSerializer(page, many=True).data)
+
+    @action(detail=True, methods=["post"])
+    def read(self, request, pk=None):
+        """Mark everything the other participant sent in this thread read"""
+        participant = self.get_object()
+        marked = Message.objects.filter(
+            conversation_id=participant.conversation_id, receiver=request.user, is_read=False
+        ).update(is_read=True)
+        ConversationParticipant.objects.filter(pk=participant.pk).update(unread_count=0)
+        unread.adjust(request.user.id, chat=-marked)
+        return Response({"marked_read": marked})
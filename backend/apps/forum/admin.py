@@ -14,7 +14,7 @@ class ForumPostAdmin(admin.ModelAdmin):
     list_filter = ['status', 'post_type', 'is_pinned', 'is_locked', 'category', 'created_at']
     search_fields = ['title', 'content', 'author__username']
     list_editable = ['status', 'is_pinned', 'is_locked']
-    readonly_fields = ['view_count', 'like_count', 'reply_count', 'created_at', 'updated_at']
+    readonly_fields = ['view_count', 'like_count', 'reply_count', 'last_reply_author', 'created_at', 'updated_at']
 
 @admin.register(ForumReply)
 class ForumReplyAdmin(admin.ModelAdmin):
@@ -0,0 +1,146 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+logger = logging.getLogger(__name__)
+
+_view_counter = None
+_view_counter_lock = threading.Lock()
+
+
+class CoalescingCounter:
+    """
+    Per-process counter deltas, flushed as one F() update per key.
+
+    A hot post read a thousand times between flushes costs one UPDATE
+    instead of a thousand read-modify-write saves, and concurrent readers
+    never overwrite each other because the database applies the delta.
+    """
+
+    def __init__(self, model, field, flush_interval=5.0):
+        self.model = model
+        self.field = field
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.deltas = Counter()
+        self.flusher = None
+        self.stopped = threading.Event()
+
+    def add(self, key, amount=1):
+        with self.lock:
+            self.deltas[key] += amount
+        self.start_flusher()
+
+    def pending(self, key):
+        with self.lock:
+            return self.deltas.get(key, 0)
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                deltas, self.deltas = self.deltas, Counter()
+            if not deltas:
+                return 0
+            try:
+                with transaction.atomic():
+                    for key, amount in deltas.items():
+                        self.model.objects.filter(pk=key).update(**{self.field: F(self.field) + amount})
+            except DatabaseError:
+                logger.exception('Flushing %s.%s deltas failed; keeping them', self.model.__name__, self.field)
+                with self.lock:
+                    self.deltas.update(deltas)
+                return 0
+            return sum(deltas.values())
+
+    def start_flusher(self):
+        if self.flusher is not None:
+            return
+        with self.lock:
+            if self.flusher is not None:
+                return
+            self.flusher = threading.Thread(target=self.run_flusher, name=f'{self.field}-flusher', daemon=True)
+            self.flusher.start()
+
+    def run_flusher(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Counter flush failed')
+
+    def close(self):
+        self.stopped.set()
+        self.flush()
+
+
+def get_view_counter():
+    global _view_counter
+    with _view_counter_lock:
+        if _view_counter is None:
+            from .models import ForumPost
+            _view_counter = CoalescingCounter(
+                ForumPost, 'view_count', flush_interval=getattr(settings, 'FORUM_VIEW_FLUSH_INTERVAL', 5.0)
+            )
+            atexit.register(_view_counter.close)
+        return _view_counter
+
+
+def count_view(post_id):
+    """Record one view of a post; returns how many views are not yet reflected in its stored view_count"""
+    from .models import ForumPost
+
+    if not getattr(settings, 'FORUM_VIEW_FLUSH_INTERVAL', 5.0):
+        ForumPost.objects.filter(pk=post_id).update(view_count=F('view_count') + 1)
+        return 1
+    counter = get_view_counter()
+    counter.add(post_id)
+    return counter.pending(post_id)
+
+
+def adjust(model, pk, **deltas):
+    """Apply counter deltas atomically in the database; decrements never go below zero"""
+    queryset = model.objects.filter(pk=pk)
+    for field, delta in deltas.items():
+        if delta < 0:
+            queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def drifted_posts():
+    """Posts whose stored reply/like counters or last reply time/author differ from the rows they summarize"""
+    from .models import ForumPost, ForumReply, PostLike
+
+    replies = ForumReply.objects.filter(post=OuterRef('pk')).order_by().values('post')
+    likes = PostLike.objects.filter(post=OuterRef('pk')).order_by().values('post')
+    return ForumPost.objects.annotate(
+        actual_replies=Coalesce(Subquery(replies.annotate(n=Count('id')).values('n')), Value(0)),
+        actual_likes=Coalesce(Subquery(likes.annotate(n=Count('id')).values('n')), Value(0)),
+        actual_last_reply_at=Subquery(replies.annotate(latest=Max('created_at')).values('latest')),
+        actual_last_reply_author=Subquery(
+            ForumReply.objects.filter(post=OuterRef('pk')).order_by('-created_at', '-id').values('author')[:1]
+        ),
+    ).filter(
+        ~Q(reply_count=F('actual_replies'))
+        | ~Q(like_count=F('actual_likes'))
+        | Q(last_reply_at__isnull=True, actual_last_reply_at__isnull=False)
+        | Q(last_reply_at__isnull=False, actual_last_reply_at__isnull=True)
+        | ~Q(last_reply_at=F('actual_last_reply_at'))
+        | Q(last_reply_author__isnull=True, actual_last_reply_author__isnull=False)
+        | Q(last_reply_author__isnull=False, actual_last_reply_author__isnull=True)
+        | ~Q(last_reply_author=F('actual_last_reply_author'))
+    ).only('id', 'reply_count', 'like_count', 'last_reply_at', 'last_reply_author')
+
+
+def drifted_replies():
+    from .models import ForumReply, ReplyLike
+
+    likes = ReplyLike.objects.filter(reply=OuterRef('pk')).order_by().values('reply')
+    return ForumReply.objects.annotate(
+        actual_likes=Coalesce(Subquery(likes.annotate(n=Count('id')).values('n')), Value(0)),
+    ).filter(~Q(like_count=F('actual_likes'))).only('id', 'like_count')
@@ -0,0 +1,110 @@
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.forum import counters
+from apps.forum.counters import CoalescingCounter
+from apps.forum.models import ForumCategory, ForumPost, ForumReply
+from apps.forum.views import ForumPostDetailView, like_post
+from apps.users.models import User
+
+
+def legacy_view(post_id):
+    """What increment_view_count used to do: read, add one in Python, save"""
+    post = ForumPost.objects.get(pk=post_id)
+    post.view_count += 1
+    post.save(update_fields=['view_count'])
+
+
+class Command(BaseCommand):
+    help = 'Hit one hot forum post from many threads and check that no view, like or reply is lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--views', type=int, default=2000, help='Views per strategy')
+        parser.add_argument('--likes', type=int, default=200, help='Distinct users liking the post')
+        parser.add_argument('--replies', type=int, default=200)
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        author, _ = User.objects.get_or_create(username='bench_forum', defaults={'email': 'bench_forum@ait.ac.th'})
+        category, _ = ForumCategory.objects.get_or_create(name='Benchmark')
+        posts = [
+            ForumPost.objects.create(author=author, category=category, title=f'Hot post ({label})', content='...')
+            for label in ('legacy', 'counters')
+        ]
+        likers = [
+            User.objects.create(username=f'bench_forum_{n}', email=f'bench_forum_{n}@ait.ac.th')
+            for n in range(options['likes'])
+        ]
+        factory = APIRequestFactory()
+        failures = []
+        try:
+            views = options['views'] // threads * threads
+            self.run('legacy views', posts[0], threads, views, legacy_view)
+            self.report('legacy views', ForumPost.objects.get(pk=posts[0].pk).view_count, views)
+
+            counter = CoalescingCounter(ForumPost, 'view_count', flush_interval=0.2)
+            original, counters._view_counter = counters._view_counter, counter
+            try:
+                detail = ForumPostDetailView.as_view()
+                self.run('coalesced views', posts[1], threads, views,
+                         lambda post_id: detail(factory.get(f'/api/forum/posts/{post_id}/'), pk=post_id))
+                counter.close()
+            finally:
+                counters._view_counter = original
+            failures += self.report('coalesced views', ForumPost.objects.get(pk=posts[1].pk).view_count, views)
+
+            remaining = list(likers)
+            lock = threading.Lock()
+
+            def like(post_id):
+                with lock:
+                    user = remaining.pop()
+                request = factory.post(f'/api/forum/posts/{post_id}/like/')
+                force_authenticate(request, user=user)
+                like_post(request, post_id=post_id)
+
+            self.run('likes', posts[1], threads, len(likers), like)
+            failures += self.report('likes', ForumPost.objects.get(pk=posts[1].pk).like_count, posts[1].likes.count())
+
+            replies = options['replies'] // threads * threads
+            self.run('replies', posts[1], threads, replies,
+                     lambda post_id: ForumReply.objects.create(post_id=post_id, author=author, content='+1'))
+            post = ForumPost.objects.get(pk=posts[1].pk)
+            failures += self.report('replies', post.reply_count, post.replies.count())
+        finally:
+            ForumPost.objects.filter(pk__in=[post.pk for post in posts]).delete()
+            User.objects.filter(pk__in=[user.pk for user in likers]).delete()
+        if failures:
+            raise CommandError(f'Lost updates with the counter subsystem: {", ".join(failures)}')
+
+    def run(self, label, post, threads, total, send):
+        per_thread = total // threads
+        self.errors = []
+
+        def worker():
+            for _ in range(per_thread):
+                try:
+                    send(post.pk)
+                except DatabaseError as exc:
+                    self.errors.append(exc)
+            connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        self.seconds = time.perf_counter() - started
+        self.sent = per_thread * threads
+
+    def report(self, label, stored, expected):
+        ok = stored == expected and not self.errors
+        self.stdout.write(
+            f'{label:<16} {self.sent / self.seconds:8.0f} ops/s | errors {len(self.errors)}, '
+            f'stored {stored}, expected {expected} {"OK" if ok else "LOST " + str(expected - stored)}'
+        )
+        return [] if ok else [label]
@@ -0,0 +1,138 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from apps.forum.models import ForumCategory, ForumPost, make_excerpt
+from apps.forum.serializers import ForumPostSerializer
+from apps.forum.views import ForumPostListView
+from apps.users.models import User
+from marketplace.pagination import KeysetPagination
+
+LISTING_INDEXES = ['forum_post_category_list_idx', 'forum_post_list_idx']
+WORDS = ['textbook', 'dorm', 'bike', 'exam', 'notes', 'lab', 'canteen', 'bus', 'wifi', 'library', 'desk', 'lamp']
+
+
+def legacy_page(category_id, offset, page_size):
+    """What ForumPostListView used to serve: full serializer, OFFSET paging, no listing index"""
+    queryset = ForumPost.objects.filter(status='published').select_related('author', 'category')
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    return ForumPostSerializer(queryset[offset:offset + page_size], many=True).data
+
+
+class Command(BaseCommand):
+    help = 'Seed forum posts inside a rolled-back transaction and compare thread-list strategies (latency and plans)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=500000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--depth', type=int, default=1000, help='Deep page number to time')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            categories = self.seed(options)
+            page_size = KeysetPagination.page_size
+            offset = (options['depth'] - 1) * page_size
+            category_id = categories[len(categories) // 2]
+            view = ForumPostListView.as_view()
+            factory = APIRequestFactory()
+
+            for scope, cat in (('category', category_id), ('forum-wide', None)):
+                base = f'/api/forum/posts/?category={cat}' if cat else '/api/forum/posts/?'
+                deep_cursor = self.cursor_at(cat, offset)
+                self.report(f'keyset {scope} page 1', lambda: view(factory.get(base)).render(), options['repeat'])
+                self.report(
+                    f'keyset {scope} page {options["depth"]}',
+                    lambda: view(factory.get(f'{base}&cursor={deep_cursor}')).render(), options['repeat']
+                )
+                self.explain(ForumPostListView, base)
+
+            with connection.cursor() as cursor:
+                for name in LISTING_INDEXES:
+                    cursor.execute(f'DROP INDEX {name}')  # rolled back with the seed data
+            for scope, cat in (('category', category_id), ('forum-wide', None)):
+                self.report(f'legacy {scope} page 1', lambda: legacy_page(cat, 0, page_size), options['repeat'])
+                self.report(
+                    f'legacy {scope} page {options["depth"]}',
+                    lambda: legacy_page(cat, offset, page_size), options['repeat']
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(7)
+        now = timezone.now()
+        batch = options['batch_size']
+        started = time.perf_counter()
+
+        User.objects.bulk_create(
+            [User(username=f'bench_poster_{i}', email=f'bench_poster{i}@ait.ac.th') for i in range(options['users'])],
+            batch_size=batch
+        )
+        user_ids = list(User.objects.filter(username__startswith='bench_poster_').values_list('id', flat=True))
+        ForumCategory.objects.bulk_create(
+            [ForumCategory(name=f'Bench forum {i}') for i in range(options['categories'])]
+        )
+        category_ids = list(
+            ForumCategory.objects.filter(name__startswith='Bench forum ').values_list('id', flat=True)
+        )
+
+        posts = []
+        for i in range(options['posts']):
+            content = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 120)))
+            created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            replied = rng.random() < 0.6
+            posts.append(ForumPost(
+                author_id=rng.choice(user_ids), category_id=rng.choice(category_ids),
+                title=f'Bench thread {i}', content=content, excerpt=make_excerpt(content),
+                status='published' if rng.random() < 0.95 else 'closed', is_pinned=rng.random() < 0.001,
+                reply_count=rng.randint(1, 40) if replied else 0,
+                last_reply_at=created_at + timedelta(minutes=rng.randint(1, 10000)) if replied else None,
+                last_reply_author_id=rng.choice(user_ids) if replied else None,
+            ))
+            if len(posts) >= batch:
+                ForumPost.objects.bulk_create(posts)
+                posts = []
+        ForumPost.objects.bulk_create(posts)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f'Seeded {options["posts"]} posts in {time.perf_counter() - started:.1f}s')
+        return category_ids
+
+    def cursor_at(self, category_id, offset):
+        queryset = ForumPost.objects.filter(status='published')
+        if category_id:
+            queryset = queryset.filter(category_id=category_id)
+        paginator = KeysetPagination()
+        paginator.ordering = paginator.get_ordering(queryset)
+        row = queryset.order_by(*[paginator.order_expression(key) for key in paginator.ordering])[offset]
+        return paginator.encode_cursor(row)
+
+    def report(self, label, run, repeat):
+        samples = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                run()
+                samples.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f'{label:<32} median {statistics.median(samples):9.2f}ms  max {max(samples):9.2f}ms  '
+            f'queries {len(queries)}'
+        )
+
+    def explain(self, view_class, path):
+        view = view_class()
+        view.request = view.initialize_request(APIRequestFactory().get(path))
+        view.format_kwarg = None
+        paginator = KeysetPagination()
+        queryset = view.get_queryset()
+        ordering = paginator.get_ordering(queryset)
+        plan = queryset.order_by(*[paginator.order_expression(key) for key in ordering])[:21].explain()
+        self.stdout.write('    plan: ' + ' | '.join(line.strip() for line in plan.splitlines()))
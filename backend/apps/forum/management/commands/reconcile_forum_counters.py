@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from apps.forum.counters import drifted_posts, drifted_replies, get_view_counter
+from apps.forum.models import ForumPost, ForumReply
+
+
+class Command(BaseCommand):
+    help = 'Recompute forum reply/like counters and last reply time/author from their rows, fixing only drifted records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        if not dry_run:
+            # Pending in-memory views of this process would otherwise be flushed on exit anyway
+            get_view_counter().flush()
+
+        posts = []
+        for post in drifted_posts().iterator(chunk_size=batch_size):
+            self.stdout.write(
+                f'post {post.pk}: replies {post.reply_count}->{post.actual_replies}, '
+                f'likes {post.like_count}->{post.actual_likes}, '
+                f'last_reply_at {post.last_reply_at}->{post.actual_last_reply_at}, '
+                f'last_reply_author {post.last_reply_author_id}->{post.actual_last_reply_author}'
+            )
+            post.reply_count = post.actual_replies
+            post.like_count = post.actual_likes
+            post.last_reply_at = post.actual_last_reply_at
+            post.last_reply_author_id = post.actual_last_reply_author
+            posts.append(post)
+
+        replies = []
+        for reply in drifted_replies().iterator(chunk_size=batch_size):
+            self.stdout.write(f'reply {reply.pk}: likes {reply.like_count}->{reply.actual_likes}')
+            reply.like_count = reply.actual_likes
+            replies.append(reply)
+
+        if not dry_run:
+            ForumPost.objects.bulk_update(
+                posts, ['reply_count', 'like_count', 'last_reply_at', 'last_reply_author'], batch_size=batch_size
+            )
+            ForumReply.objects.bulk_update(replies, ['like_count'], batch_size=batch_size)
+        verb = 'Would fix' if dry_run else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(posts)} posts and {len(replies)} replies'))
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_listing_fields(apps, schema_editor):
+    # Historical models have no custom methods, so mirror make_excerpt here
+    from django.db.models import OuterRef, Subquery
+    from django.utils.text import Truncator
+
+    ForumPost = apps.get_model('forum', 'ForumPost')
+    ForumReply = apps.get_model('forum', 'ForumReply')
+    newest = ForumReply.objects.filter(post=OuterRef('pk')).order_by('-created_at', '-id').values('author')[:1]
+    posts = ForumPost.objects.only('id', 'content').annotate(newest_author=Subquery(newest))
+    batch = []
+    for post in posts.iterator(chunk_size=1000):
+        post.excerpt = Truncator(' '.join(post.content.split())).chars(200)
+        post.last_reply_author_id = post.newest_author
+        batch.append(post)
+        if len(batch) >= 1000:
+            ForumPost.objects.bulk_update(batch, ['excerpt', 'last_reply_author'])
+            batch = []
+    ForumPost.objects.bulk_update(batch, ['excerpt', 'last_reply_author'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('forum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='forumpost',
+            options={'ordering': ['-is_pinned', '-last_reply_at', '-created_at', '-id']},
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='last_reply_author',
+            field=models.ForeignKey(blank=True, help_text='Author of the newest reply, kept for thread listings', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['category', 'status', '-is_pinned', '-last_reply_at', '-created_at', '-id'], name='forum_post_category_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['status', '-is_pinned', '-last_reply_at', '-created_at', '-id'], name='forum_post_list_idx'),
+        ),
+        migrations.RunPython(populate_listing_fields, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,15 @@
 from django.db import models
 from django.conf import settings
+from django.utils.text import Truncator
 
 User = settings.AUTH_USER_MODEL
 
+EXCERPT_LENGTH = 200
+
+def make_excerpt(content):
+    """Collapse whitespace and cut the post body to EXCERPT_LENGTH characters"""
+    return Truncator(' '.join(content.split())).chars(EXCERPT_LENGTH)
+
 class ForumCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -46,18 +53,43 @@ class ForumPost(models.Model):
     like_count = models.PositiveIntegerField(default=0)
     reply_count = models.PositiveIntegerField(default=0)
     last_reply_at = models.DateTimeField(null=True, blank=True)
+    last_reply_author = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        help_text="Author of the newest reply, kept for thread listings"
+    )
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-is_pinned', '-last_reply_at', '-created_at']
+        ordering = ['-is_pinned', '-last_reply_at', '-created_at', '-id']
+        indexes = [
+            # Thread listings seek along these in Meta.ordering order, per category and forum-wide
+            models.Index(
+                fields=['category', 'status', '-is_pinned', '-last_reply_at', '-created_at', '-id'],
+                name='forum_post_category_list_idx',
+            ),
+            models.Index(
+                fields=['status', '-is_pinned', '-last_reply_at', '-created_at', '-id'],
+                name='forum_post_list_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.excerpt = make_excerpt(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+    
     def increment_view_count(self):
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Count a view without a read-modify-write save; view_count includes views not yet flushed"""
+        from .counters import count_view
+        self.view_count += count_view(self.pk)
 
 class ForumReply(models.Model):
     post = models.ForeignKey(ForumPost, on_delete=models.CASCADE, related_name='replies')
@@ -73,13 +105,6 @@ class ForumReply(models.Model):
     
     def __str__(self):
         return f"Reply to: {self.post.title}"
-    
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Update post's reply count and last_reply_at
-        self.post.reply_count = self.post.replies.count()
-        self.post.last_reply_at = self.created_at
-        self.post.save(update_fields=['reply_count', 'last_reply_at'])
 
 class PostLike(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='post_likes')
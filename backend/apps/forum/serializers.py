@@ -38,6 +38,37 @@ class ForumPostSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+class ForumUserSummarySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+
+class ForumCategorySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ForumCategory
+        fields = ['id', 'name', 'color', 'icon']
+
+class ForumPostListSerializer(serializers.ModelSerializer):
+    """
+    Thread list row, rendered from the post's own denormalized columns plus joined names.
+
+    Lighter than ForumPostSerializer (still used for the detail view): author,
+    category and last_reply_author are {id, username} / {id, name, color, icon}
+    summaries, excerpt replaces content, and replies, updated_at and the
+    category's post_count are not included.
+    """
+    author = ForumUserSummarySerializer(read_only=True)
+    category = ForumCategorySummarySerializer(read_only=True)
+    last_reply_author = ForumUserSummarySerializer(read_only=True)
+    
+    class Meta:
+        model = ForumPost
+        fields = [
+            'id', 'author', 'category', 'title', 'excerpt', 'post_type', 'status',
+            'is_pinned', 'is_locked', 'view_count', 'like_count', 'reply_count',
+            'last_reply_at', 'last_reply_author', 'created_at'
+        ]
+        read_only_fields = fields
+
 class ForumPostCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ForumPost
@@ -0,0 +1,50 @@
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .counters import adjust
+from .models import ForumPost, ForumReply, PostLike, ReplyLike
+
+@receiver(post_save, sender=ForumReply)
+def count_new_reply(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not created:
+        return
+    at = Value(instance.created_at)
+    # Greatest keeps the newest reply time when replies race; Coalesce covers a post's first reply
+    ForumPost.objects.filter(pk=instance.post_id).update(
+        reply_count=F('reply_count') + 1,
+        last_reply_at=Coalesce(Greatest('last_reply_at', at), at),
+    )
+    # Only the newest reply names the thread's last replier
+    ForumPost.objects.filter(pk=instance.post_id, last_reply_at=instance.created_at).update(
+        last_reply_author=instance.author_id
+    )
+
+@receiver(post_delete, sender=ForumReply)
+def count_deleted_reply(sender, instance, **kwargs):
+    adjust(ForumPost, instance.post_id, reply_count=-1)
+    # Deleting the newest reply moves the thread's last reply back to the newest remaining one;
+    # a reply racing in meanwhile is newer, so the filter skips it or its own update wins
+    newest = ForumReply.objects.filter(post=OuterRef('pk')).order_by('-created_at', '-id')
+    ForumPost.objects.filter(pk=instance.post_id, last_reply_at__lte=instance.created_at).update(
+        last_reply_at=Subquery(newest.values('created_at')[:1]),
+        last_reply_author=Subquery(newest.values('author')[:1]),
+    )
+
+@receiver(post_save, sender=PostLike)
+def count_post_like(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        adjust(ForumPost, instance.post_id, like_count=1)
+
+@receiver(post_delete, sender=PostLike)
+def count_post_unlike(sender, instance, **kwargs):
+    adjust(ForumPost, instance.post_id, like_count=-1)
+
+@receiver(post_save, sender=ReplyLike)
+def count_reply_like(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        adjust(ForumReply, instance.reply_id, like_count=1)
+
+@receiver(post_delete, sender=ReplyLike)
+def count_reply_unlike(sender, instance, **kwargs):
+    adjust(ForumReply, instance.reply_id, like_count=-1)
@@ -0,0 +1,143 @@
+import threading
+import time
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from apps.users.models import User
+from . import counters
+from .counters import CoalescingCounter
+from .models import ForumCategory, ForumPost, ForumReply, PostLike
+
+THREADS = 8
+
+
+def run_concurrently(work, per_thread):
+    """Run work(thread, n) from THREADS threads at once, each on its own database connection; returns the errors"""
+    start = threading.Barrier(THREADS)
+    errors = []
+
+    def worker(thread):
+        start.wait()
+        try:
+            for n in range(per_thread):
+                for attempt in range(100):
+                    try:
+                        # The shared-cache SQLite test database fails a write on a locked table instead of
+                        # waiting; each unit of work is atomic, so it is retried whole
+                        with transaction.atomic():
+                            work(thread, n)
+                        break
+                    except OperationalError:
+                        time.sleep(0.005)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=worker, args=(thread,)) for thread in range(THREADS)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return errors
+
+
+class ForumCounterConcurrencyTests(TransactionTestCase):
+    """Counters under concurrent requests: the database applies every delta, none is lost to a read-modify-write"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@ait.ac.th')
+        category = ForumCategory.objects.create(name='General')
+        self.post = ForumPost.objects.create(author=self.author, category=category, title='Hot thread', content='...')
+
+    def refreshed_post(self):
+        return ForumPost.objects.get(pk=self.post.pk)
+
+    @override_settings(FORUM_VIEW_FLUSH_INTERVAL=60)
+    def test_concurrent_views_are_all_counted(self):
+        counter = CoalescingCounter(ForumPost, 'view_count', flush_interval=60)
+        original, counters._view_counter = counters._view_counter, counter
+        try:
+            client = APIClient()
+            errors = run_concurrently(lambda thread, n: client.get(f'/api/forum/posts/{self.post.pk}/'), 25)
+            counter.close()
+        finally:
+            counters._view_counter = original
+        self.assertEqual(errors, [])
+        self.assertEqual(self.refreshed_post().view_count, THREADS * 25)
+
+    def test_concurrent_likes_and_replies_match_their_rows(self):
+        likers = [User.objects.create_user(username=f'liker{n}', email=f'liker{n}@ait.ac.th') for n in range(THREADS)]
+
+        def like_and_reply(thread, n):
+            if n == 0:
+                PostLike.objects.create(post=self.post, user=likers[thread])
+            ForumReply.objects.create(post=self.post, author=likers[thread], content=f'Reply {thread}.{n}')
+
+        self.assertEqual(run_concurrently(like_and_reply, 10), [])
+        post = self.refreshed_post()
+        self.assertEqual(post.like_count, post.likes.count())
+        self.assertEqual(post.like_count, THREADS)
+        self.assertEqual(post.reply_count, post.replies.count())
+        self.assertEqual(post.reply_count, THREADS * 10)
+        newest = post.replies.order_by('-created_at', '-id').first()
+        self.assertEqual(post.last_reply_at, newest.created_at)
+
+
+class ForumListingTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@ait.ac.th')
+        self.bob = User.objects.create_user(username='bob', email='bob@ait.ac.th')
+        self.category = ForumCategory.objects.create(name='General')
+
+    def create_post(self, title, **fields):
+        return ForumPost.objects.create(author=self.alice, category=self.category, title=title, content='Body ' * 100, **fields)
+
+    def test_deleting_the_newest_reply_moves_the_last_reply_back(self):
+        post = self.create_post('Textbook swap')
+        first = ForumReply.objects.create(post=post, author=self.alice, content='First')
+        second = ForumReply.objects.create(post=post, author=self.bob, content='Second')
+
+        first.delete()  # an older reply leaves the last reply alone
+        post.refresh_from_db()
+        self.assertEqual((post.reply_count, post.last_reply_at, post.last_reply_author_id), (1, second.created_at, self.bob.pk))
+
+        third = ForumReply.objects.create(post=post, author=self.alice, content='Third')
+        third.delete()
+        post.refresh_from_db()
+        self.assertEqual((post.reply_count, post.last_reply_at, post.last_reply_author_id), (1, second.created_at, self.bob.pk))
+
+        second.delete()
+        post.refresh_from_db()
+        self.assertEqual((post.reply_count, post.last_reply_at, post.last_reply_author_id), (0, None, None))
+
+    def test_listing_rows_are_summaries(self):
+        post = self.create_post('Textbook swap')
+        ForumReply.objects.create(post=post, author=self.bob, content='Interested')
+
+        [row] = APIClient().get('/api/forum/posts/').json()['results']
+        self.assertEqual(set(row), {
+            'id', 'author', 'category', 'title', 'excerpt', 'post_type', 'status', 'is_pinned', 'is_locked',
+            'view_count', 'like_count', 'reply_count', 'last_reply_at', 'last_reply_author', 'created_at',
+        })
+        self.assertEqual(row['author'], {'id': self.alice.pk, 'username': 'alice'})
+        self.assertEqual(row['last_reply_author'], {'id': self.bob.pk, 'username': 'bob'})
+        self.assertEqual(row['category'], {'id': self.category.pk, 'name': 'General', 'color': '#007bff', 'icon': ''})
+        self.assertEqual(len(row['excerpt']), 200)
+
+    def test_keyset_pages_follow_the_listing_order(self):
+        posts = [self.create_post(f'Thread {n}', is_pinned=n == 3) for n in range(8)]
+        for post in posts[1:6:2]:
+            ForumReply.objects.create(post=post, author=self.bob, content='Bump')
+        self.create_post('Draft', status='draft')
+        expected = list(ForumPost.objects.filter(status='published').values_list('id', flat=True))
+
+        client, seen, url = APIClient(), [], '/api/forum/posts/?page_size=3'
+        while url:
+            with self.assertNumQueries(1):
+                page = client.get(url).json()
+            seen += [row['id'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(seen, expected)
+        # Pinned first, then threads by newest reply, then unreplied threads newest first
+        self.assertEqual(seen, [posts[n].pk for n in (3, 5, 1, 7, 6, 4, 2, 0)])
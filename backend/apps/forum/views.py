@@ -4,9 +4,10 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from marketplace.profiling import SerializationTimingMixin, timing_serialization
 from .models import ForumCategory, ForumPost, ForumReply, PostLike, ReplyLike
 from .serializers import (
-    ForumCategorySerializer, ForumPostSerializer, ForumPostCreateSerializer,
+    ForumCategorySerializer, ForumPostSerializer, ForumPostListSerializer, ForumPostCreateSerializer,
     ForumReplySerializer, ForumReplyCreateSerializer, PostLikeSerializer, ReplyLikeSerializer
 )
 
@@ -15,16 +16,22 @@ class ForumCategoryListView(generics.ListAPIView):
     serializer_class = ForumCategorySerializer
     queryset = ForumCategory.objects.filter(is_active=True)
 
-class ForumPostListView(generics.ListCreateAPIView):
+class ForumPostListView(SerializationTimingMixin, generics.ListCreateAPIView):
     permission_classes = [AllowAny]
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ForumPostCreateSerializer
-        return ForumPostSerializer
+        return ForumPostListSerializer
     
     def get_queryset(self):
-        queryset = ForumPost.objects.filter(status='published').select_related('author', 'category')
+        # Pages seek along forum_post_(category_)list_idx in Meta.ordering; rows need no per-post queries
+        queryset = ForumPost.objects.filter(status='published').select_related(
+            'author', 'category', 'last_reply_author'
+        ).only(
+            *ForumPostListSerializer.Meta.fields, 'author__id', 'author__username', 'category__id', 'category__name',
+            'category__color', 'category__icon', 'last_reply_author__id', 'last_reply_author__username'
+        )
         
         # Filter by category
         category_id = self.request.query_params.get('category')
@@ -55,9 +62,12 @@ class ForumPostDetailView(generics.RetrieveUpdateDestroyAPIView):
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         instance.increment_view_count()
-        return super().retrieve(request, *args, **kwargs)
+        serializer = self.get_serializer(instance)
+        with timing_serialization():
+            data = serializer.data
+        return Response(data)
 
-class ForumReplyListView(generics.ListCreateAPIView):
+class ForumReplyListView(SerializationTimingMixin, generics.ListCreateAPIView):
     permission_classes = [AllowAny]
     
     def get_serializer_class(self):
@@ -86,14 +96,11 @@ def like_post(request, post_id):
     post = get_object_or_404(ForumPost, id=post_id)
     like, created = PostLike.objects.get_or_create(user=request.user, post=post)
     
+    # like_count follows the like rows through signals (atomic F() updates)
     if not created:
-        like.delete()
-        post.like_count = post.likes.count()
-        post.save(update_fields=['like_count'])
+        PostLike.objects.filter(pk=like.pk).delete()
         return Response({'liked': False})
     else:
-        post.like_count = post.likes.count()
-        post.save(update_fields=['like_count'])
         return Response({'liked': True})
 
 @api_view(['POST'])
@@ -102,14 +109,11 @@ def like_reply(request, reply_id):
     reply = get_object_or_404(ForumReply, id=reply_id)
     like, created = ReplyLike.objects.get_or_create(user=request.user, reply=reply)
     
+    # like_count follows the like rows through signals (atomic F() updates)
     if not created:
-        like.delete()
-        reply.like_count = reply.likes.count()
-        reply.save(update_fields=['like_count'])
+        ReplyLike.objects.filter(pk=like.pk).delete()
         return Response({'liked': False})
     else:
-        reply.like_count = reply.likes.count()
-        reply.save(update_fields=['like_count'])
         return Response({'liked': True})
 
 @api_view(['POST'])
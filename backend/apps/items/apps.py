@@ -2,3 +2,9 @@ from django.apps import AppConfig
 class ItemsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.items"
+
+    def ready(self):
+        from marketplace.response_cache import invalidate_on
+        from .models import Item
+        invalidate_on(Item, "items")
+        from . import checks, signals  # noqa: F401
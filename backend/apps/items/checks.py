@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+
+@register(Tags.security, deploy=True)
+def check_media_settings(app_configs, **kwargs):
+    """`manage.py check --deploy`: media URLs need an explicit host and production media a front web server"""
+    problems = []
+    if not settings.MEDIA_HOST:
+        problems.append(Error(
+            'MEDIA_HOST is not set.',
+            hint='Set MEDIA_HOST to the public origin of /media/, e.g. https://marketplace.example.com.',
+            id='items.E001',
+        ))
+    if settings.MEDIA_SERVE and not settings.DEBUG:
+        problems.append(Warning(
+            'MEDIA_SERVE is on with DEBUG off: uploads are served by django.views.static.serve.',
+            hint='Unset MEDIA_SERVE and serve MEDIA_ROOT at /media/ from the front web server.',
+            id='items.W001',
+        ))
+    return problems
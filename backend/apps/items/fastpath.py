@@ -0,0 +1,123 @@
+import decimal
+import functools
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from marketplace.profiling import timing_serialization
+from .images import absolute_url
+from .serializers import ItemSerializer
+from .thumbnails import pick_variant, thumbnail_sizes
+
+# values_list() columns in ItemSerializer field order; image_variants only feeds the thumbnails
+COLUMNS = (
+    'id', 'owner', 'owner__username', 'title', 'description', 'price', 'category', 'image_url', 'image_urls',
+    'is_available', 'is_barter', 'allow_barter', 'is_featured', 'desired_item', 'condition', 'location',
+    'contact_phone', 'created_at', 'image_variants',
+)
+
+
+def item_rows(queryset):
+    """
+    The queryset as named tuples of COLUMNS, plus any ordering columns
+    (e.g. a search rank) so KeysetPagination can build its cursor from them.
+    """
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    extra = [
+        name for name in (entry.lstrip('-') for entry in ordering if isinstance(entry, str))
+        if name not in COLUMNS and name != 'pk'
+    ]
+    return queryset.values_list(*COLUMNS, *extra, named=True)
+
+
+@functools.lru_cache(maxsize=None)
+def price_format():
+    """ItemSerializer's price field settings, read once: building a serializer costs more than a page of rows"""
+    price_field = ItemSerializer().fields['price']
+    context = decimal.getcontext().copy()
+    context.prec = price_field.max_digits
+    return (
+        decimal.Decimal('.1') ** price_field.decimal_places, context, price_field.rounding,
+        getattr(price_field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING),
+        getattr(price_field, 'normalize_output', False),
+    )
+
+
+def compile_item_serializer(nested=True):
+    """
+    A function rendering item rows exactly like ItemSerializer, without the
+    per-row field machinery: conversions are bound once from ItemSerializer's
+    own field settings. `nested` mirrors ItemSerializer under a parent (lists,
+    carts, orders), which ships card-sized thumbnails in image_urls.
+    """
+    price_exponent, price_context, price_rounding, coerce_price, normalize_price = price_format()
+    field_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+    sizes = [(str(size), size) for size in thumbnail_sizes()]
+    card_size = getattr(settings, 'ITEM_LIST_THUMBNAIL_SIZE', 400) if nested else None
+
+    def render_price(value):
+        if value is None:
+            return None
+        quantized = value.quantize(price_exponent, rounding=price_rounding, context=price_context)
+        if normalize_price:
+            quantized = quantized.normalize()
+        return '{:f}'.format(quantized) if coerce_price else quantized
+
+    def render_datetime(value):
+        if field_timezone is not None:
+            value = value.astimezone(field_timezone) if timezone.is_aware(value) else timezone.make_aware(value, field_timezone)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    def serialize(rows, request=None):
+        data = []
+        append = data.append
+        for (pk, owner, owner_username, title, description, price, category, image_url, image_urls, is_available,
+             is_barter, allow_barter, is_featured, desired_item, condition, location, contact_phone, created_at,
+             variants, *_) in rows:
+            urls = image_urls or []
+            variants = variants or {}
+            thumbnails = [
+                {key: absolute_url(pick_variant(url, variants, size), request) for key, size in sizes}
+                for url in urls
+            ]
+            if card_size is not None:
+                urls = [pick_variant(url, variants, card_size) for url in urls]
+            append({
+                'id': pk,
+                'owner': owner,
+                'owner_username': owner_username,
+                'title': title,
+                'description': description,
+                'price': render_price(price),
+                'category': category,
+                'image_url': absolute_url(image_url, request),
+                'image_urls': [absolute_url(url, request) for url in urls],
+                'is_available': is_available,
+                'is_barter': is_barter,
+                'allow_barter': allow_barter,
+                'is_featured': is_featured,
+                'desired_item': desired_item,
+                'condition': condition,
+                'location': location,
+                'contact_phone': contact_phone,
+                'created_at': None if created_at is None else render_datetime(created_at),
+                'thumbnails': thumbnails,
+            })
+        return data
+
+    return serialize
+
+
+class FastItemListMixin:
+    """list() for item views: rows come from values_list() and are rendered by compile_item_serializer()"""
+
+    def list(self, request, *args, **kwargs):
+        rows = item_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        serialize = compile_item_serializer()
+        with timing_serialization():
+            data = serialize(page if page is not None else rows, request)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -1,10 +1,24 @@
-from django.core.management.base import BaseCommand
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from apps.items.models import Item
+from apps.items.thumbnails import generate_for_item, pillow_available, stored_name
 
 class Command(BaseCommand):
-    help = 'Add sample images to existing items'
+    help = 'Add sample images to existing items, or (--thumbnails) regenerate image thumbnails in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--thumbnails', action='store_true', help='Regenerate thumbnails instead of adding sample images')
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'THUMBNAIL_WORKERS', 2))
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--force', action='store_true', help='Re-render thumbnails that already exist')
+        parser.add_argument('--restart', action='store_true', help='Ignore saved progress and start from the first item')
 
     def handle(self, *args, **options):
+        if options['thumbnails']:
+            return self.regenerate_thumbnails(options)
+
         # Image URLs from Unsplash (free stock photos)
         # Using different categories for different item types
         image_map = {
@@ -77,4 +91,31 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f'\nSuccessfully updated {updated_count} items with images'))
 
+    def regenerate_thumbnails(self, options):
+        if not pillow_available():
+            raise CommandError('Pillow is required to render thumbnails (pip install -r requirements.txt)')
+        # Progress is the last fully processed item id, so an interrupted run resumes where it stopped
+        progress_file = Path(settings.MEDIA_ROOT) / 'items' / '.thumbnail_progress'
+        last_id = 0
+        if progress_file.exists() and not options['restart']:
+            last_id = int(progress_file.read_text() or 0)
+            self.stdout.write(f'Resuming after item {last_id}')
+        progress_file.parent.mkdir(parents=True, exist_ok=True)
+
+        processed = rendered = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            while True:
+                batch = list(
+                    Item.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', 'image_urls')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                item_ids = [pk for pk, urls in batch if any(stored_name(url) for url in urls or [])]
+                rendered += sum(pool.map(lambda pk: generate_for_item(pk, force=options['force']), item_ids))
+                processed += len(batch)
+                last_id = batch[-1][0]
+                progress_file.write_text(str(last_id))
+                self.stdout.write(f'Processed {processed} items ({rendered} images rendered), up to id {last_id}')
 
+        progress_file.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(f'Rendered thumbnails for {rendered} images across {processed} items'))
@@ -0,0 +1,81 @@
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from apps.items.fastpath import compile_item_serializer, item_rows
+from apps.items.models import Item
+from apps.items.serializers import ItemSerializer
+from apps.users.models import User
+from marketplace.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = 'Rows/sec of ItemSerializer(many=True) + JSONRenderer against the values_list fast path, checking identical bytes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=5000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        request = Request(RequestFactory().get('/api/items/'))
+        with transaction.atomic():
+            self.seed(options['items'])
+            queryset = Item.objects.filter(title__startswith='Bench item').order_by('-created_at', '-id')
+            for size in (options['page_size'], options['items']):
+                self.compare(queryset[:size], request, options['rounds'], size)
+            transaction.set_rollback(True)
+
+    def compare(self, queryset, request, rounds, size):
+        serialize = compile_item_serializer()
+        paths = {
+            'ItemSerializer + JSONRenderer': (
+                lambda: list(queryset.select_related('owner')),
+                lambda items: JSONRenderer().render(
+                    ItemSerializer(items, many=True, context={'request': request}).data
+                ),
+            ),
+            'fast path + FastJSONRenderer': (
+                lambda: list(item_rows(queryset)),
+                lambda rows: FastJSONRenderer().render(serialize(rows, request)),
+            ),
+        }
+        outputs = [render(fetch()) for fetch, render in paths.values()]
+        if outputs[0] != outputs[1]:
+            expected, actual = outputs
+            position = next((n for n, (a, b) in enumerate(zip(expected, actual)) if a != b), min(len(expected), len(actual)))
+            raise CommandError(
+                f'Output differs at byte {position}: {expected[position - 40:position + 40]!r} '
+                f'vs {actual[position - 40:position + 40]!r}'
+            )
+        self.stdout.write(f'{size} rows, {len(outputs[0]):,} identical bytes, orjson {"on" if orjson else "off"}:')
+        rates = []
+        for name, (fetch, render) in paths.items():
+            started = time.perf_counter()
+            for _ in range(rounds):
+                fetched = fetch()
+            fetch_rate = size * rounds / (time.perf_counter() - started)
+            started = time.perf_counter()
+            for _ in range(rounds):
+                render(fetched)
+            rates.append(size * rounds / (time.perf_counter() - started))
+            self.stdout.write(f'  {name:<30} fetch {fetch_rate:>9,.0f} rows/s   serialize+render {rates[-1]:>9,.0f} rows/s')
+        self.stdout.write(f'  serialize+render speed-up: {rates[1] / rates[0]:.1f}x')
+
+    def seed(self, count):
+        owner = User.objects.create(username='bench_item_owner', email='bench_item_owner@ait.ac.th')
+        images = ['/media/items/ab/cd/abcd.jpg', 'https://example.com/photo.png']
+        variants = {images[0]: {'200': '/media/items/ab/cd/abcd_200.webp', '400': '/media/items/ab/cd/abcd_400.webp'}}
+        Item.objects.bulk_create([
+            Item(
+                owner=owner, title=f'Bench item {n} – จักรยาน "quoted"  ', description='Line one\nLine two\t✓ ' * 5,
+                price=None if n % 7 == 0 else Decimal(n % 5000) + Decimal('0.5'), category='Books',
+                image_url=images[0] if n % 2 else None, image_urls=images[:n % 3], image_variants=variants,
+                is_barter=n % 7 == 0, allow_barter=n % 3 == 0, desired_item='Desk lamp' if n % 7 == 0 else None,
+                condition='like_new', location='AIT Dorm Q', contact_phone='+66 81 234 5678',
+            )
+            for n in range(count)
+        ], batch_size=1000)
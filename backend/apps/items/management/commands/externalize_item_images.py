@@ -0,0 +1,61 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.items.images import InvalidImage, externalize, is_data_url
+from apps.items.models import Item
+from marketplace.response_cache import invalidate
+
+
+class Command(BaseCommand):
+    help = 'Move inline base64 images from Item.image_urls into the content-addressed image store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Items loaded and updated per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        scanned = migrated = failed = bytes_before = bytes_after = 0
+
+        # Keyset batches keep memory bounded: only one batch of image payloads is loaded at a time
+        while True:
+            batch = list(
+                Item.objects.filter(pk__gt=last_id).order_by('pk').only('id', 'image_urls')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].pk
+            scanned += len(batch)
+
+            changed = []
+            for item in batch:
+                if not any(is_data_url(url) for url in item.image_urls or []):
+                    continue
+                before = len(json.dumps(item.image_urls))
+                try:
+                    urls = item.image_urls if options['dry_run'] else externalize(item.image_urls)
+                except InvalidImage as exc:
+                    failed += 1
+                    self.stderr.write(f'Item {item.pk}: {exc}')
+                    continue
+                item.image_urls = urls
+                bytes_before += before
+                bytes_after += len(json.dumps(urls))
+                changed.append(item)
+
+            if changed and not options['dry_run']:
+                with transaction.atomic():
+                    Item.objects.bulk_update(changed, ['image_urls'])
+            migrated += len(changed)
+            self.stdout.write(f'Scanned {scanned} items, {migrated} with inline images so far')
+
+        if migrated and not options['dry_run']:
+            # bulk_update skips signals, so retire cached item responses explicitly
+            invalidate('items')
+
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        summary = f'{verb} images of {migrated} items ({failed} failed)'
+        if not options['dry_run']:
+            summary += f'; image_urls payload {bytes_before} -> {bytes_after} bytes'
+        self.stdout.write(self.style.SUCCESS(summary))
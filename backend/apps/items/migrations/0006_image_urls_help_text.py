@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0005_item_allow_barter_alter_item_is_barter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='item',
+            name='image_urls',
+            field=models.JSONField(blank=True, default=list, help_text='Array of image URLs (stored images under MEDIA_URL or external URLs)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0006_image_urls_help_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Thumbnail URLs per stored image: {image_url: {size: url}}'),
+        ),
+    ]
@@ -1,17 +1,19 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 
 User = settings.AUTH_USER_MODEL
 
 class Item(models.Model):
-    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="items")
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="items", db_index=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     category = models.CharField(max_length=100, blank=True)  # Keep for backward compatibility
     category_new = models.ForeignKey('categories.Category', on_delete=models.SET_NULL, null=True, blank=True, related_name='items')
     image_url = models.URLField(null=True, blank=True, help_text="Deprecated: Use image_urls for multiple images")
-    image_urls = models.JSONField(default=list, blank=True, help_text="Array of image URLs (base64 data URLs or external URLs)")
+    image_urls = models.JSONField(default=list, blank=True, help_text="Array of image URLs (stored images under MEDIA_URL or external URLs)")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Thumbnail URLs per stored image: {image_url: {size: url}}")
     is_available = models.BooleanField(default=True)
     is_barter = models.BooleanField(default=False, help_text="Item is primarily for barter (no price)")
     allow_barter = models.BooleanField(default=False, help_text="Item can be exchanged even if it has a price")
@@ -31,6 +33,22 @@ class Item(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # Listings page on (-created_at, -id); partial indexes hold only the rows each listing can return
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], condition=Q(is_available=True), name="item_available_recent_idx"),
+            models.Index(fields=["owner", "-created_at", "-id"], name="item_owner_recent_idx"),
+            models.Index(
+                fields=["-created_at", "-id"], condition=Q(is_available=True, is_featured=True),
+                name="item_featured_recent_idx",
+            ),
+            models.Index(
+                fields=["-created_at", "-id"], condition=Q(is_available=True) & (Q(is_barter=True) | Q(allow_barter=True)),
+                name="item_barter_recent_idx",
+            ),
+            models.Index(fields=["condition", "-created_at", "-id"], condition=Q(is_available=True), name="item_condition_recent_idx"),
+            models.Index(fields=["price", "id"], condition=Q(is_available=True), name="item_available_price_idx"),
+            models.Index(fields=["category"], condition=Q(is_available=True), name="item_available_category_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from django.conf import settings
+from .images import InvalidImage, absolute_url, externalize
+from .thumbnails import pick_variant, thumbnail_sizes
 from .models import Item
 
 class ItemSerializer(serializers.ModelSerializer):
@@ -12,3 +15,29 @@ class ItemSerializer(serializers.ModelSerializer):
             "condition", "location", "contact_phone", "created_at",
         )
         read_only_fields = ("owner", "created_at")
+
+    def validate_image_urls(self, value):
+        if not isinstance(value, list) or not all(isinstance(url, str) for url in value):
+            raise serializers.ValidationError("image_urls must be a list of URLs")
+        # Inline uploads are decoded into the image store; only short URLs reach the database
+        try:
+            return externalize(value)
+        except InvalidImage as exc:
+            raise serializers.ValidationError(str(exc))
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get("request")
+        urls = data.get("image_urls") or []
+        variants = instance.image_variants or {}
+        data["thumbnails"] = [
+            {str(size): absolute_url(pick_variant(url, variants, size), request) for size in thumbnail_sizes()}
+            for url in urls
+        ]
+        # Items rendered in lists or nested in carts/orders ship card-sized thumbnails; detail views keep originals
+        if self.parent is not None:
+            card_size = getattr(settings, "ITEM_LIST_THUMBNAIL_SIZE", 400)
+            urls = [pick_variant(url, variants, card_size) for url in urls]
+        data["image_urls"] = [absolute_url(url, request) for url in urls]
+        data["image_url"] = absolute_url(data.get("image_url"), request)
+        return data
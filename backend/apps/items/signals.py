@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Item
+from .thumbnails import needs_thumbnails, schedule
+
+@receiver(post_save, sender=Item)
+def queue_thumbnails(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'image_urls' not in update_fields):
+        return
+    if needs_thumbnails(instance):
+        schedule(instance.pk)
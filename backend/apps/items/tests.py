@@ -0,0 +1,223 @@
+import base64
+import io
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from decimal import Decimal
+from unittest import mock
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+from apps.categories.models import Category
+from apps.users.models import User
+from marketplace.response_cache import get_cache
+from marketplace.renderers import FastJSONRenderer
+from .checks import check_media_settings
+from .fastpath import compile_item_serializer, item_rows
+from .images import InvalidImage, absolute_url, externalize, image_root, store_bytes, stored_url
+from .models import Item
+from .serializers import ItemSerializer
+from .thumbnails import FAILED, generate_for_item, needs_thumbnails, pick_variant, pillow_available, schedule, stored_name
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+
+
+def data_url(mime, content):
+    return f'data:{mime};base64,{base64.b64encode(content).decode()}'
+
+
+class ImageUploadTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def stored_files(self):
+        return [path for path in Path(self.media_root).rglob('*') if path.is_file()]
+
+    def test_svg_is_rejected(self):
+        with self.assertRaises(InvalidImage):
+            externalize([data_url('image/svg+xml', SVG)])
+        self.assertEqual(self.stored_files(), [])
+
+    def test_declared_type_must_match_content(self):
+        with self.assertRaises(InvalidImage):
+            externalize([data_url('image/png', SVG)])
+        with self.assertRaises(InvalidImage):
+            externalize([data_url('image/jpeg', PNG)])
+
+    def test_rejected_upload_writes_no_files(self):
+        with self.assertRaises(InvalidImage):
+            externalize([data_url('image/png', PNG), data_url('image/gif', PNG)])
+        self.assertEqual(self.stored_files(), [])
+
+    def test_valid_image_is_stored(self):
+        [url] = externalize([data_url('image/png', PNG)])
+        self.assertTrue(url.endswith('.png'))
+        self.assertEqual(len(self.stored_files()), 1)
+        self.assertEqual(externalize(['https://example.com/a.jpg']), ['https://example.com/a.jpg'])
+
+    @override_settings(DEBUG=False, MEDIA_HOST='', MEDIA_SERVE=True)
+    def test_production_media_settings_are_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            absolute_url('/media/items/lamp.png')
+        self.assertEqual([problem.id for problem in check_media_settings(None)], ['items.E001', 'items.W001'])
+
+    @override_settings(DEBUG=False, MEDIA_HOST='https://cdn.example', MEDIA_SERVE=False)
+    def test_media_host_prefixes_urls_built_without_a_request(self):
+        self.assertEqual(absolute_url('/media/items/lamp.png'), 'https://cdn.example/media/items/lamp.png')
+        self.assertEqual(check_media_settings(None), [])
+
+
+@override_settings(ITEM_THUMBNAIL_SIZES=[200, 400])
+class ThumbnailTests(TransactionTestCase):
+    # generate_for_item() closes its connection like the pool threads do, which a TestCase transaction forbids
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.owner = User.objects.create_user(username='owner', email='owner@ait.ac.th', password='password123')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_item(self, content):
+        url = stored_url(store_bytes(content, 'png'))
+        item = Item.objects.create(owner=self.owner, title='Desk lamp', price=10)
+        # update() skips post_save, so no pool thread renders alongside the test
+        Item.objects.filter(pk=item.pk).update(image_urls=[url])
+        return item, url
+
+    def test_thumbnails_are_rendered_and_recorded(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, 'PNG')
+        item, url = self.create_item(buffer.getvalue())
+
+        self.assertEqual(generate_for_item(item.pk), 1)
+        item.refresh_from_db()
+        self.assertEqual(set(item.image_variants[url]), {'200', '400'})
+        self.assertFalse(needs_thumbnails(item))
+        thumbnail = image_root() / stored_name(pick_variant(url, item.image_variants, 200))
+        with Image.open(thumbnail) as image:
+            self.assertEqual((image.format, max(image.size)), ('WEBP', 200))
+
+    def test_failed_render_is_recorded_and_not_retried(self):
+        item, url = self.create_item(PNG)  # a PNG signature Pillow cannot decode
+
+        with self.assertLogs('apps.items.thumbnails', 'ERROR'):
+            self.assertEqual(generate_for_item(item.pk), 0)
+        item.refresh_from_db()
+        self.assertEqual(item.image_variants, {url: FAILED})
+        self.assertFalse(needs_thumbnails(item))
+        self.assertEqual(pick_variant(url, item.image_variants, 200), url)
+        with self.assertNoLogs('apps.items.thumbnails', 'ERROR'):
+            self.assertEqual(generate_for_item(item.pk), 0)
+
+
+class MissingPillowTests(TestCase):
+    def setUp(self):
+        pillow_available.cache_clear()
+        self.addCleanup(pillow_available.cache_clear)
+        modules = mock.patch.dict(sys.modules, {'PIL': None, 'PIL.Image': None})
+        modules.start()
+        self.addCleanup(modules.stop)
+
+    def test_thumbnails_are_skipped_with_one_warning(self):
+        owner = User.objects.create_user(username='owner', email='owner@ait.ac.th')
+        item = Item.objects.create(owner=owner, title='Desk lamp', price=10)
+        Item.objects.filter(pk=item.pk).update(image_urls=[stored_url('ab/cd/abcd.png')])
+
+        with self.assertLogs('apps.items.thumbnails', 'WARNING') as logs:
+            with self.captureOnCommitCallbacks() as callbacks:
+                schedule(item.pk)
+                schedule(item.pk)
+            self.assertEqual(generate_for_item(item.pk), 0)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(len(logs.records), 1)
+        item.refresh_from_db()
+        self.assertEqual(item.image_variants, {})
+
+    def test_regenerating_thumbnails_refuses_to_run(self):
+        with self.assertLogs('apps.items.thumbnails', 'WARNING'), self.assertRaises(CommandError):
+            call_command('add_item_images', thumbnails=True)
+
+
+class ItemCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@ait.ac.th', password='password123')
+        self.item = Item.objects.create(owner=self.owner, title='Hidden lamp', price=10, is_available=False)
+
+    def test_owner_only_retrieve_is_not_cached(self):
+        owner = APIClient()
+        owner.force_authenticate(self.owner)
+        url = f'/api/items/{self.item.pk}/?my=true'
+        self.assertEqual(owner.get(url).status_code, 200)
+
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='other', email='other@ait.ac.th'))
+        self.assertEqual(other.get(url).status_code, 404)
+        self.assertEqual(APIClient().get(url).status_code, 404)
+
+    def test_cache_key_covers_the_host(self):
+        Item.objects.create(owner=self.owner, title='Desk lamp', price=10, image_urls=['/media/items/lamp.png'])
+        forged = APIClient().get('/api/items/', HTTP_HOST='evil.example')
+        self.assertEqual(forged.json()['results'][0]['image_urls'], ['http://evil.example/media/items/lamp.png'])
+
+        response = APIClient().get('/api/items/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['image_urls'], ['http://testserver/media/items/lamp.png'])
+
+    def test_moving_a_category_retires_cached_subtree_lists(self):
+        electronics = Category.objects.create(name='Electronics')
+        books = Category.objects.create(name='Books')
+        phones = Category.objects.create(name='Phones', parent=electronics)
+        Item.objects.create(owner=self.owner, title='Phone', price=10, category_new=phones)
+        url = f'/api/items/?category_id={books.pk}'
+        self.assertEqual(APIClient().get(url).json()['results'], [])
+
+        phones.parent = books
+        phones.save()
+        self.assertEqual([item['title'] for item in APIClient().get(url).json()['results']], ['Phone'])
+
+
+class FastPathTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', email='owner@ait.ac.th')
+        original = '/media/items/ab/cd/abcd.jpg'
+        variants = {original: {'200': '/media/items/ab/cd/abcd_200.webp', '400': '/media/items/ab/cd/abcd_400.webp'}}
+        Item.objects.create(
+            owner=owner, title='Lamp – "quoted"\u2028', description='Line one\nLine two\t✓', price=Decimal('1234.5'),
+            image_url=original, image_urls=[original, 'https://example.com/photo.png'], image_variants=variants,
+            desired_item='Desk', contact_phone='+66 81 234 5678',
+        )
+        Item.objects.create(owner=owner, title='Barter only', price=None, image_url=None, is_barter=True)
+        Item.objects.create(owner=owner, title='No variants', price=0, image_urls=[original], image_variants={})
+        self.queryset = Item.objects.order_by('-created_at', '-id')
+        self.request = Request(RequestFactory().get('/api/items/'))
+
+    def fast(self, nested):
+        return FastJSONRenderer().render(compile_item_serializer(nested)(item_rows(self.queryset), self.request))
+
+    def test_nested_rows_match_item_serializer_bytes(self):
+        expected = JSONRenderer().render(ItemSerializer(self.queryset, many=True, context={'request': self.request}).data)
+        self.assertEqual(self.fast(nested=True), expected)
+
+    def test_detail_rows_match_item_serializer_bytes(self):
+        expected = JSONRenderer().render([
+            ItemSerializer(item, context={'request': self.request}).data for item in self.queryset
+        ])
+        self.assertEqual(self.fast(nested=False), expected)
@@ -0,0 +1,154 @@
+import functools
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from .images import image_root, stored_url
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# image_variants entry for an image that could not be rendered: it is not
+# rescheduled on every save, pick_variant() serves the original, and
+# `add_item_images --thumbnails --force` retries it
+FAILED = {'failed': True}
+
+
+@functools.lru_cache(maxsize=None)
+def pillow_available():
+    """Whether thumbnails can be rendered; without Pillow items keep serving their originals"""
+    try:
+        import PIL.Image  # noqa: F401
+    except ImportError:
+        logger.warning('Pillow is not installed; item thumbnails will not be generated')
+        return False
+    return True
+
+
+def thumbnail_sizes():
+    return list(getattr(settings, 'ITEM_THUMBNAIL_SIZES', [200, 400]))
+
+
+def stored_name(url):
+    """Name inside the image store for a stored image URL, or None for external URLs"""
+    prefix = stored_url('')
+    if not url or not url.startswith(prefix):
+        return None
+    return url[len(prefix):]
+
+
+def derivative_name(name, size):
+    # Derivatives sit next to their content-addressed original, so they dedupe the same way
+    return f'{name.rsplit(".", 1)[0]}_{size}.webp'
+
+
+def render_derivatives(name, force=False):
+    """Write the WebP thumbnails for one stored image and return {size: url}"""
+    from PIL import Image, ImageOps
+
+    source = image_root() / name
+    variants = {}
+    missing = []
+    for size in thumbnail_sizes():
+        target = image_root() / derivative_name(name, size)
+        variants[str(size)] = stored_url(derivative_name(name, size))
+        if force or not target.exists():
+            missing.append((size, target))
+    if not missing:
+        return variants
+
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+        # Largest first so each smaller size is resampled from an already reduced copy
+        for size, target in sorted(missing, reverse=True):
+            original.thumbnail((size, size), Image.LANCZOS)
+            fd, tmp = tempfile.mkstemp(dir=target.parent, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as handle:
+                    original.save(handle, 'WEBP', quality=getattr(settings, 'ITEM_THUMBNAIL_QUALITY', 80), method=4)
+                os.replace(tmp, target)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+    return variants
+
+
+def generate_for_item(item_id, force=False):
+    """Render missing thumbnails for an item's stored images and record them (or FAILED) on the row"""
+    from marketplace.response_cache import invalidate
+    from .models import Item
+
+    if not pillow_available():
+        # Nothing is recorded, so the images are rendered once Pillow is installed
+        return 0
+    close_old_connections()
+    try:
+        row = Item.objects.filter(pk=item_id).values('image_urls', 'image_variants').first()
+        if row is None:
+            return 0
+        urls = row['image_urls'] or []
+        variants = {url: sizes for url, sizes in (row['image_variants'] or {}).items() if url in urls}
+        rendered = changed = 0
+        for url in urls:
+            name = stored_name(url)
+            if name is None or (url in variants and not force):
+                continue
+            try:
+                variants[url] = render_derivatives(name, force=force)
+                rendered += 1
+            except (OSError, ValueError):
+                logger.exception('Could not create thumbnails for %s', url)
+                variants[url] = FAILED
+            changed += 1
+        if changed:
+            # Only this column is written, so a concurrent edit of the item is not overwritten
+            Item.objects.filter(pk=item_id).update(image_variants=variants)
+            invalidate('items')
+        return rendered
+    finally:
+        # Pool threads each hold their own connection; release it between tasks
+        connection.close()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'THUMBNAIL_WORKERS', 2), thread_name_prefix='thumbnails'
+            )
+        return _pool
+
+
+def needs_thumbnails(item):
+    variants = item.image_variants or {}
+    return any(stored_name(url) and url not in variants for url in item.image_urls or [])
+
+
+def schedule(item_id):
+    """Render thumbnails in the worker pool once the current transaction commits"""
+    if not pillow_available():
+        return
+
+    def submit():
+        future = get_pool().submit(generate_for_item, item_id)
+        future.add_done_callback(_log_failure)
+    transaction.on_commit(submit)
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.error('Thumbnail generation failed', exc_info=future.exception())
+
+
+def pick_variant(url, variants, size):
+    """URL of the requested thumbnail size, falling back to the original until it exists"""
+    return (variants.get(url) or {}).get(str(size), url)
@@ -1,7 +1,14 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from django.db.models import Q
+from marketplace.prefetch import QueryPlanMixin
+from marketplace.profiling import SerializationTimingMixin
+from marketplace.renderers import FastJSONRenderer
+from marketplace.response_cache import cache_response
+from apps.categories.models import in_category_subtree
+from .fastpath import FastItemListMixin
 from .models import Item
 from .serializers import ItemSerializer
 
@@ -11,9 +18,10 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
         return obj.owner == request.user
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(FastItemListMixin, SerializationTimingMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Item.objects.filter(is_available=True)
     serializer_class = ItemSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     # Allow anyone to view items (read), but require authentication for create/update/delete
     # IsAuthenticatedOrReadOnly allows unauthenticated users to read (GET, HEAD, OPTIONS)
     # IsOwnerOrReadOnly ensures only owners can modify their items
@@ -40,6 +48,10 @@ class ItemViewSet(viewsets.ModelViewSet):
         # If authenticated, allow filtering by 'my' to get current user's items (including unavailable)
         elif self.request.query_params.get('my', None) == 'true' and self.request.user.is_authenticated:
             queryset = Item.objects.filter(owner=self.request.user)  # Show all user's items, even unavailable
+        # Filter by category, including its descendants
+        category_id = self.request.query_params.get('category_id', None)
+        if category_id is not None and category_id.isdigit():
+            queryset = queryset.filter(in_category_subtree(int(category_id)))
         # Filter featured items
         if self.request.query_params.get('featured', None) == 'true':
             queryset = queryset.filter(is_featured=True, is_available=True)
@@ -51,6 +63,16 @@ class ItemViewSet(viewsets.ModelViewSet):
             )
         return queryset
     
+    # ?category_id= matches the category subtree, so moving a category retires cached lists too
+    @cache_response('items', 'categories', bypass_params=('my',))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    # ?my=true exposes the owner's unavailable items, so it must never be served from or stored in the cache
+    @cache_response('items', bypass_params=('my',))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def set_featured(self, request, pk=None):
         """Set item as featured (requires active membership)"""
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Notification, NotificationSettings, NotificationTemplate
+from django.utils import timezone
+from .models import EmailOutbox, Notification, NotificationBroadcast, NotificationSettings, NotificationTemplate
+from .outbox import wake
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -23,3 +25,24 @@ class NotificationTemplateAdmin(admin.ModelAdmin):
     search_fields = ['notification_type', 'title_template']
     list_editable = ['is_active']
     readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(NotificationBroadcast)
+class NotificationBroadcastAdmin(admin.ModelAdmin):
+    list_display = ['title', 'notification_type', 'status', 'delivered', 'total_recipients', 'created_at', 'finished_at']
+    list_filter = ['status', 'notification_type', 'created_at']
+    search_fields = ['title', 'message']
+    readonly_fields = ['status', 'total_recipients', 'delivered', 'last_user_id', 'claim', 'lease_expires_at', 'error', 'created_at', 'started_at', 'finished_at']
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'priority', 'created_at']
+    search_fields = ['to_email', 'subject', 'user__username']
+    readonly_fields = ['claim', 'attempts', 'last_error', 'created_at', 'sent_at']
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected emails now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', claim='', next_attempt_at=timezone.now())
+        wake()
+        self.message_user(request, f'{updated} emails queued for retry')
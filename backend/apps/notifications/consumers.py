@@ -0,0 +1,43 @@
+from urllib.parse import parse_qs
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.middleware import BaseMiddleware
+from .push import authenticate_ticket, bind_server_loop, user_group
+
+
+class PushTicketAuthMiddleware(BaseMiddleware):
+    """
+    Authenticate sockets from ?ticket=<push ticket> (POST /api/notifications/push-ticket/),
+    since browsers cannot set headers on a WebSocket
+    """
+
+    async def __call__(self, scope, receive, send):
+        ticket = parse_qs(scope.get('query_string', b'').decode()).get('ticket', [None])[0]
+        user = await authenticate_ticket(ticket)
+        if user is not None:
+            scope = dict(scope, user=user)
+        return await super().__call__(scope, receive, send)
+
+
+class PushConsumer(AsyncJsonWebsocketConsumer):
+    """Per-user push socket: notification.created, message.created and order.updated events"""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        bind_server_loop()
+        self.group = user_group(user.id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if getattr(self, 'group', None):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def push_event(self, message):
+        await self.send_json({'type': message['event'], 'data': message['data']})
@@ -0,0 +1,193 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.template import Context, Template
+from django.utils import timezone
+from . import outbox, unread
+from .preferences import opted_in
+from .push import send_batch
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class InvalidBroadcast(ValueError):
+    """The audience selects no known recipient set, or there is nothing to send"""
+
+
+class LeaseLost(Exception):
+    """Another worker took the broadcast over after this worker's lease ran out"""
+
+
+def render(notification_type, context, title='', message=''):
+    """Title and message from the type's active NotificationTemplate, rendered once for every recipient"""
+    from .models import NotificationTemplate
+
+    template = NotificationTemplate.objects.filter(notification_type=notification_type, is_active=True).first()
+    if template is None:
+        return title, message
+    context = Context(context or {})
+    return Template(template.title_template).render(context), Template(template.message_template).render(context)
+
+
+def recipients(audience, notification_type):
+    """Recipient user ids in pk order, with NotificationSettings opt-outs applied in SQL"""
+    from apps.users.models import User
+
+    users = User.objects.filter(is_active=True)
+    if audience.get('all'):
+        pass
+    elif 'user_ids' in audience:
+        users = users.filter(pk__in=audience['user_ids'])
+    elif 'wishlist_item' in audience:
+        users = users.filter(wishlist__items__item_id=audience['wishlist_item'])
+    elif 'want_to_buy_category' in audience:
+        users = users.filter(want_to_buy__status='active', want_to_buy__category__iexact=audience['want_to_buy_category'])
+    else:
+        raise InvalidBroadcast('audience needs one of: all, user_ids, wishlist_item, want_to_buy_category')
+    if audience.get('exclude_user_ids'):
+        users = users.exclude(pk__in=audience['exclude_user_ids'])
+    return opted_in(users, 'in_app', notification_type).order_by('pk').values_list('pk', flat=True).distinct()
+
+
+def lease_until():
+    return timezone.now() + timedelta(seconds=getattr(settings, 'NOTIFICATION_FANOUT_LEASE_SECONDS', 300))
+
+
+def claim(broadcast_id):
+    """
+    Lease a queued or failed broadcast, or a running one whose worker's lease
+    ran out, to this caller with a conditional UPDATE; None if another
+    worker holds it (or it is done).
+    """
+    from .models import NotificationBroadcast
+
+    token = uuid.uuid4().hex
+    claimable = Q(status__in=['queued', 'failed']) | Q(status='running') & (
+        Q(lease_expires_at__lt=timezone.now()) | Q(lease_expires_at__isnull=True)
+    )
+    if not NotificationBroadcast.objects.filter(claimable, pk=broadcast_id).update(
+        status='running', claim=token, lease_expires_at=lease_until(), error='',
+        started_at=Coalesce(F('started_at'), timezone.now()),
+    ):
+        return None
+    return NotificationBroadcast.objects.get(pk=broadcast_id)
+
+
+def deliver_chunk(broadcast, user_ids):
+    """Insert one chunk of notifications and queued emails, then update progress, unread counters and push"""
+    from .models import Notification, NotificationBroadcast
+
+    with transaction.atomic():
+        created = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id, notification_type=broadcast.notification_type, title=broadcast.title,
+                message=broadcast.message, priority=broadcast.priority, related_item_id=broadcast.related_item_id,
+            )
+            for user_id in user_ids
+        ])
+        outbox.enqueue_many(created)
+        # Only while the lease is ours; otherwise roll the chunk back, the new owner delivers it
+        if not NotificationBroadcast.objects.filter(pk=broadcast.pk, claim=broadcast.claim).update(
+            delivered=F('delivered') + len(created), last_user_id=user_ids[-1], lease_expires_at=lease_until()
+        ):
+            raise LeaseLost(f'Broadcast {broadcast.pk} was taken over by another worker')
+    broadcast.delivered += len(created)
+    broadcast.last_user_id = user_ids[-1]
+
+    unread.apply_many(user_ids, unread.notification_deltas(broadcast.notification_type, 1))
+    if created and created[0].pk is not None:
+        payload = {
+            'notification_type': broadcast.notification_type, 'title': broadcast.title,
+            'message': broadcast.message, 'priority': broadcast.priority,
+            'related_item_id': broadcast.related_item_id, 'related_order_id': None, 'related_barter_id': None,
+            'related_forum_post_id': None, 'is_read': False, 'is_sent': False,
+            'created_at': timezone.localtime(created[0].created_at).isoformat(), 'read_at': None,
+        }
+        send_batch([
+            (notification.user_id, 'notification.created', {'id': notification.pk, **payload})
+            for notification in created
+        ])
+
+
+def run_broadcast(broadcast_id, chunk_size=None):
+    """
+    Deliver a broadcast, resuming after last_user_id; safe to call again
+    after a crash and from several workers at once: only the one that
+    claims it delivers, the others return it as they found it.
+    """
+    from .models import NotificationBroadcast
+
+    chunk_size = chunk_size or getattr(settings, 'NOTIFICATION_FANOUT_CHUNK_SIZE', 2000)
+    broadcast = claim(broadcast_id)
+    if broadcast is None:
+        return NotificationBroadcast.objects.get(pk=broadcast_id)
+    owned = NotificationBroadcast.objects.filter(pk=broadcast_id, claim=broadcast.claim)
+    try:
+        audience = recipients(broadcast.audience, broadcast.notification_type)
+        broadcast.total_recipients = audience.count()
+        owned.update(total_recipients=broadcast.total_recipients)
+        while True:
+            # The position is re-read from the row, never trusted from memory
+            position = owned.values_list('last_user_id', flat=True).first()
+            if position is None:
+                raise LeaseLost(f'Broadcast {broadcast_id} was taken over by another worker')
+            user_ids = list(audience.filter(pk__gt=position)[:chunk_size])
+            if not user_ids:
+                break
+            deliver_chunk(broadcast, user_ids)
+        broadcast.status = 'done'
+    except LeaseLost:
+        logger.warning('Broadcast %s was taken over by another worker', broadcast_id)
+        return NotificationBroadcast.objects.get(pk=broadcast_id)
+    except Exception as exc:
+        logger.exception('Broadcast %s failed', broadcast_id)
+        broadcast.status = 'failed'
+        broadcast.error = str(exc)
+    broadcast.finished_at = timezone.now()
+    owned.update(status=broadcast.status, error=broadcast.error, finished_at=broadcast.finished_at, claim='',
+                 lease_expires_at=None)
+    broadcast.refresh_from_db()
+    return broadcast
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'NOTIFICATION_FANOUT_WORKERS', 1), thread_name_prefix='fanout'
+            )
+        return _pool
+
+
+def run_in_worker(broadcast_id):
+    try:
+        run_broadcast(broadcast_id)
+    finally:
+        connection.close()
+
+
+def fan_out(notification_type, audience, title='', message='', context=None, priority='medium',
+            related_item_id=None, created_by=None):
+    """Queue a notification for many users; the type's template is rendered once and rows are bulk inserted"""
+    from .models import NotificationBroadcast
+
+    recipients(audience, notification_type)  # validate the selector before queueing
+    title, message = render(notification_type, context, title, message)
+    if not title or not message:
+        raise InvalidBroadcast(f'No active template for {notification_type}; title and message are required')
+    broadcast = NotificationBroadcast.objects.create(
+        notification_type=notification_type, title=title[:200], message=message, priority=priority,
+        audience=audience, related_item_id=related_item_id, created_by=created_by,
+    )
+    transaction.on_commit(lambda: get_pool().submit(run_in_worker, broadcast.pk))
+    return broadcast
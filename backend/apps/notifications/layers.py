@@ -0,0 +1,25 @@
+import time
+from channels.layers import InMemoryChannelLayer
+
+
+class PushChannelLayer(InMemoryChannelLayer):
+    """
+    In-process channel layer for the push broker.
+
+    The stock in-memory layer sweeps every channel and group membership for
+    expired entries on each send and receive, which makes a broadcast to N
+    sockets cost O(N^2). Expiry only needs to be approximate, so the sweep
+    runs at most once per ``clean_interval`` seconds.
+    """
+
+    def __init__(self, clean_interval=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.clean_interval = clean_interval
+        self.cleaned_at = 0.0
+
+    def _clean_expired(self):
+        now = time.monotonic()
+        if now - self.cleaned_at < self.clean_interval:
+            return
+        self.cleaned_at = now
+        super()._clean_expired()
@@ -0,0 +1,66 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.notifications.fanout import recipients, run_broadcast
+from apps.notifications.models import Notification, NotificationBroadcast, NotificationSettings
+from apps.notifications.views import create_notification
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Seed users inside a rolled-back transaction and compare per-row notification inserts with the fan-out'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=100000)
+        parser.add_argument('--legacy-sample', type=int, default=2000, help='Per-row inserts timed, then extrapolated')
+        parser.add_argument('--opt-out-every', type=int, default=10, help='Every Nth user disables announcements')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options)
+            bench_users = User.objects.filter(username__startswith='bench_fanout_')
+            audience = {'all': True}
+            expected = recipients(audience, 'system_announcement').count()
+            seeded = bench_users.count()
+
+            sample = list(bench_users.order_by('pk')[:options['legacy_sample']])
+            started = time.perf_counter()
+            for user in sample:
+                create_notification(user, 'system_announcement', 'Maintenance tonight', 'The marketplace is down 1-2am')
+            legacy = time.perf_counter() - started
+            per_row = legacy / max(len(sample), 1)
+            self.stdout.write(
+                f'per-row create_notification: {len(sample)} rows in {legacy:.2f}s '
+                f'({len(sample) / legacy:,.0f} rows/s) -> ~{per_row * expected:,.0f}s for {expected} recipients'
+            )
+            Notification.objects.filter(user__in=sample).delete()
+
+            broadcast = NotificationBroadcast.objects.create(
+                notification_type='system_announcement', title='Maintenance tonight',
+                message='The marketplace is down 1-2am', audience=audience,
+            )
+            started = time.perf_counter()
+            broadcast = run_broadcast(broadcast.pk, chunk_size=options['chunk_size'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'fan-out: {broadcast.delivered} of {broadcast.total_recipients} recipients in {elapsed:.2f}s '
+                f'({broadcast.delivered / elapsed:,.0f} rows/s), status {broadcast.status}, '
+                f'{seeded // options["opt_out_every"]} seeded users opted out'
+            )
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        started = time.perf_counter()
+        users = User.objects.bulk_create(
+            [User(username=f'bench_fanout_{i}', email=f'bench_fanout{i}@ait.ac.th') for i in range(options['recipients'])],
+            batch_size=5000
+        )
+        NotificationSettings.objects.bulk_create(
+            [
+                NotificationSettings(user=user, in_app_system_announcements=False)
+                for user in users[::options['opt_out_every']]
+            ],
+            batch_size=5000
+        )
+        self.stdout.write(f'Seeded {len(users)} users in {time.perf_counter() - started:.1f}s')
@@ -0,0 +1,82 @@
+import asyncio
+import random
+import statistics
+import time
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.notifications.consumers import PushConsumer
+from apps.notifications.push import send_to_users
+from apps.users.models import User
+
+POLLED_ENDPOINTS = 2  # notifications/unread-count/ and chat/messages/
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Open N push sockets against the configured channel layer and measure fan-out latency and request volume'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=2000, help='Events sent to random subscribers')
+        parser.add_argument('--broadcasts', type=int, default=5, help='Events sent to every subscriber')
+        parser.add_argument('--poll-interval', type=float, default=10.0, help='Seconds between polls today')
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options))
+
+    async def run(self, options):
+        count = options['subscribers']
+        sockets = []
+        started = time.perf_counter()
+        for user_id in range(1, count + 1):
+            socket = WebsocketCommunicator(PushConsumer.as_asgi(), '/ws/push/')
+            socket.scope['user'] = User(id=user_id)  # unsaved: the consumer only needs the id
+            connected, _ = await socket.connect()
+            if not connected:
+                raise CommandError(f'Subscriber {user_id} was refused')
+            sockets.append(socket)
+        self.stdout.write(f'{count} subscribers connected in {time.perf_counter() - started:.2f}s '
+                          f'({settings.CHANNEL_LAYERS["default"]["BACKEND"]})')
+
+        rng = random.Random(3)
+        targets = [rng.randint(1, count) for _ in range(options['events'])]
+        latencies = await self.deliver(sockets, [[user_id] for user_id in targets])
+        self.report('unicast', latencies)
+        everyone = list(range(1, count + 1))
+        latencies = await self.deliver(sockets, [everyone] * options['broadcasts'])
+        self.report('broadcast', latencies)
+        for socket in sockets:
+            await socket.disconnect()
+
+        hour = 3600
+        polling = count * POLLED_ENDPOINTS * hour / options['poll_interval']
+        websocket = count  # one upgrade request per client per hour of uptime
+        sse = count * hour / getattr(settings, 'PUSH_SSE_MAX_SECONDS', 300)
+        self.stdout.write(
+            f'requests/hour for {count} clients: polling every {options["poll_interval"]:g}s {polling:,.0f} | '
+            f'websocket {websocket:,.0f} (x{polling / websocket:,.0f} fewer) | '
+            f'sse {sse:,.0f} (x{polling / sse:,.0f} fewer)'
+        )
+
+    async def deliver(self, sockets, recipients):
+        """Publish each event through send_to_users and time until every recipient socket has it"""
+        latencies = []
+        for user_ids in recipients:
+            sent = time.perf_counter()
+            await sync_to_async(send_to_users)(user_ids, 'notification.created', {'sent': sent})
+            for user_id in set(user_ids):
+                message = await sockets[user_id - 1].receive_json_from(timeout=5)
+                latencies.append((time.perf_counter() - message['data']['sent']) * 1000)
+        return latencies
+
+    def report(self, label, latencies):
+        self.stdout.write(
+            f'{label:<10} {len(latencies):>7} deliveries | p50 {percentile(latencies, 50):7.2f}ms '
+            f'p99 {percentile(latencies, 99):7.2f}ms mean {statistics.mean(latencies):7.2f}ms'
+        )
@@ -0,0 +1,33 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.chat.models import Message
+from apps.notifications import unread
+from apps.notifications.models import Notification
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Recount cached unread counters from the database (meaningful with a shared UNREAD_COUNTER_BACKEND)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Only users with notifications/messages this recent')
+        parser.add_argument('--all', action='store_true', help='Every user, regardless of recent activity')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        else:
+            since = timezone.now() - timedelta(days=options['days'])
+            user_ids = sorted(
+                set(Notification.objects.filter(created_at__gte=since).values_list('user_id', flat=True).distinct())
+                | set(Message.objects.filter(created_at__gte=since).values_list('receiver_id', flat=True).distinct())
+            )
+        user_ids = list(user_ids)
+        drifted = []
+        for start in range(0, len(user_ids), options['batch_size']):
+            drifted += unread.reconcile(user_ids[start:start + options['batch_size']])
+        for user_id in drifted:
+            self.stdout.write(f'user {user_id}: cached counters had drifted')
+        self.stdout.write(self.style.SUCCESS(f'Recounted {len(user_ids)} users, {len(drifted)} drifted'))
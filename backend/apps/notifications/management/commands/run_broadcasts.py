@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.fanout import run_broadcast
+from apps.notifications.models import NotificationBroadcast
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued broadcasts and resume ones interrupted by a restart once their worker\'s lease has run out '
+        '(they continue after last_user_id)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        statuses = ['queued', 'running'] + (['failed'] if options['retry_failed'] else [])
+        for broadcast_id in NotificationBroadcast.objects.filter(status__in=statuses).order_by('pk').values_list(
+            'pk', flat=True
+        ):
+            broadcast = run_broadcast(broadcast_id, chunk_size=options['chunk_size'])
+            self.stdout.write(f'broadcast {broadcast.pk}: {broadcast.status}, {broadcast.delivered} delivered')
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from apps.notifications.outbox import close_mail_connection, drain
+
+
+class Command(BaseCommand):
+    help = 'Send due outbox emails; loops every EMAIL_OUTBOX_POLL_INTERVAL seconds unless --once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when nothing is due')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                handled = drain(options['batch_size'])
+                if handled or options['once']:
+                    self.stdout.write(f'{handled} outbox rows handled')
+                if options['once']:
+                    return
+                time.sleep(getattr(settings, 'EMAIL_OUTBOX_POLL_INTERVAL', 10.0))
+        finally:
+            close_mail_connection()
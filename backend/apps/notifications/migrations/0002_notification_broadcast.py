@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationBroadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('order_created', 'Order Created'), ('order_updated', 'Order Updated'), ('order_cancelled', 'Order Cancelled'), ('payment_received', 'Payment Received'), ('item_sold', 'Item Sold'), ('barter_request', 'Barter Request'), ('barter_accepted', 'Barter Accepted'), ('barter_rejected', 'Barter Rejected'), ('message_received', 'Message Received'), ('forum_reply', 'Forum Reply'), ('system_announcement', 'System Announcement'), ('wishlist_match', 'Wishlist Match')], max_length=30)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('urgent', 'Urgent')], default='medium', max_length=10)),
+                ('audience', models.JSONField(default=dict, help_text='Recipient selector, e.g. {"all": true} or {"user_ids": [...]}')),
+                ('related_item_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('total_recipients', models.PositiveIntegerField(blank=True, null=True)),
+                ('delivered', models.PositiveIntegerField(default=0)),
+                ('last_user_id', models.PositiveIntegerField(default=0, help_text='Keyset position, so an interrupted run resumes')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationbroadcast',
+            name='claim',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='notificationbroadcast',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
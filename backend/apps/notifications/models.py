@@ -26,7 +26,7 @@ class Notification(models.Model):
         ('urgent', 'Urgent'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False)
     notification_type = models.CharField(max_length=30, choices=NOTIFICATION_TYPES)
     title = models.CharField(max_length=200)
     message = models.TextField()
@@ -48,10 +48,22 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_recent_idx'),
+            # Unread lists, counts and mark-all-read touch only the unread rows
+            models.Index(fields=['user', '-created_at', '-id'], condition=models.Q(is_read=False), name='notification_unread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save tell a read/unread flip from any other save without re-reading the row
+        instance._loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+    
     def mark_as_read(self):
         if not self.is_read:
             self.is_read = True
@@ -104,3 +116,77 @@ class NotificationTemplate(models.Model):
     
     def __str__(self):
         return f"Template for {self.notification_type}"
+
+class NotificationBroadcast(models.Model):
+    """One notification fanned out to many recipients by a background worker"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    notification_type = models.CharField(max_length=30, choices=Notification.NOTIFICATION_TYPES)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    priority = models.CharField(max_length=10, choices=Notification.PRIORITY_CHOICES, default='medium')
+    audience = models.JSONField(default=dict, help_text="Recipient selector, e.g. {\"all\": true} or {\"user_ids\": [...]}")
+    related_item_id = models.PositiveIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    total_recipients = models.PositiveIntegerField(null=True, blank=True)
+    delivered = models.PositiveIntegerField(default=0)
+    last_user_id = models.PositiveIntegerField(default=0, help_text="Keyset position, so an interrupted run resumes")
+    # The worker delivering it; the lease is renewed every chunk and a crashed worker's lease runs out
+    claim = models.CharField(max_length=32, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.notification_type}: {self.title} ({self.status})"
+    
+    @property
+    def progress(self):
+        if not self.total_recipients:
+            return 1.0 if self.status == 'done' else 0.0
+        return round(min(self.delivered / self.total_recipients, 1.0), 4)
+
+class EmailOutbox(models.Model):
+    """An outbound email, sent by the outbox worker with retries; several pending rows of one user go out as a digest"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='outbound_emails')
+    notification = models.ForeignKey(Notification, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails')
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    priority = models.CharField(max_length=10, choices=Notification.PRIORITY_CHOICES, default='medium')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Not before this time: the digest window, a retry backoff, or the lease of a worker that claimed the row
+    next_attempt_at = models.DateTimeField()
+    claim = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'email outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.to_email}: {self.subject} ({self.status})"
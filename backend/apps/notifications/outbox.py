@@ -0,0 +1,285 @@
+import atexit
+import logging
+import random
+import smtplib
+import threading
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.template import Context, Template
+from django.utils import timezone
+from .preferences import opted_in
+
+logger = logging.getLogger(__name__)
+
+_worker = None
+_worker_lock = threading.Lock()
+# One mail connection per sending thread, kept open across batches
+_local = threading.local()
+
+URGENT = {'high', 'urgent'}
+
+
+def email_templates(notification_type):
+    """Compiled (subject, body) templates of the type's active NotificationTemplate, or None to use title/message"""
+    from .models import NotificationTemplate
+
+    template = NotificationTemplate.objects.filter(
+        notification_type=notification_type, is_active=True
+    ).exclude(email_subject_template='').first()
+    if template is None:
+        return None
+    return Template(template.email_subject_template), Template(template.email_body_template or template.message_template)
+
+
+def render(templates, notification, user):
+    if templates is None:
+        return notification.title, notification.message
+    context = Context({'notification': notification, 'user': user})
+    subject = ' '.join(templates[0].render(context).split())
+    return subject[:200], templates[1].render(context)
+
+
+def enqueue_many(notifications):
+    """
+    Queue the email for each notification whose user has an address and
+    has not turned off email for its type. Call inside the transaction
+    that creates the notifications: rolled-back rows never get mail.
+    """
+    from apps.users.models import User
+    from .models import EmailOutbox
+
+    by_type = defaultdict(list)
+    for notification in notifications:
+        by_type[notification.notification_type].append(notification)
+    now = timezone.now()
+    digest_window = timedelta(seconds=getattr(settings, 'EMAIL_DIGEST_WINDOW', 60))
+    rows = []
+    for notification_type, group in by_type.items():
+        users = opted_in(
+            User.objects.filter(pk__in={notification.user_id for notification in group}, is_active=True),
+            'email', notification_type,
+        ).only('username', 'first_name', 'last_name', 'email', 'ait_email').in_bulk()
+        if not users:
+            continue
+        templates = email_templates(notification_type)
+        for notification in group:
+            user = users.get(notification.user_id)
+            address = user and (user.email or user.ait_email)
+            if not address:
+                continue
+            subject, body = render(templates, notification, user)
+            rows.append(EmailOutbox(
+                user_id=user.pk, notification_id=notification.pk, to_email=address, subject=subject, body=body,
+                priority=notification.priority,
+                # Urgent mail goes out now; the rest waits so a burst for one user becomes a digest
+                next_attempt_at=now if notification.priority in URGENT else now + digest_window,
+            ))
+    if rows:
+        EmailOutbox.objects.bulk_create(rows, batch_size=1000)
+        transaction.on_commit(wake)
+    return len(rows)
+
+
+def claim(batch_size):
+    """
+    Lease up to batch_size due rows to this caller, plus every other fresh
+    pending row of the same users so they go out together as one digest.
+    A lease that expires (a crashed worker) makes its rows due again.
+    """
+    from .models import EmailOutbox
+
+    now = timezone.now()
+    lease = {
+        'status': 'sending', 'claim': uuid.uuid4().hex,
+        'next_attempt_at': now + timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', 300)),
+    }
+    due = EmailOutbox.objects.filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at').values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+    if not due.filter(pk__in=ids).update(**lease):
+        return []  # another worker got there first
+    claimed = EmailOutbox.objects.filter(claim=lease['claim'])
+    EmailOutbox.objects.filter(
+        user_id__in=set(claimed.values_list('user_id', flat=True)), status='pending', attempts=0
+    ).update(**lease)
+    return list(claimed.order_by('created_at', 'pk'))
+
+
+def build_message(rows):
+    """One email for a single row, a digest for several rows of the same user"""
+    if len(rows) == 1:
+        row = rows[0]
+        return EmailMessage(row.subject, row.body, to=[row.to_email])
+    body = '\n\n'.join(f'{row.subject}\n{row.body}' for row in rows)
+    return EmailMessage(f'{len(rows)} new notifications from AIT Marketplace', body, to=[rows[-1].to_email])
+
+
+def get_mail_connection():
+    connection = getattr(_local, 'connection', None)
+    if connection is None or getattr(_local, 'backend', None) != settings.EMAIL_BACKEND:
+        close_mail_connection()
+        connection = _local.connection = get_connection(fail_silently=False)
+        _local.backend = settings.EMAIL_BACKEND
+    connection.open()  # no-op while the SMTP session is still open
+    return connection
+
+
+def close_mail_connection():
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def send(message):
+    try:
+        return get_mail_connection().send_messages([message])
+    except smtplib.SMTPServerDisconnected:
+        # The pooled session timed out on the server side; reconnect once
+        close_mail_connection()
+        return get_mail_connection().send_messages([message])
+
+
+def retry_later(rows, error):
+    """Back off exponentially with jitter; rows that used up EMAIL_OUTBOX_MAX_ATTEMPTS are marked failed"""
+    from .models import EmailOutbox
+
+    now = timezone.now()
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_SECONDS', 30)
+    cap = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600)
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+    for row in rows:
+        attempts = row.attempts + 1
+        delay = min(base * 2 ** (attempts - 1), cap) * random.uniform(1, 1.25)
+        EmailOutbox.objects.filter(pk=row.pk, claim=row.claim).update(
+            status='failed' if attempts >= max_attempts else 'pending', attempts=attempts, claim='',
+            next_attempt_at=now + timedelta(seconds=delay), last_error=str(error)[:1000],
+        )
+
+
+def renew_lease(rows):
+    """Extend the claim on rows before sending them; returns the ones this worker still holds"""
+    from .models import EmailOutbox
+
+    lease_until = timezone.now() + timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', 300))
+    held = EmailOutbox.objects.filter(pk__in=[row.pk for row in rows], claim=rows[0].claim)
+    if held.update(next_attempt_at=lease_until) == len(rows):
+        return rows
+    # The lease ran out during a slow batch and another worker claimed these rows
+    held_ids = set(held.values_list('pk', flat=True))
+    return [row for row in rows if row.pk in held_ids]
+
+
+def mark_sent(rows):
+    from .models import EmailOutbox, Notification
+
+    with transaction.atomic():
+        # Guarded by the claim like retry_later: a worker that lost its lease does not mark another's rows
+        EmailOutbox.objects.filter(pk__in=[row.pk for row in rows], claim=rows[0].claim).update(
+            status='sent', claim='', sent_at=timezone.now(), last_error=''
+        )
+        Notification.objects.filter(
+            pk__in=[row.notification_id for row in rows if row.notification_id]
+        ).update(is_sent=True)
+
+
+def send_batch(batch_size=None):
+    """Claim and send one batch over the pooled connection; returns how many rows were claimed"""
+    rows = claim(batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100))
+    by_user = defaultdict(list)
+    for row in rows:
+        by_user[row.user_id].append(row)
+    for user_rows in by_user.values():
+        user_rows = renew_lease(user_rows)
+        if not user_rows:
+            continue
+        try:
+            if not send(build_message(user_rows)):
+                raise smtplib.SMTPException('The mail backend accepted no message')
+        except Exception as exc:
+            logger.warning('Email to user %s failed: %s', user_rows[0].user_id, exc)
+            close_mail_connection()
+            retry_later(user_rows, exc)
+        else:
+            mark_sent(user_rows)
+    return len(rows)
+
+
+def drain(batch_size=None):
+    """Send batches until nothing is due; returns the number of rows handled"""
+    total = 0
+    while True:
+        claimed = send_batch(batch_size)
+        if not claimed:
+            return total
+        total += claimed
+
+
+class OutboxWorker:
+    """Background sender threads; they drain the outbox when woken after a commit and every poll interval"""
+
+    def __init__(self, workers=1, poll_interval=10.0):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.threads = []
+        self.wake_event = threading.Event()
+        self.stopped = threading.Event()
+
+    def start(self):
+        if self.threads:
+            return
+        with self.lock:
+            if self.threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self.run, name=f'email-outbox-{n}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def wake(self):
+        self.start()
+        self.wake_event.set()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                try:
+                    drain()
+                except Exception:
+                    logger.exception('Email outbox batch failed')
+                self.wake_event.wait(self.poll_interval)
+                self.wake_event.clear()
+        finally:
+            close_mail_connection()
+            db_connection.close()
+
+    def close(self):
+        self.stopped.set()
+        self.wake_event.set()
+
+
+def get_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = OutboxWorker(
+                workers=getattr(settings, 'EMAIL_OUTBOX_WORKERS', 1),
+                poll_interval=getattr(settings, 'EMAIL_OUTBOX_POLL_INTERVAL', 10.0),
+            )
+            atexit.register(_worker.close)
+        return _worker
+
+
+def wake():
+    # EMAIL_OUTBOX_WORKERS = 0 leaves sending to `manage.py send_email_outbox`
+    if getattr(settings, 'EMAIL_OUTBOX_WORKERS', 1):
+        get_worker().wake()
@@ -0,0 +1,28 @@
+# NotificationSettings flag group for each type: <channel>_<group> (in_app_, email_, push_); unlisted types always deliver
+PREFERENCE_GROUPS = {
+    'order_created': 'order_updates',
+    'order_updated': 'order_updates',
+    'order_cancelled': 'order_updates',
+    'item_sold': 'order_updates',
+    'payment_received': 'payment_updates',
+    'barter_request': 'barter_updates',
+    'barter_accepted': 'barter_updates',
+    'barter_rejected': 'barter_updates',
+    'message_received': 'messages',
+    'forum_reply': 'forum_replies',
+    'system_announcement': 'system_announcements',
+}
+
+
+def preference_field(channel, notification_type):
+    """The NotificationSettings flag for a delivery channel, e.g. ('email', 'forum_reply') -> 'email_forum_replies'"""
+    group = PREFERENCE_GROUPS.get(notification_type)
+    return f'{channel}_{group}' if group else None
+
+
+def opted_in(users, channel, notification_type):
+    """Users without a settings row keep the defaults (opted in)"""
+    field = preference_field(channel, notification_type)
+    if field:
+        users = users.exclude(**{f'notification_settings__{field}': False})
+    return users
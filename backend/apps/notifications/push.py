@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import secrets
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+logger = logging.getLogger(__name__)
+
+TICKET_KEY = 'push:ticket:{}'
+
+_server_loop = None
+
+
+class PushStats:
+    def __init__(self):
+        self.published = 0
+        self.failed = 0
+
+    def as_dict(self):
+        return {'published': self.published, 'failed': self.failed}
+
+
+stats = PushStats()
+
+
+def user_group(user_id):
+    """Channel layer group every open socket/stream of one user joins"""
+    return f'user.{user_id}'
+
+
+def bind_server_loop():
+    """Remember the ASGI server's event loop; called from code running on it (socket/stream setup)"""
+    global _server_loop
+    _server_loop = asyncio.get_running_loop()
+
+
+def run_on_layer_loop(coroutine_function):
+    """
+    Run a coroutine where subscribers live.
+
+    The in-process layer's queues belong to the server loop, so background
+    threads (fan-out workers, on_commit hooks outside a request) hand the
+    work to that loop instead of spinning up their own. The hand-off is
+    fire-and-forget: a busy server loop must not stall the saving thread.
+    """
+    loop = _server_loop
+    if loop is not None and loop.is_running():
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(coroutine_function())
+            return
+        future = asyncio.run_coroutine_threadsafe(coroutine_function(), loop)
+        future.add_done_callback(_log_failure)
+        return
+    async_to_sync(coroutine_function)()
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error('Push delivery failed', exc_info=future.exception())
+
+
+def send_batch(events):
+    """Push (user_id, event, data) triples in one hop; push is best-effort, REST stays the source of truth"""
+    layer = get_channel_layer()
+    if layer is None:
+        return
+
+    async def send_all():
+        for user_id, event, data in events:
+            try:
+                await layer.group_send(user_group(user_id), {'type': 'push.event', 'event': event, 'data': data})
+                stats.published += 1
+            except Exception:
+                stats.failed += 1
+                logger.exception('Pushing %s to user %s failed', event, user_id)
+
+    run_on_layer_loop(send_all)
+
+
+def send_to_users(user_ids, event, data):
+    """Fan one event out to each user's group right away"""
+    send_batch([(user_id, event, data) for user_id in set(user_ids)])
+
+
+def publish(user_ids, event, data):
+    """Push an event once the surrounding transaction commits, so clients never see rolled-back rows"""
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if user_ids:
+        transaction.on_commit(lambda: send_to_users(user_ids, event, data))
+
+
+def ticket_cache():
+    return caches[getattr(settings, 'PUSH_TICKET_CACHE_ALIAS', 'default')]
+
+
+def issue_ticket(user_id):
+    """
+    A single-use ticket that authenticates one socket or event stream for
+    PUSH_TICKET_SECONDS. Browsers cannot set headers on a WebSocket or an
+    EventSource, and a ticket in the URL is harmless in access logs, unlike
+    the access token.
+    """
+    ticket = secrets.token_urlsafe(24)
+    ticket_cache().set(TICKET_KEY.format(ticket), user_id, getattr(settings, 'PUSH_TICKET_SECONDS', 30))
+    return ticket
+
+
+async def authenticate_ticket(ticket):
+    """Redeem a ticket from issue_ticket() for its active user, or None; a ticket works once"""
+    def resolve():
+        key = TICKET_KEY.format(ticket)
+        cache = ticket_cache()
+        user_id = cache.get(key)
+        # delete() reports whether this caller removed the key, so a ticket raced over is redeemed once
+        if user_id is None or not cache.delete(key):
+            return None
+        return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+
+    if not ticket:
+        return None
+    return await database_sync_to_async(resolve)()
+
+
+async def authenticate_token(raw_token):
+    """Resolve a simplejwt access token to a user, or None"""
+    def resolve():
+        authentication = JWTAuthentication()
+        try:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return None
+
+    if not raw_token:
+        return None
+    return await database_sync_to_async(resolve)()
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Notification, NotificationSettings, NotificationTemplate
+from .models import Notification, NotificationBroadcast, NotificationSettings, NotificationTemplate
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -34,3 +34,19 @@ class NotificationTemplateSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+class NotificationBroadcastSerializer(serializers.ModelSerializer):
+    context = serializers.DictField(write_only=True, required=False, help_text="Variables for the type's template")
+    progress = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = NotificationBroadcast
+        fields = [
+            'id', 'notification_type', 'title', 'message', 'priority', 'audience', 'related_item_id', 'context',
+            'status', 'total_recipients', 'delivered', 'progress', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'total_recipients', 'delivered', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        extra_kwargs = {'title': {'required': False}, 'message': {'required': False}}
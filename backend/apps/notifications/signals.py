@@ -0,0 +1,67 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.chat.models import Message
+from apps.chat.serializers import MessageSerializer
+from apps.orders.models import Order
+from .models import Notification
+from . import outbox, unread
+from .push import publish
+from .serializers import NotificationSerializer
+
+ORDER_PUSH_FIELDS = {'status', 'payment_status'}
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        publish([instance.user_id], 'notification.created', dict(NotificationSerializer(instance).data))
+
+@receiver(post_save, sender=Notification)
+def email_notification(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        outbox.enqueue_many([instance])
+
+@receiver(post_save, sender=Message)
+def push_message(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        # The sender's other devices get it too
+        publish([instance.receiver_id, instance.sender_id], 'message.created', dict(MessageSerializer(instance).data))
+
+@receiver(post_save, sender=Order)
+def push_order(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not ORDER_PUSH_FIELDS & set(update_fields)):
+        return
+    publish([instance.buyer_id, instance.seller_id], 'order.updated', {
+        'id': instance.pk,
+        'created': created,
+        'status': instance.status,
+        'payment_status': instance.payment_status,
+        'updated_at': instance.updated_at.isoformat() if instance.updated_at else None,
+    })
+
+@receiver(post_save, sender=Notification)
+def count_notification(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        sign = 0 if instance.is_read else 1
+    else:
+        loaded = getattr(instance, '_loaded_is_read', None)
+        sign = 0 if loaded is None or loaded == instance.is_read else (-1 if instance.is_read else 1)
+    instance._loaded_is_read = instance.is_read
+    if sign:
+        unread.adjust(instance.user_id, **unread.notification_deltas(instance.notification_type, sign))
+
+@receiver(post_delete, sender=Notification)
+def uncount_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        unread.adjust(instance.user_id, **unread.notification_deltas(instance.notification_type, -1))
+
+@receiver(post_save, sender=Message)
+def count_message(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw and not instance.is_read:
+        unread.adjust(instance.receiver_id, chat=1)
+
+@receiver(post_delete, sender=Message)
+def uncount_message(sender, instance, **kwargs):
+    if not instance.is_read:
+        unread.adjust(instance.receiver_id, chat=-1)
@@ -0,0 +1,181 @@
+from datetime import timedelta
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from channels.auth import AuthMiddlewareStack
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.users.models import User
+from . import push
+from .consumers import PushTicketAuthMiddleware
+from .fanout import LeaseLost, claim, deliver_chunk, run_broadcast
+from .models import EmailOutbox, Notification, NotificationBroadcast, NotificationSettings
+from .outbox import send_batch
+from .routing import websocket_urlpatterns
+
+
+class BroadcastFanoutTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'student{n}', email=f'student{n}@ait.ac.th') for n in range(7)]
+        # Opted out of in-app announcements, and an inactive account
+        NotificationSettings.objects.create(user=self.users[2], in_app_system_announcements=False)
+        NotificationSettings.objects.create(user=self.users[4], email_system_announcements=False)
+        User.objects.filter(pk=self.users[5].pk).update(is_active=False)
+        self.expected = [user.pk for n, user in enumerate(self.users) if n not in (2, 5)]
+
+    def broadcast(self, **fields):
+        return NotificationBroadcast.objects.create(
+            notification_type='system_announcement', title='Library hours', message='Open until midnight this week',
+            audience={'all': True}, **fields
+        )
+
+    def recipients(self):
+        return sorted(Notification.objects.values_list('user_id', flat=True))
+
+    def test_delivers_in_chunks_to_opted_in_users(self):
+        broadcast = run_broadcast(self.broadcast().pk, chunk_size=2)
+
+        self.assertEqual(broadcast.status, 'done')
+        self.assertEqual(self.recipients(), self.expected)
+        self.assertEqual(broadcast.total_recipients, len(self.expected))
+        self.assertEqual(broadcast.delivered, len(self.expected))
+        self.assertEqual(broadcast.last_user_id, self.expected[-1])
+        self.assertEqual(broadcast.claim, '')
+
+    def test_chunks_are_delivered_in_pk_order(self):
+        with patch('apps.notifications.fanout.deliver_chunk', wraps=deliver_chunk) as spy:
+            run_broadcast(self.broadcast().pk, chunk_size=2)
+        chunks = [call.args[1] for call in spy.call_args_list]
+        self.assertEqual(chunks, [self.expected[0:2], self.expected[2:4], self.expected[4:]])
+
+    def test_resumes_after_last_user_id(self):
+        # A worker crashed after delivering to the first two recipients; its lease has run out
+        broadcast = self.broadcast(
+            status='running', claim='crashed', lease_expires_at=timezone.now() - timedelta(seconds=1),
+            last_user_id=self.expected[1], delivered=2,
+        )
+        broadcast = run_broadcast(broadcast.pk, chunk_size=2)
+
+        self.assertEqual(broadcast.status, 'done')
+        self.assertEqual(self.recipients(), self.expected[2:])
+        self.assertEqual(broadcast.delivered, len(self.expected))
+
+    def test_running_broadcast_with_a_live_lease_is_left_alone(self):
+        broadcast = self.broadcast(status='running', claim='other', lease_expires_at=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(claim(broadcast.pk))
+        self.assertEqual(run_broadcast(broadcast.pk).status, 'running')
+        self.assertFalse(Notification.objects.exists())
+
+    def test_second_run_does_not_deliver_twice(self):
+        broadcast = self.broadcast()
+        run_broadcast(broadcast.pk, chunk_size=2)
+        run_broadcast(broadcast.pk, chunk_size=2)
+        self.assertEqual(self.recipients(), self.expected)
+
+    def test_worker_that_lost_its_lease_stops_delivering(self):
+        broadcast = claim(self.broadcast().pk)
+        # Another worker took over after this one's lease ran out
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(claim='other')
+        with self.assertRaises(LeaseLost):
+            deliver_chunk(broadcast, self.expected[:2])
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(NotificationBroadcast.objects.get(pk=broadcast.pk).delivered, 0)
+
+
+@override_settings(PUSH_SSE_MAX_SECONDS=5, PUSH_KEEPALIVE_SECONDS=5)
+class PushTests(TransactionTestCase):
+    # channels' database_sync_to_async closes connections, which a TestCase transaction does not survive
+    application = PushTicketAuthMiddleware(AuthMiddlewareStack(URLRouter(websocket_urlpatterns)))
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', email='student@ait.ac.th', password='password123')
+        push.ticket_cache().clear()
+
+    def tearDown(self):
+        push._server_loop = None
+
+    def socket(self, ticket=None):
+        return WebsocketCommunicator(self.application, f'/ws/push/?ticket={ticket}' if ticket else '/ws/push/')
+
+    def test_ticket_endpoint_requires_authentication(self):
+        client = APIClient()
+        self.assertEqual(client.post('/api/notifications/push-ticket/').status_code, 401)
+        client.force_authenticate(self.user)
+        response = client.post('/api/notifications/push-ticket/')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.json()['ticket'])
+
+    async def test_socket_without_a_valid_ticket_is_refused(self):
+        for ticket in (None, 'forged'):
+            connected, code = await self.socket(ticket).connect()
+            self.assertEqual((connected, code), (False, 4401))
+
+    async def test_socket_receives_pushed_events(self):
+        socket = self.socket(push.issue_ticket(self.user.pk))
+        connected, _ = await socket.connect()
+        self.assertTrue(connected)
+        await socket.send_json_to({'type': 'ping'})
+        self.assertEqual(await socket.receive_json_from(), {'type': 'pong'})
+
+        # Saving threads hand events to the server loop without waiting for delivery
+        await sync_to_async(push.send_batch)([(self.user.pk, 'notification.created', {'id': 1})])
+        self.assertEqual(await socket.receive_json_from(), {'type': 'notification.created', 'data': {'id': 1}})
+        await socket.disconnect()
+
+    async def test_ticket_works_once(self):
+        ticket = push.issue_ticket(self.user.pk)
+        first = self.socket(ticket)
+        self.assertTrue((await first.connect())[0])
+        self.assertEqual(await self.socket(ticket).connect(), (False, 4401))
+        await first.disconnect()
+
+    async def test_event_stream_delivers_events(self):
+        # Access tokens stay out of URLs (and access logs)
+        response = await self.async_client.get(f'/api/notifications/stream/?token={AccessToken.for_user(self.user)}')
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.get(f'/api/notifications/stream/?ticket={push.issue_ticket(self.user.pk)}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        await sync_to_async(push.send_batch)([(self.user.pk, 'order.updated', {'id': 7})])
+        self.assertEqual(await anext(chunks), b'event: order.updated\ndata: {"id": 7}\n\n')
+        await chunks.aclose()
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.rows = [
+            EmailOutbox.objects.create(
+                user=User.objects.create_user(username=f'student{n}', email=f'student{n}@ait.ac.th'),
+                to_email=f'student{n}@ait.ac.th', subject='Order shipped', body='On its way', next_attempt_at=now,
+            )
+            for n in range(2)
+        ]
+
+    def statuses(self):
+        return list(EmailOutbox.objects.order_by('pk').values_list('status', 'claim'))
+
+    def test_rows_reclaimed_during_a_slow_batch_are_left_to_the_new_worker(self):
+        def slow_send(message):
+            # Meanwhile the lease ran out and another worker claimed the second user's row
+            EmailOutbox.objects.filter(pk=self.rows[1].pk).update(claim='other-worker')
+            return 1
+
+        with patch('apps.notifications.outbox.send', side_effect=slow_send) as send:
+            self.assertEqual(send_batch(), 2)
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(self.statuses(), [('sent', ''), ('sending', 'other-worker')])
+
+    def test_worker_that_lost_its_lease_mid_send_does_not_mark_rows_sent(self):
+        def slow_send(message):
+            EmailOutbox.objects.update(claim='other-worker')
+            return 1
+
+        with patch('apps.notifications.outbox.send', side_effect=slow_send):
+            send_batch()
+        self.assertEqual(self.statuses(), [('sending', 'other-worker')] * 2)
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count
+
+KEY = 'unread:{}:{}'
+TOTAL = 'total'
+CHAT = 'chat'
+
+
+def get_cache():
+    return caches[getattr(settings, 'UNREAD_COUNTER_CACHE_ALIAS', 'counters')]
+
+
+def counter_names():
+    from .models import Notification
+
+    return [TOTAL, CHAT] + [choice for choice, _ in Notification.NOTIFICATION_TYPES]
+
+
+def count_from_database(user_ids):
+    """Every unread counter of these users: one grouped notification query plus one grouped chat query"""
+    from apps.chat.models import Message
+    from .models import Notification
+
+    names = counter_names()
+    counts = {user_id: dict.fromkeys(names, 0) for user_id in user_ids}
+    rows = Notification.objects.filter(user_id__in=user_ids, is_read=False).values(
+        'user_id', 'notification_type'
+    ).annotate(count=Count('id')).order_by()
+    for row in rows:
+        counts[row['user_id']][row['notification_type']] = row['count']
+        counts[row['user_id']][TOTAL] += row['count']
+    rows = Message.objects.filter(receiver_id__in=user_ids, is_read=False).values('receiver_id').annotate(
+        count=Count('id')
+    ).order_by()
+    for row in rows:
+        counts[row['receiver_id']][CHAT] = row['count']
+    return counts
+
+
+def store(counts):
+    """Cache {user_id: counts} mappings"""
+    get_cache().set_many(
+        {KEY.format(user_id, name): value for user_id, values in counts.items() for name, value in values.items()},
+        getattr(settings, 'UNREAD_COUNTER_TIMEOUT', 300),
+    )
+
+
+def get_unread_counts(user_id):
+    """{'total', 'chat', <notification_type>...} from the cache, refilled from the database on a miss"""
+    names = counter_names()
+    cached = get_cache().get_many([KEY.format(user_id, name) for name in names])
+    if len(cached) == len(names):
+        return {name: cached[KEY.format(user_id, name)] for name in names}
+    counts = count_from_database([user_id])
+    store(counts)
+    return counts[user_id]
+
+
+def apply_deltas(user_id, deltas):
+    cache = get_cache()
+    for name, delta in deltas.items():
+        key = KEY.format(user_id, name)
+        try:
+            if cache.incr(key, delta) < 0:
+                cache.delete(key)  # drifted below zero; the next read recounts
+        except ValueError:
+            # Not cached (or expired): nothing to adjust, the next read recounts from the database
+            pass
+
+
+def apply_many(user_ids, deltas):
+    """The same deltas for many users, touching only counters that are currently cached"""
+    cache = get_cache()
+    keys = [KEY.format(user_id, name) for user_id in user_ids for name in deltas]
+    for key in cache.get_many(keys):
+        name = key.rsplit(':', 1)[1]
+        try:
+            if cache.incr(key, deltas[name]) < 0:
+                cache.delete(key)
+        except ValueError:
+            pass
+
+
+def adjust(user_id, **deltas):
+    """Apply counter deltas after the current transaction commits, so rolled-back writes never count"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if user_id and deltas:
+        transaction.on_commit(lambda: apply_deltas(user_id, deltas))
+
+
+def notification_deltas(notification_type, sign):
+    return {TOTAL: sign, notification_type: sign}
+
+
+def mark_all_read(user_id):
+    """Every notification counter of a user drops to zero; chat is untouched"""
+    names = [name for name in counter_names() if name != CHAT]
+    transaction.on_commit(lambda: get_cache().set_many(
+        {KEY.format(user_id, name): 0 for name in names}, getattr(settings, 'UNREAD_COUNTER_TIMEOUT', 300)
+    ))
+
+
+def reconcile(user_ids):
+    """Recount and store the counters of these users; returns the ids whose cached values had drifted"""
+    names = counter_names()
+    counts = count_from_database(user_ids)
+    cached = get_cache().get_many([KEY.format(user_id, name) for user_id in user_ids for name in names])
+    drifted = [
+        user_id for user_id, values in counts.items()
+        if any(cached.get(KEY.format(user_id, name), value) != value for name, value in values.items())
+    ]
+    store(counts)
+    return drifted
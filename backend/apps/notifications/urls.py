@@ -9,5 +9,9 @@ urlpatterns = [
     path('unread-count/', views.unread_count, name='unread-count'),
     path('stats/', views.notification_stats, name='notification-stats'),
     path('create/', views.create_notification, name='create-notification'),
+    path('push-ticket/', views.push_ticket, name='push-ticket'),
+    path('stream/', views.notification_stream, name='notification-stream'),
+    path('broadcasts/', views.NotificationBroadcastListView.as_view(), name='notification-broadcast-list'),
+    path('broadcasts/<int:pk>/', views.NotificationBroadcastDetailView.as_view(), name='notification-broadcast-detail'),
     path('settings/', views.NotificationSettingsView.as_view(), name='notification-settings'),
 ]
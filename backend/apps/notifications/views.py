@@ -1,13 +1,31 @@
+import asyncio
+import json
+import time
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from .models import Notification, NotificationSettings, NotificationTemplate
-from .serializers import NotificationSerializer, NotificationSettingsSerializer, NotificationTemplateSerializer
+from django.db.models import Count, Q
+from django.utils import timezone
+from datetime import timedelta
+from marketplace.profiling import SerializationTimingMixin
+from . import unread
+from .fanout import InvalidBroadcast, fan_out
+from .models import Notification, NotificationBroadcast, NotificationSettings, NotificationTemplate
+from .push import authenticate_ticket, authenticate_token, bind_server_loop, issue_ticket, user_group
+from .serializers import (
+    NotificationSerializer, NotificationSettingsSerializer, NotificationTemplateSerializer,
+    NotificationBroadcastSerializer
+)
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(SerializationTimingMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = NotificationSerializer
     
@@ -46,6 +64,33 @@ class NotificationSettingsView(generics.RetrieveUpdateAPIView):
         settings, created = NotificationSettings.objects.get_or_create(user=self.request.user)
         return settings
 
+class NotificationBroadcastListView(generics.ListCreateAPIView):
+    """Queue a notification for many recipients (admin only); GET the detail view to follow progress"""
+    permission_classes = [IsAdminUser]
+    serializer_class = NotificationBroadcastSerializer
+    queryset = NotificationBroadcast.objects.all()
+    
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        try:
+            serializer.instance = fan_out(
+                data['notification_type'], data.get('audience') or {}, title=data.get('title', ''),
+                message=data.get('message', ''), context=data.get('context'), priority=data.get('priority', 'medium'),
+                related_item_id=data.get('related_item_id'), created_by=self.request.user,
+            )
+        except InvalidBroadcast as exc:
+            raise ValidationError(str(exc))
+    
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+class NotificationBroadcastDetailView(generics.RetrieveAPIView):
+    permission_classes = [IsAdminUser]
+    serializer_class = NotificationBroadcastSerializer
+    queryset = NotificationBroadcast.objects.all()
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_notification_read(request, notification_id):
@@ -56,44 +101,42 @@ def mark_notification_read(request, notification_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_all_notifications_read(request):
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True, read_at=timezone.now())
+    unread.mark_all_read(request.user.id)
     return Response({'status': 'success'})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def unread_count(request):
-    count = Notification.objects.filter(user=request.user, is_read=False).count()
-    return Response({'unread_count': count})
+    """Badge counts from the cached per-user counters (see unread.py)"""
+    counts = unread.get_unread_counts(request.user.id)
+    return Response({
+        'unread_count': counts[unread.TOTAL],
+        'chat_unread': counts[unread.CHAT],
+        'by_type': {
+            notification_type: counts[notification_type]
+            for notification_type, _ in Notification.NOTIFICATION_TYPES if counts[notification_type]
+        },
+    })
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def notification_stats(request):
     """Get notification statistics for the user"""
-    user = request.user
-    
-    # Total notifications
-    total_notifications = Notification.objects.filter(user=user).count()
-    unread_notifications = Notification.objects.filter(user=user, is_read=False).count()
-    
-    # Notifications by type
-    notifications_by_type = Notification.objects.filter(user=user).values('notification_type').annotate(
-        count=models.Count('id')
-    ).order_by('-count')
-    
-    # Recent notifications (last 7 days)
-    from django.utils import timezone
-    from datetime import timedelta
     week_ago = timezone.now() - timedelta(days=7)
-    recent_notifications = Notification.objects.filter(
-        user=user,
-        created_at__gte=week_ago
-    ).count()
+    # One grouped pass: per-type totals plus the last 7 days; unread comes from the counters
+    rows = list(Notification.objects.filter(user=request.user).values('notification_type').annotate(
+        count=Count('id'),
+        recent=Count('id', filter=Q(created_at__gte=week_ago)),
+    ).order_by('-count'))
     
     return Response({
-        'total_notifications': total_notifications,
-        'unread_notifications': unread_notifications,
-        'recent_notifications': recent_notifications,
-        'notifications_by_type': list(notifications_by_type)
+        'total_notifications': sum(row['count'] for row in rows),
+        'unread_notifications': unread.get_unread_counts(request.user.id)[unread.TOTAL],
+        'recent_notifications': sum(row['recent'] for row in rows),
+        'notifications_by_type': [
+            {'notification_type': row['notification_type'], 'count': row['count']} for row in rows
+        ]
     })
 
 @api_view(['POST'])
@@ -106,6 +149,53 @@ def create_notification(request):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def push_ticket(request):
+    """Single-use ticket for the push WebSocket (ws/push/?ticket=) or event stream (stream/?ticket=)"""
+    return Response({
+        'ticket': issue_ticket(request.user.id), 'expires_in': getattr(settings, 'PUSH_TICKET_SECONDS', 30),
+    }, status=status.HTTP_201_CREATED)
+
+async def notification_stream(request):
+    """Server-Sent Events fallback for clients that cannot keep the push WebSocket open"""
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Event streams are served by the ASGI application (marketplace.asgi)'}, status=501)
+    header = request.headers.get('Authorization', '')
+    # EventSource cannot send headers, so browsers pass a single-use push ticket in the query string
+    if header.startswith('Bearer '):
+        user = await authenticate_token(header[len('Bearer '):])
+    else:
+        user = await authenticate_ticket(request.GET.get('ticket'))
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    response = StreamingHttpResponse(push_events(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+async def push_events(user_id):
+    bind_server_loop()
+    layer = get_channel_layer()
+    channel = await layer.new_channel()
+    group = user_group(user_id)
+    await layer.group_add(group, channel)
+    # Streams end after PUSH_SSE_MAX_SECONDS and EventSource reconnects, so a vanished client is dropped
+    keepalive = getattr(settings, 'PUSH_KEEPALIVE_SECONDS', 15)
+    deadline = time.monotonic() + getattr(settings, 'PUSH_SSE_MAX_SECONDS', 300)
+    try:
+        yield f"retry: {getattr(settings, 'PUSH_SSE_RETRY_MS', 3000)}\n\n"
+        while time.monotonic() < deadline:
+            try:
+                message = await asyncio.wait_for(layer.receive(channel), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            data = json.dumps(message['data'], cls=DjangoJSONEncoder)
+            yield f"event: {message['event']}\ndata: {data}\n\n"
+    finally:
+        await layer.group_discard(group, channel)
+
 # Utility functions for creating notifications
 def create_notification(user, notification_type, title, message, priority='medium', **kwargs):
     """Create a notification for a user"""
@@ -117,11 +207,7 @@ def create_notification(user, notification_type, title, message, priority='mediu
         priority=priority,
         **kwargs
     )
-    
-    # Send real-time notification via WebSocket if available
-    # This would be implemented with Django Channels or similar
-    # send_websocket_notification(user, notification)
-    
+    # Open push sockets/streams receive it from the post_save signal (see signals.py)
     return notification
 
 def create_order_notification(order, notification_type, user=None):
@@ -20,8 +20,8 @@ class Order(models.Model):
         ('refunded', 'Refunded'),
     ]
     
-    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
-    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sales')
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders', db_index=False)
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sales', db_index=False)
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='orders')
     quantity = models.PositiveIntegerField(default=1)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -36,6 +36,13 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['item', 'payment_status'], name='order_item_payment_idx'),
+            # Buyer and seller order lists (these lead with the FK, so buyer/seller need no index of their own)
+            models.Index(fields=['buyer', '-created_at', '-id'], name='order_buyer_recent_idx'),
+            models.Index(fields=['seller', '-created_at', '-id'], name='order_seller_recent_idx'),
+            models.Index(fields=['status', 'payment_status', '-created_at'], name='order_status_idx'),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.buyer.username} -> {self.seller.username}"
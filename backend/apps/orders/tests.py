@@ -0,0 +1,46 @@
+from decimal import Decimal
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.items.models import Item
+from apps.users.models import User
+from .models import Order, OrderItem
+
+
+class OrderQueryCountTests(TestCase):
+    """Order list and detail responses cost the same number of queries however many orders and lines there are"""
+
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', email='seller@ait.ac.th')
+
+    def seed(self, lines):
+        """`lines` orders for a new buyer; the first one also has `lines` order lines"""
+        buyer = User.objects.create_user(username=f'buyer{lines}', email=f'buyer{lines}@ait.ac.th')
+        items = Item.objects.bulk_create([
+            Item(owner=self.seller, title=f'Bicycle {n}', price=Decimal('1200.00'), category='Sports') for n in range(lines)
+        ])
+        orders = [
+            Order.objects.create(buyer=buyer, seller=self.seller, item=item, total_price=item.price, shipping_address='AIT dorm')
+            for item in items
+        ]
+        OrderItem.objects.bulk_create([OrderItem(order=orders[0], item=item, quantity=1, price=item.price) for item in items])
+        client = APIClient()
+        client.force_authenticate(buyer)
+        return client, orders[0]
+
+    def test_order_list_queries_are_constant(self):
+        for lines in (1, 10, 100):
+            with self.subTest(lines=lines):
+                client, _ = self.seed(lines)
+                with self.assertNumQueries(2):
+                    response = client.get('/api/orders/?page_size=100')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), lines)
+
+    def test_order_detail_queries_are_constant(self):
+        for lines in (1, 10, 100):
+            with self.subTest(lines=lines):
+                client, order = self.seed(lines)
+                with self.assertNumQueries(2):
+                    response = client.get(f'/api/orders/{order.pk}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['order_items']), lines)
@@ -3,11 +3,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from marketplace.prefetch import QueryPlanMixin, prefetch_for
+from marketplace.profiling import SerializationTimingMixin
 from .models import Order, OrderItem
 from .serializers import OrderSerializer, OrderCreateSerializer
 from apps.items.models import Item
 
-class OrderListCreateView(generics.ListCreateAPIView):
+class OrderListCreateView(SerializationTimingMixin, QueryPlanMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_serializer_class(self):
@@ -22,7 +24,7 @@ class OrderListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save()
 
-class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
+class OrderDetailView(SerializationTimingMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = OrderSerializer
     
@@ -30,7 +32,7 @@ class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
         user = self.request.user
         return Order.objects.filter(buyer=user)
 
-class SellerOrderListView(generics.ListAPIView):
+class SellerOrderListView(SerializationTimingMixin, QueryPlanMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = OrderSerializer
     
@@ -54,7 +56,7 @@ def update_order_status(request, order_id):
     order.status = new_status
     order.save()
     
-    return Response(OrderSerializer(order).data)
+    return Response(OrderSerializer(prefetch_for(order, OrderSerializer)).data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -71,4 +73,4 @@ def cancel_order(request, order_id):
     order.status = 'cancelled'
     order.save()
     
-    return Response(OrderSerializer(order).data)
+    return Response(OrderSerializer(prefetch_for(order, OrderSerializer)).data)
@@ -0,0 +1,128 @@
+import re
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_QUERY_TERMS = 8
+
+_backend = None
+
+def search_backend_class():
+    default = 'SQLiteFTSBackend' if connection.vendor == 'sqlite' else 'DatabaseSearchBackend'
+    return import_string(getattr(settings, 'SEARCH_BACKEND', f'apps.search.backends.{default}'))
+
+def get_search_backend():
+    """Return the configured item search backend (one instance per process)"""
+    global _backend
+    if _backend is None:
+        _backend = search_backend_class()()
+    return _backend
+
+@receiver(setting_changed)
+def reset_search_backend(setting, **kwargs):
+    global _backend
+    if setting == 'SEARCH_BACKEND':
+        _backend = None
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+class BaseSearchBackend:
+    """Interface every item search backend implements"""
+
+    def index_item(self, item):
+        raise NotImplementedError
+
+    def remove_item(self, item_id):
+        raise NotImplementedError
+
+    def search(self, query, limit):
+        """Return item ids matching the query, best match first"""
+        raise NotImplementedError
+
+    def rebuild(self, rows, batch_size=1000):
+        """Replace the index with rows of (id, title, description, category)"""
+        raise NotImplementedError
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Fallback backend that queries the Item table directly (no index to maintain)"""
+
+    def index_item(self, item):
+        pass
+
+    def remove_item(self, item_id):
+        pass
+
+    def search(self, query, limit):
+        from apps.items.models import Item
+        return list(Item.objects.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(category__icontains=query)
+        ).values_list('id', flat=True)[:limit])
+
+    def rebuild(self, rows, batch_size=1000):
+        return 0
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """Inverted index stored in an SQLite FTS5 virtual table, ranked with bm25"""
+    table = 'search_item_fts'
+    # bm25 column weights: title, description, category
+    weights = (10.0, 1.0, 5.0)
+
+    def index_item(self, item):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [item.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description, category) VALUES (%s, %s, %s, %s)',
+                [item.pk, item.title, item.description, item.category]
+            )
+
+    def remove_item(self, item_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [item_id])
+
+    def build_match_expression(self, query):
+        # Quote every term so user input can never be parsed as FTS syntax,
+        # and prefix-match it so partially typed words still hit.
+        terms = tokenize(query)[:MAX_QUERY_TERMS]
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def search(self, query, limit):
+        expression = self.build_match_expression(query)
+        if not expression:
+            return []
+        weights = ', '.join(str(weight) for weight in self.weights)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY bm25({self.table}, {weights}) LIMIT %s',
+                [expression, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self, rows, batch_size=1000):
+        count = 0
+        batch = []
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    count += self._insert_batch(cursor, batch)
+                    batch = []
+            if batch:
+                count += self._insert_batch(cursor, batch)
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+        return count
+
+    def _insert_batch(self, cursor, batch):
+        cursor.executemany(
+            f'INSERT INTO {self.table} (rowid, title, description, category) VALUES (%s, %s, %s, %s)',
+            batch
+        )
+        return len(batch)
@@ -0,0 +1,15 @@
+from django.core.checks import Error, Tags, register
+from django.db import connection
+from .backends import SQLiteFTSBackend, search_backend_class
+
+
+@register(Tags.compatibility)
+def check_search_backend(app_configs, **kwargs):
+    """The FTS5 index table is only created on SQLite; any other database would fail at query time"""
+    if connection.vendor != 'sqlite' and issubclass(search_backend_class(), SQLiteFTSBackend):
+        return [Error(
+            f'SEARCH_BACKEND uses SQLite FTS5 but the default database is {connection.vendor}.',
+            hint='Set SEARCH_BACKEND to apps.search.backends.DatabaseSearchBackend.',
+            id='search.E001',
+        )]
+    return []
@@ -0,0 +1,140 @@
+import random
+import sqlite3
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from apps.items.models import Item
+from apps.users.models import User
+
+SYLLABLES = ['ka', 'ro', 'mi', 'tan', 'se', 'lu', 'po', 'dex', 'vi', 'nor', 'ba', 'quel', 'fi', 'zo', 'gar', 'hu']
+VOCABULARY_SIZE = 20000
+CATEGORIES = ['books', 'furniture', 'sports', 'phone', 'games', 'electronics', 'clothing']
+BACKENDS = {
+    'scan': 'apps.search.backends.DatabaseSearchBackend',
+    'fts': 'apps.search.backends.SQLiteFTSBackend',
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare icontains scans with the FTS5 index on synthetic catalogues (p50/p99 latency); '
+        'with --api, time GET /api/search/items/?q= through the whole request stack instead'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+        parser.add_argument('--queries', type=int, default=50, help='Queries timed per size')
+        parser.add_argument('--limit', type=int, default=500, help='Result cap, as SEARCH_MAX_RESULTS')
+        parser.add_argument(
+            '--api', action='store_true',
+            help='Seed the configured database inside a transaction that is rolled back, and time the search '
+                 'endpoint (middleware, view, serialization) with each search backend',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        vocabulary = sorted({
+            ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+            for _ in range(VOCABULARY_SIZE)
+        })
+        if options['api'] and connection.vendor != 'sqlite':
+            raise CommandError('--api compares against the FTS5 index, which only exists on SQLite')
+        for size in options['sizes']:
+            terms = [rng.choice(vocabulary) for _ in range(options['queries'])]
+            if options['api']:
+                scan, fts = self.time_api(size, vocabulary, rng, terms, options['limit'])
+            else:
+                conn = self.build_database(size, vocabulary, rng)
+                scan = self.time_queries(conn, terms, self.scan_query, options['limit'])
+                fts = self.time_queries(conn, terms, self.fts_query, options['limit'])
+                conn.close()
+            self.stdout.write(
+                f'{size:>9} items | scan p50 {percentile(scan, 50):8.2f}ms p99 {percentile(scan, 99):8.2f}ms'
+                f' | fts p50 {percentile(fts, 50):8.2f}ms p99 {percentile(fts, 99):8.2f}ms'
+                f' | speedup x{statistics.median(scan) / max(statistics.median(fts), 1e-6):.1f}'
+            )
+
+    def time_api(self, size, vocabulary, rng, terms, limit):
+        from apps.search.backends import SQLiteFTSBackend
+
+        client = Client()
+        with transaction.atomic():
+            owner = User.objects.create(username='bench_search_owner', email='bench_search_owner@ait.ac.th')
+            Item.objects.bulk_create((
+                Item(
+                    owner=owner, title=' '.join(rng.choice(vocabulary) for _ in range(4)),
+                    description=' '.join(rng.choice(vocabulary) for _ in range(20)), category=rng.choice(CATEGORIES),
+                )
+                for _ in range(size)
+            ), batch_size=1000)
+            # bulk_create() sends no post_save, so the index is filled the way rebuild_search_index does
+            SQLiteFTSBackend().rebuild(Item.objects.order_by().values_list('id', 'title', 'description', 'category'))
+            samples = []
+            for path in BACKENDS.values():
+                with override_settings(SEARCH_BACKEND=path, SEARCH_MAX_RESULTS=limit):
+                    samples.append(self.time_requests(client, terms))
+            transaction.set_rollback(True)
+        return samples
+
+    def time_requests(self, client, terms):
+        samples = []
+        for term in terms:
+            started = time.perf_counter()
+            response = client.get('/api/search/items/', {'q': term})
+            samples.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'/api/search/items/?q={term} answered {response.status_code}')
+        return samples
+
+    def build_database(self, size, vocabulary, rng):
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, title TEXT, description TEXT, category TEXT)')
+        conn.execute(
+            "CREATE VIRTUAL TABLE item_fts USING fts5("
+            "title, description, category, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        rows = (
+            (
+                pk,
+                ' '.join(rng.choice(vocabulary) for _ in range(4)),
+                ' '.join(rng.choice(vocabulary) for _ in range(20)),
+                rng.choice(CATEGORIES),
+            )
+            for pk in range(1, size + 1)
+        )
+        conn.executemany('INSERT INTO item VALUES (?, ?, ?, ?)', rows)
+        conn.execute('INSERT INTO item_fts (rowid, title, description, category) SELECT * FROM item')
+        conn.execute("INSERT INTO item_fts (item_fts) VALUES ('optimize')")
+        conn.commit()
+        return conn
+
+    def scan_query(self, conn, term, limit):
+        pattern = f'%{term}%'
+        return conn.execute(
+            'SELECT id FROM item WHERE title LIKE ? OR description LIKE ? OR category LIKE ? '
+            'ORDER BY id DESC LIMIT ?',
+            (pattern, pattern, pattern, limit)
+        ).fetchall()
+
+    def fts_query(self, conn, term, limit):
+        return conn.execute(
+            'SELECT rowid FROM item_fts WHERE item_fts MATCH ? '
+            'ORDER BY bm25(item_fts, 10.0, 1.0, 5.0) LIMIT ?',
+            (f'"{term}"*', limit)
+        ).fetchall()
+
+    def time_queries(self, conn, terms, query, limit):
+        samples = []
+        for term in terms:
+            started = time.perf_counter()
+            query(conn, term, limit)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
@@ -0,0 +1,42 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from apps.search.suggestions import SuggestionIndex
+from .benchmark_search import SYLLABLES, CATEGORIES, percentile
+
+
+class Command(BaseCommand):
+    help = 'Measure per-keystroke latency of the in-memory suggestion index on synthetic titles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=50000, help='Distinct titles loaded into the index')
+        parser.add_argument('--queries', type=int, default=2000, help='Typed queries replayed keystroke by keystroke')
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(5000)]
+        index = SuggestionIndex(max_entries=options['titles'] + len(CATEGORIES), max_age=0)
+
+        started = time.perf_counter()
+        titles = []
+        for _ in range(options['titles']):
+            title = ' '.join(rng.choice(words) for _ in range(rng.randint(2, 5)))
+            titles.append(title)
+            index.add(title, rng.choice(CATEGORIES), rng.randint(1, 20))
+        build_seconds = time.perf_counter() - started
+
+        samples = []
+        for _ in range(options['queries']):
+            typed = rng.choice(titles)
+            for length in range(2, len(typed) + 1):
+                started = time.perf_counter()
+                index.suggest(typed[:length])
+                samples.append((time.perf_counter() - started) * 1_000_000)
+
+        self.stdout.write(
+            f'{len(index.entries)} suggestions, {len(index.keys)} keys built in {build_seconds:.2f}s'
+        )
+        self.stdout.write(
+            f'{len(samples)} keystrokes | p50 {percentile(samples, 50):.1f}us '
+            f'p99 {percentile(samples, 99):.1f}us max {max(samples):.1f}us'
+        )
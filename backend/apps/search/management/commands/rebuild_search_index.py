@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.items.models import Item
+from apps.search.backends import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the item search index from the Item table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per batch')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        rows = Item.objects.order_by().values_list('id', 'title', 'description', 'category').iterator(
+            chunk_size=options['batch_size']
+        )
+        with transaction.atomic():
+            count = backend.rebuild(rows, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} items with {backend.__class__.__name__}'))
@@ -0,0 +1,37 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.items.models import Item
+from .backends import get_search_backend
+from .suggestions import loaded_suggestion_index
+
+@receiver(pre_save, sender=Item)
+def remember_suggestion_fields(sender, instance, raw=False, **kwargs):
+    # The suggestion index needs the old title/category to retract them
+    instance._suggestion_previous = None
+    if raw or not instance.pk or loaded_suggestion_index() is None:
+        return
+    instance._suggestion_previous = Item.objects.filter(pk=instance.pk).values(
+        'title', 'category', 'is_available'
+    ).first()
+
+@receiver(post_save, sender=Item)
+def index_item(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    get_search_backend().index_item(instance)
+
+    index = loaded_suggestion_index()
+    if index is not None:
+        previous = instance._suggestion_previous
+        if previous and previous['is_available']:
+            index.discard(previous['title'], previous['category'])
+        if instance.is_available:
+            index.add(instance.title, instance.category)
+
+@receiver(post_delete, sender=Item)
+def unindex_item(sender, instance, **kwargs):
+    get_search_backend().remove_item(instance.pk)
+
+    index = loaded_suggestion_index()
+    if index is not None and instance.is_available:
+        index.discard(instance.title, instance.category)
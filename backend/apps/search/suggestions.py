@@ -0,0 +1,240 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Count
+from .backends import tokenize
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 100
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_suggestion_index():
+    """Return this process's suggestion index, building it on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SuggestionIndex(
+                    max_entries=getattr(settings, 'SUGGESTIONS_MAX_ENTRIES', 50000),
+                    max_age=getattr(settings, 'SUGGESTIONS_MAX_AGE', 3600),
+                )
+                index.load_from_database()
+                _index = index
+    index = _index
+    if index.is_stale():
+        # Requests keep reading the current index while a thread reloads it
+        index.refresh_in_background()
+    return index
+
+def warm_up_suggestion_index():
+    """Build the index at process start so the first keystroke does not pay for it"""
+    try:
+        get_suggestion_index()
+    except DatabaseError:
+        # Tables not migrated yet; the index is built lazily on first use instead
+        pass
+
+def loaded_suggestion_index():
+    """Return the index if this process has built it, without building or refreshing it"""
+    return _index
+
+def normalize(text):
+    return ' '.join(tokenize(text))[:MAX_KEY_LENGTH]
+
+class SuggestionIndex:
+    """
+    Prefix index over available item titles and categories.
+
+    Every word start of a title is stored as a key in one sorted list, so a
+    keystroke is a bisect plus a short forward scan. Suggestions are weighted
+    by how many available items carry them; when the index is full the
+    lightest suggestion is evicted, found through a min-heap of weights
+    (entries whose weight changed since they were pushed are skipped).
+    """
+    scan_limit = 200
+
+    def __init__(self, max_entries=50000, max_age=3600):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.lock = threading.RLock()
+        self.refreshing = False
+        self.pending = None          # add/discard calls made while load_from_database() reads, replayed on its result
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.keys = []           # sorted (key, kind, text) tuples
+            self.entries = {}        # (kind, text) -> {'text', 'category', 'weight'}
+            self.heap = []           # (weight, (kind, text)), possibly outdated; see _evict
+            self.loaded_at = time.monotonic()
+
+    def is_stale(self):
+        return self.max_age and time.monotonic() - self.loaded_at > self.max_age
+
+    def load_from_database(self):
+        """
+        Rebuild from the database: the heaviest max_entries suggestions, keys
+        sorted once, then swapped in. Updates arriving meanwhile go to the
+        current index and are replayed on the new one; only those racing the
+        read itself can be counted twice, until the next reload.
+        """
+        with self.lock:
+            self.pending = []
+        try:
+            weights, categories = self._read_weights()
+        except BaseException:
+            with self.lock:
+                self.pending = None
+            raise
+        kept = heapq.nlargest(self.max_entries, weights.items(), key=lambda pair: pair[1])
+        entries = {
+            key: {'text': key[1], 'category': categories[key], 'weight': weight} for key, weight in kept
+        }
+        keys = sorted(entry_key for key in entries for entry_key in self._entry_keys(*key))
+        heap = [(weight, key) for key, weight in kept]
+        heapq.heapify(heap)
+        with self.lock:
+            self.keys, self.entries, self.heap = keys, entries, heap
+            self.loaded_at = time.monotonic()
+            pending, self.pending = self.pending, None
+            for title, category, delta in pending:
+                self._apply(title, category, delta)
+
+    def _read_weights(self):
+        from apps.items.models import Item
+        rows = Item.objects.filter(is_available=True).order_by().values_list('title', 'category').annotate(
+            count=Count('id')
+        )
+        weights = {}
+        categories = {}
+        for title, category, count in rows.iterator():
+            for key, entry_category in ((('item', title), category), (('category', category), category)):
+                if key[1]:
+                    weights[key] = weights.get(key, 0) + count
+                    categories.setdefault(key, entry_category)
+        return weights, categories
+
+    def refresh_in_background(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        threading.Thread(target=self._refresh, name='suggestion-refresh', daemon=True).start()
+
+    def _refresh(self):
+        try:
+            self.load_from_database()
+        except Exception:
+            logger.exception('Reloading the suggestion index failed')
+        finally:
+            self.refreshing = False
+            connection.close()
+
+    def _entry_keys(self, kind, text):
+        normalized = normalize(text)
+        if kind == 'category':
+            return [(normalized, kind, text)] if normalized else []
+        words = normalized.split(' ')
+        return [(' '.join(words[i:]), kind, text) for i in range(len(words)) if words[i]]
+
+    def _bump(self, kind, text, category, delta):
+        if not text:
+            return
+        key = (kind, text)
+        entry = self.entries.get(key)
+        if entry is None:
+            if delta <= 0:
+                return
+            if len(self.entries) >= self.max_entries and not self._evict(delta):
+                return
+            self.entries[key] = {'text': text, 'category': category, 'weight': delta}
+            for entry_key in self._entry_keys(kind, text):
+                insort(self.keys, entry_key)
+            self._push(key, delta)
+            return
+        entry['weight'] += delta
+        if entry['weight'] <= 0:
+            self._remove(key)
+        else:
+            self._push(key, entry['weight'])
+
+    def _push(self, key, weight):
+        heapq.heappush(self.heap, (weight, key))
+        if len(self.heap) > 2 * len(self.entries) + 1000:
+            # Mostly outdated pairs: rebuild from the live weights
+            self.heap = [(entry['weight'], key) for key, entry in self.entries.items()]
+            heapq.heapify(self.heap)
+
+    def _remove(self, key):
+        del self.entries[key]
+        for entry_key in self._entry_keys(*key):
+            position = bisect_left(self.keys, entry_key)
+            if position < len(self.keys) and self.keys[position] == entry_key:
+                del self.keys[position]
+
+    def _evict(self, incoming_weight):
+        while self.heap:
+            weight, key = self.heap[0]
+            entry = self.entries.get(key)
+            if entry is None or entry['weight'] != weight:
+                heapq.heappop(self.heap)  # removed, or reweighted and pushed again since
+                continue
+            if weight > incoming_weight:
+                return False
+            heapq.heappop(self.heap)
+            self._remove(key)
+            return True
+        return False
+
+    def _apply(self, title, category, delta):
+        self._bump('item', title, category, delta)
+        self._bump('category', category, category, delta)
+
+    def _update(self, title, category, delta):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((title, category, delta))
+            self._apply(title, category, delta)
+
+    def add(self, title, category, count=1):
+        self._update(title, category, count)
+
+    def discard(self, title, category, count=1):
+        self._update(title, category, -count)
+
+    def suggest(self, query, item_limit=5, category_limit=3):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        items = {}
+        categories = {}
+        with self.lock:
+            position = bisect_left(self.keys, (prefix,))
+            end = min(len(self.keys), position + self.scan_limit)
+            while position < end:
+                key, kind, text = self.keys[position]
+                if not key.startswith(prefix):
+                    break
+                entry = self.entries[(kind, text)]
+                if kind == 'item':
+                    items[text] = entry
+                else:
+                    categories[text] = entry
+                position += 1
+        by_weight = lambda entry: entry['weight']
+        suggestions = [
+            {'type': 'item', 'text': entry['text'], 'category': entry['category']}
+            for entry in heapq.nlargest(item_limit, items.values(), key=by_weight)
+        ]
+        suggestions += [
+            {'type': 'category', 'text': entry['text'], 'category': entry['text']}
+            for entry in heapq.nlargest(category_limit, categories.values(), key=by_weight)
+        ]
+        return suggestions
@@ -0,0 +1,148 @@
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.items.models import Item
+from apps.users.models import User
+from . import suggestions
+from .backends import DatabaseSearchBackend, get_search_backend
+from .checks import check_search_backend
+from .suggestions import SuggestionIndex
+
+
+class ItemSearchPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        owners = [
+            User.objects.create_user(username=f'seller{n}', email=f'seller{n}@ait.ac.th') for n in range(2)
+        ]
+        for n in range(5):
+            Item.objects.create(owner=owners[n % 2], title=f'Bicycle {n}', price=100 + n)
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_sort_by_foreign_key_pages_through_every_item(self):
+        ids = self.collect('/api/search/items/?sort_by=owner&sort_order=asc&page_size=2')
+        expected = list(Item.objects.order_by('owner', 'pk').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_sort_by_must_be_a_listed_field(self):
+        for url in (
+            '/api/search/items/?sort_by=owner__username',
+            '/api/search/items/?sort_by=%3F',
+            '/api/search/items/?sort_by=price&sort_order=sideways',
+            '/api/search/want-to-buy/?sort_by=user__email',
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 400, url)
+        self.assertEqual(self.client.get('/api/search/items/?sort_by=price&sort_order=asc').status_code, 200)
+        self.assertEqual(self.client.get('/api/search/want-to-buy/?sort_by=max_price').status_code, 200)
+
+
+@override_settings(SEARCH_BACKEND='apps.search.backends.SQLiteFTSBackend')
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='seller', email='seller@ait.ac.th')
+
+    def search(self, query):
+        return get_search_backend().search(query, limit=10)
+
+    def test_index_follows_item_save_and_delete(self):
+        item = Item.objects.create(owner=self.owner, title='Desk lamp', price=10)
+        self.assertEqual(self.search('lamp'), [item.pk])
+        self.assertEqual(self.search('la'), [item.pk])
+
+        item.title = 'Rice cooker'
+        item.save()
+        self.assertEqual(self.search('lamp'), [])
+        self.assertEqual(self.search('cooker'), [item.pk])
+
+        item.delete()
+        self.assertEqual(self.search('cooker'), [])
+
+    def test_results_are_ranked_by_weighted_bm25(self):
+        in_description = Item.objects.create(owner=self.owner, title='Reading light', description='A lamp', price=10)
+        in_title = Item.objects.create(owner=self.owner, title='Lamp', description='Bright', price=10)
+        in_category = Item.objects.create(owner=self.owner, title='Shade', category='lamp', price=10)
+        Item.objects.create(owner=self.owner, title='Bicycle', price=10)
+        expected = [in_title.pk, in_category.pk, in_description.pk]
+        self.assertEqual(self.search('lamp'), expected)
+
+        response = self.client.get('/api/search/items/?q=lamp')
+        self.assertEqual([item['id'] for item in response.json()['results']], expected)
+
+    def test_fts_backend_is_rejected_off_sqlite(self):
+        self.assertEqual(check_search_backend(None), [])
+        with patch('apps.search.checks.connection') as connection:
+            connection.vendor = 'postgresql'
+            self.assertEqual([error.id for error in check_search_backend(None)], ['search.E001'])
+            with override_settings(SEARCH_BACKEND='apps.search.backends.DatabaseSearchBackend'):
+                self.assertEqual(check_search_backend(None), [])
+                self.assertIsInstance(get_search_backend(), DatabaseSearchBackend)
+
+
+class SuggestionIndexTests(TestCase):
+    def test_full_index_evicts_the_lightest_entry(self):
+        index = SuggestionIndex(max_entries=3)
+        index.add('Bicycle', '', 5)
+        index.add('Desk lamp', '', 1)
+        index.add('Rice cooker', '', 3)
+        index.add('Desk lamp', '', 4)   # now weighs 5; its old heap position is outdated
+        index.add('Kettle', '', 2)      # lighter than every entry: not added
+        self.assertEqual({entry['text'] for entry in index.entries.values()}, {'Bicycle', 'Desk lamp', 'Rice cooker'})
+        index.add('Monitor', '', 4)     # heavier than Rice cooker, which goes
+        self.assertEqual({entry['text'] for entry in index.entries.values()}, {'Bicycle', 'Desk lamp', 'Monitor'})
+        self.assertEqual([s['text'] for s in index.suggest('ric')], [])
+        self.assertEqual([s['text'] for s in index.suggest('lam')], ['Desk lamp'])
+
+    def test_load_keeps_the_heaviest_entries(self):
+        owner = User.objects.create_user(username='lister', email='lister@ait.ac.th')
+        Item.objects.bulk_create(
+            [Item(owner=owner, title='Mountain bike', category='Sports') for _ in range(3)]
+            + [Item(owner=owner, title='Mouse pad', category='Electronics')]
+            + [Item(owner=owner, title='Old mouse', category='Electronics', is_available=False)]
+        )
+        index = SuggestionIndex(max_entries=3)
+        index.load_from_database()
+        self.assertEqual(set(index.entries), {('item', 'Mountain bike'), ('category', 'Sports'), ('item', 'Mouse pad')})
+        self.assertEqual(
+            index.suggest('mou'),
+            [{'type': 'item', 'text': 'Mountain bike', 'category': 'Sports'},
+             {'type': 'item', 'text': 'Mouse pad', 'category': 'Electronics'}],
+        )
+
+    def test_updates_during_a_reload_survive_the_swap(self):
+        owner = User.objects.create_user(username='lister', email='lister@ait.ac.th')
+        Item.objects.bulk_create([Item(owner=owner, title='Mountain bike', category='Sports') for _ in range(3)])
+        index = SuggestionIndex()
+        read_weights = index._read_weights
+
+        def read_while_items_change():
+            weights = read_weights()
+            # Saved after the rows were read, as if by a request during a background reload
+            index.add('Desk lamp', 'Furniture')
+            index.discard('Mountain bike', 'Sports')
+            self.assertEqual([s['text'] for s in index.suggest('lam')], ['Desk lamp'])
+            return weights
+
+        with patch.object(index, '_read_weights', side_effect=read_while_items_change):
+            index.load_from_database()
+        self.assertEqual([s['text'] for s in index.suggest('lam')], ['Desk lamp'])
+        self.assertEqual(index.entries[('item', 'Mountain bike')]['weight'], 2)
+        self.assertIsNone(index.pending)
+
+        index.add('Kettle', 'Kitchen')
+        self.assertIsNone(index.pending)
+
+    def test_stale_index_is_refreshed_outside_the_request(self):
+        index = SuggestionIndex(max_age=1)
+        index.loaded_at -= 10
+        with patch.object(suggestions, '_index', index), patch.object(index, 'refresh_in_background') as refresh:
+            self.assertIs(suggestions.get_suggestion_index(), index)
+        refresh.assert_called_once_with()
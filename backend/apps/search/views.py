@@ -1,16 +1,40 @@
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import Q, Case, When, IntegerField
+from apps.items.fastpath import FastItemListMixin
 from apps.items.models import Item
 from apps.items.serializers import ItemSerializer
+from apps.categories.models import in_category_subtree
 from apps.wishlist.models import WantToBuy
 from apps.wishlist.serializers import WantToBuySerializer
+from marketplace.renderers import FastJSONRenderer
+from marketplace.response_cache import cache_response
+from .backends import get_search_backend
+from .suggestions import get_suggestion_index
 
-class ItemSearchView(generics.ListAPIView):
+# Plain columns only: KeysetPagination cannot order across relations
+ITEM_SORT_FIELDS = ('relevance', 'created_at', 'updated_at', 'price', 'title', 'category', 'condition', 'location', 'owner')
+WANT_TO_BUY_SORT_FIELDS = ('created_at', 'max_price', 'title', 'category', 'condition', 'location')
+
+def sort_params(request, allowed, default):
+    """Validated (sort_by, sort_order) query parameters; anything else is a 400"""
+    sort_by = request.query_params.get('sort_by') or default
+    sort_order = request.query_params.get('sort_order') or 'desc'
+    if sort_by not in allowed:
+        raise ValidationError({'sort_by': f"Must be one of: {', '.join(allowed)}"})
+    if sort_order not in ('asc', 'desc'):
+        raise ValidationError({'sort_order': 'Must be asc or desc'})
+    return sort_by, sort_order
+
+class ItemSearchView(FastItemListMixin, generics.ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = ItemSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     
     def get_queryset(self):
         queryset = Item.objects.filter(is_available=True)
@@ -18,21 +42,20 @@ class ItemSearchView(generics.ListAPIView):
         # Search parameters
         query = self.request.query_params.get('q', '')
         category = self.request.query_params.get('category', '')
+        category_id = self.request.query_params.get('category_id')
         min_price = self.request.query_params.get('min_price')
         max_price = self.request.query_params.get('max_price')
         condition = self.request.query_params.get('condition', '')
         location = self.request.query_params.get('location', '')
         is_barter = self.request.query_params.get('is_barter')
-        sort_by = self.request.query_params.get('sort_by', 'created_at')
-        sort_order = self.request.query_params.get('sort_order', 'desc')
+        sort_by, sort_order = sort_params(self.request, ITEM_SORT_FIELDS, 'relevance' if query else 'created_at')
         
-        # Text search
+        # Text search (ranked ids come from the search index, capped so cost stays bounded)
+        ranked_ids = []
         if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(category__icontains=query)
-            )
+            max_results = getattr(settings, 'SEARCH_MAX_RESULTS', 500)
+            ranked_ids = get_search_backend().search(query, limit=max_results)
+            queryset = queryset.filter(id__in=ranked_ids)
         
         # Category filter
         if category:
@@ -41,6 +64,10 @@ class ItemSearchView(generics.ListAPIView):
                 Q(category_new__name__icontains=category)
             )
         
+        # Category subtree filter (the category and all of its descendants)
+        if category_id and category_id.isdigit():
+            queryset = queryset.filter(in_category_subtree(int(category_id)))
+        
         # Price range filter
         if min_price:
             try:
@@ -67,6 +94,14 @@ class ItemSearchView(generics.ListAPIView):
             queryset = queryset.filter(is_barter=is_barter.lower() == 'true')
         
         # Sorting
+        if sort_by == 'relevance':
+            if not ranked_ids:
+                return queryset.order_by('-created_at')
+            rank = Case(
+                *[When(id=item_id, then=position) for position, item_id in enumerate(ranked_ids)],
+                output_field=IntegerField()
+            )
+            return queryset.annotate(rank=rank).order_by('rank')
         if sort_order == 'desc':
             sort_by = f'-{sort_by}'
         queryset = queryset.order_by(sort_by)
@@ -86,8 +121,7 @@ class WantToBuySearchView(generics.ListAPIView):
         max_price = self.request.query_params.get('max_price')
         condition = self.request.query_params.get('condition', '')
         location = self.request.query_params.get('location', '')
-        sort_by = self.request.query_params.get('sort_by', 'created_at')
-        sort_order = self.request.query_params.get('sort_order', 'desc')
+        sort_by, sort_order = sort_params(self.request, WANT_TO_BUY_SORT_FIELDS, 'created_at')
         
         # Text search
         if query:
@@ -132,41 +166,14 @@ def search_suggestions(request):
     if len(query) < 2:
         return Response({'suggestions': []})
     
-    # Get popular item titles
-    item_suggestions = Item.objects.filter(
-        Q(title__icontains=query) | Q(category__icontains=query),
-        is_available=True
-    ).values_list('title', 'category').distinct()[:5]
-    
-    # Get popular categories
-    category_suggestions = Item.objects.filter(
-        category__icontains=query,
-        is_available=True
-    ).values_list('category', flat=True).distinct()[:3]
-    
-    suggestions = []
-    
-    # Add item suggestions
-    for title, category in item_suggestions:
-        suggestions.append({
-            'type': 'item',
-            'text': title,
-            'category': category
-        })
-    
-    # Add category suggestions
-    for category in category_suggestions:
-        if category:
-            suggestions.append({
-                'type': 'category',
-                'text': category,
-                'category': category
-            })
+    # Answered from the in-process prefix index, no database query per keystroke
+    suggestions = get_suggestion_index().suggest(query, item_limit=5, category_limit=3)
     
     return Response({'suggestions': suggestions})
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@cache_response('items', 'want_to_buy')
 def search_stats(request):
     """Return search statistics"""
     total_items = Item.objects.filter(is_available=True).count()
@@ -0,0 +1,190 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, F, Sum, Q
+from django.utils import timezone
+from apps.items.models import Item
+from apps.orders.models import Order
+from apps.users.models import User, UserMembership
+from apps.wishlist.models import WantToBuy
+from apps.wanted.models import WantedItem
+from apps.barter.models import BarterTransaction
+from apps.forum.models import ForumPost
+from apps.advertisements.models import Advertisement
+from .models import DashboardSnapshot
+
+def windows(now):
+    return {
+        'week_ago': now - timedelta(days=7),
+        'two_weeks_ago': now - timedelta(days=14),
+        'month_ago': now - timedelta(days=30),
+    }
+
+def recent_counts(field, w):
+    """Created-in-window counters for one timestamp field, as conditional aggregates"""
+    return {
+        'created_7d': Count('id', filter=Q(**{f'{field}__gte': w['week_ago']})),
+        'created_prev_7d': Count('id', filter=Q(**{
+            f'{field}__gte': w['two_weeks_ago'], f'{field}__lt': w['week_ago']
+        })),
+        'created_30d': Count('id', filter=Q(**{f'{field}__gte': w['month_ago']})),
+    }
+
+# Each section is computed with a single query over one table
+
+def compute_users(now):
+    return User.objects.aggregate(
+        total=Count('id'),
+        verified=Count('id', filter=Q(is_verified=True)),
+        **recent_counts('date_joined', windows(now))
+    )
+
+def compute_items(now):
+    return Item.objects.aggregate(
+        total=Count('id'),
+        available=Count('id', filter=Q(is_available=True)),
+        featured=Count('id', filter=Q(is_featured=True, is_available=True)),
+        **recent_counts('created_at', windows(now))
+    )
+
+def compute_orders(now):
+    w = windows(now)
+    totals = Order.objects.aggregate(
+        total=Count('id'),
+        delivered=Count('id', filter=Q(status='delivered')),
+        pending=Count('id', filter=Q(status='pending')),
+        revenue=Sum('total_price', filter=Q(payment_status='paid')),
+        revenue_30d=Sum('total_price', filter=Q(payment_status='paid', created_at__gte=w['month_ago'])),
+        **recent_counts('created_at', w)
+    )
+    totals['revenue'] = float(totals['revenue'] or 0)
+    totals['revenue_30d'] = float(totals['revenue_30d'] or 0)
+    return totals
+
+def compute_barter(now):
+    return BarterTransaction.objects.aggregate(total=Count('id'))
+
+def compute_want_to_buy(now):
+    return WantToBuy.objects.aggregate(active=Count('id', filter=Q(status='active')))
+
+def compute_wanted(now):
+    return WantedItem.objects.aggregate(active=Count('id', filter=Q(is_active=True)))
+
+def compute_forum(now):
+    return ForumPost.objects.aggregate(
+        total=Count('id'),
+        created_7d=Count('id', filter=Q(created_at__gte=windows(now)['week_ago'])),
+    )
+
+def compute_advertisements(now):
+    return Advertisement.objects.aggregate(total=Count('id'))
+
+def compute_memberships(now):
+    return UserMembership.objects.aggregate(active=Count('id', filter=Q(is_active=True, end_date__gt=now)))
+
+def compute_popular_categories(now):
+    top = Item.objects.filter(is_available=True).values('category').annotate(
+        count=Count('id')
+    ).order_by('-count')[:10]
+    return {'top': list(top)}
+
+def compute_order_status(now):
+    distribution = Order.objects.values('status').annotate(count=Count('id')).order_by('-count')
+    return {'distribution': list(distribution)}
+
+def top_selling_items(limit=10, since=None):
+    """Best sellers by order count with paid revenue, as one grouped query over orders"""
+    orders = Order.objects.all()
+    if since is not None:
+        orders = orders.filter(created_at__gte=since)
+    top = orders.values('item_id', 'item__title').annotate(
+        order_count=Count('id'),
+        total_revenue=Sum('total_price', filter=Q(payment_status='paid')),
+    ).order_by('-order_count', 'item_id')[:limit]
+    return [
+        {
+            'id': row['item_id'],
+            'title': row['item__title'],
+            'order_count': row['order_count'],
+            'total_revenue': float(row['total_revenue'] or 0),
+        }
+        for row in top
+    ]
+
+SECTIONS = {
+    'users': compute_users,
+    'items': compute_items,
+    'orders': compute_orders,
+    'barter': compute_barter,
+    'want_to_buy': compute_want_to_buy,
+    'wanted': compute_wanted,
+    'forum': compute_forum,
+    'advertisements': compute_advertisements,
+    'memberships': compute_memberships,
+    'popular_categories': compute_popular_categories,
+    'order_status': compute_order_status,
+}
+
+# Which snapshot sections a write to each model invalidates
+SECTION_MODELS = {
+    User: ['users'],
+    Item: ['items', 'popular_categories'],
+    Order: ['orders', 'order_status'],
+    BarterTransaction: ['barter'],
+    WantToBuy: ['want_to_buy'],
+    WantedItem: ['wanted'],
+    ForumPost: ['forum'],
+    Advertisement: ['advertisements'],
+    UserMembership: ['memberships'],
+}
+
+# Columns the sections read; an update_fields save touching none of them (e.g. last_login) changes no counter.
+# Models not listed invalidate on every save.
+SECTION_FIELDS = {
+    User: {'is_verified', 'date_joined'},
+    Item: {'is_available', 'is_featured', 'category', 'created_at'},
+    Order: {'status', 'payment_status', 'total_price', 'created_at'},
+    WantToBuy: {'status'},
+    WantedItem: {'is_active'},
+    ForumPost: {'created_at'},
+    UserMembership: {'is_active', 'end_date'},
+}
+
+def affects_dashboard(model, update_fields):
+    fields = SECTION_FIELDS.get(model)
+    return update_fields is None or fields is None or not fields.isdisjoint(update_fields)
+
+def compute_sections(names, now=None):
+    """Compute sections live, bypassing the snapshot table"""
+    now = now or timezone.now()
+    return {name: SECTIONS[name](now) for name in names}
+
+def get_dashboard(names):
+    """
+    Read dashboard sections from the snapshot table.
+
+    Sections marked stale by a write, or older than DASHBOARD_SNAPSHOT_MAX_AGE
+    (time windows slide even without writes), are recomputed and stored;
+    everything else is served from the precomputed rows. A recompute is
+    stored only if the row's version is still the one read before it, so a
+    write landing during the recompute leaves the section stale.
+    """
+    now = timezone.now()
+    max_age = timedelta(seconds=getattr(settings, 'DASHBOARD_SNAPSHOT_MAX_AGE', 300))
+    snapshots = {s.name: s for s in DashboardSnapshot.objects.filter(name__in=names)}
+    data = {}
+    for name in names:
+        snapshot = snapshots.get(name)
+        if snapshot and not snapshot.is_stale and snapshot.refreshed_at and now - snapshot.refreshed_at < max_age:
+            data[name] = snapshot.data
+            continue
+        if snapshot is None:
+            # Created stale first so mark_stale has a row to bump while the section is computed
+            snapshot, _ = DashboardSnapshot.objects.get_or_create(name=name)
+        data[name] = SECTIONS[name](now)
+        DashboardSnapshot.objects.filter(name=name, version=snapshot.version).update(
+            data=data[name], is_stale=False, refreshed_at=now
+        )
+    return data
+
+def mark_stale(names):
+    DashboardSnapshot.objects.filter(name__in=names).update(is_stale=True, version=F('version') + 1)
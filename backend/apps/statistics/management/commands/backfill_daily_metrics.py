@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from apps.items.models import Item
+from apps.orders.models import Order
+from apps.users.models import User
+from apps.statistics.rollups import local_date, rebuild_days
+
+
+class Command(BaseCommand):
+    help = 'Recompute DailyMetrics / DailyCategoryMetrics rows from orders, items and users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Only rebuild the last N days (default: full history)')
+        parser.add_argument('--since', help='Rebuild from this date (YYYY-MM-DD)')
+        parser.add_argument('--chunk-days', type=int, default=90, help='Days recomputed per transaction')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['since']:
+            try:
+                first_day = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be YYYY-MM-DD')
+        elif options['days']:
+            first_day = today - timedelta(days=options['days'] - 1)
+        else:
+            first_day = self.earliest_day() or today
+
+        rows = 0
+        chunk = timedelta(days=max(1, options['chunk_days']))
+        start = first_day
+        while start <= today:
+            end = min(start + chunk - timedelta(days=1), today)
+            rows += rebuild_days(start, end)
+            start = end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily rows from {first_day} to {today}'))
+
+    def earliest_day(self):
+        candidates = [
+            Order.objects.aggregate(first=Min('created_at'))['first'],
+            Item.objects.aggregate(first=Min('created_at'))['first'],
+            User.objects.aggregate(first=Min('date_joined'))['first'],
+        ]
+        candidates = [local_date(value) for value in candidates if value]
+        return min(candidates) if candidates else None
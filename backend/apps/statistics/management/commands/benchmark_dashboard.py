@@ -0,0 +1,121 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Mod
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.items.models import Item
+from apps.orders.models import Order
+from apps.users.models import User
+from apps.wishlist.models import WantToBuy
+from apps.barter.models import BarterTransaction
+from apps.statistics.dashboard import compute_sections, get_dashboard
+
+DASHBOARD_SECTIONS = ['items', 'users', 'orders', 'barter', 'want_to_buy', 'popular_categories']
+
+
+def legacy_dashboard():
+    """The per-counter queries dashboard_stats used to run, kept for comparison"""
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    return [
+        Item.objects.filter(is_available=True).count(),
+        User.objects.filter(is_verified=True).count(),
+        Order.objects.count(),
+        BarterTransaction.objects.count(),
+        WantToBuy.objects.filter(status='active').count(),
+        Item.objects.filter(created_at__gte=thirty_days_ago).count(),
+        Order.objects.filter(created_at__gte=thirty_days_ago).count(),
+        User.objects.filter(date_joined__gte=thirty_days_ago).count(),
+        Order.objects.filter(payment_status='paid').aggregate(total=Sum('total_price')),
+        Order.objects.filter(payment_status='paid', created_at__gte=thirty_days_ago).aggregate(
+            total=Sum('total_price')
+        ),
+        list(Item.objects.filter(is_available=True).values('category').annotate(
+            count=Count('id')
+        ).order_by('-count')[:5]),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Seed orders inside a rolled-back transaction and compare dashboard strategies (latency and query count)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000000)
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options)
+            strategies = [
+                ('legacy per-counter queries', legacy_dashboard),
+                ('single-pass aggregates', lambda: compute_sections(DASHBOARD_SECTIONS)),
+                ('snapshot read', lambda: get_dashboard(DASHBOARD_SECTIONS)),
+            ]
+            get_dashboard(DASHBOARD_SECTIONS)  # warm the snapshot rows
+            for label, strategy in strategies:
+                self.report(label, strategy, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(1)
+        now = timezone.now()
+        batch = options['batch_size']
+        started = time.perf_counter()
+
+        User.objects.bulk_create(
+            [User(username=f'bench_user_{i}', email=f'bench{i}@ait.ac.th') for i in range(options['users'])],
+            batch_size=batch
+        )
+        user_ids = list(User.objects.filter(username__startswith='bench_user_').values_list('id', flat=True))
+        categories = ['books', 'furniture', 'sports', 'phone', 'games']
+        Item.objects.bulk_create(
+            [
+                Item(owner_id=rng.choice(user_ids), title=f'Bench item {i}', category=rng.choice(categories),
+                     price=Decimal(rng.randint(10, 5000)), is_available=rng.random() < 0.8)
+                for i in range(options['items'])
+            ],
+            batch_size=batch
+        )
+        items = list(Item.objects.filter(title__startswith='Bench item ').values_list('id', 'owner_id', 'price'))
+
+        statuses = [choice for choice, _ in Order.STATUS_CHOICES]
+        payment_statuses = [choice for choice, _ in Order.PAYMENT_STATUS_CHOICES]
+        created = 0
+        while created < options['orders']:
+            size = min(batch, options['orders'] - created)
+            orders = []
+            for _ in range(size):
+                item_id, seller_id, price = rng.choice(items)
+                orders.append(Order(
+                    buyer_id=rng.choice(user_ids), seller_id=seller_id, item_id=item_id, total_price=price,
+                    status=rng.choice(statuses), payment_status=rng.choice(payment_statuses),
+                    shipping_address='AIT Campus',
+                ))
+            Order.objects.bulk_create(orders)
+            created += size
+        # auto_now_add stamps every order "now"; age a share of them so the 30-day windows filter
+        Order.objects.annotate(bucket=Mod('id', 4)).filter(bucket=0).update(created_at=now - timedelta(days=200))
+        self.stdout.write(
+            f'Seeded {options["users"]} users, {options["items"]} items, {created} orders '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+
+    def report(self, label, strategy, repeat):
+        samples = []
+        with CaptureQueriesContext(connection) as queries:
+            strategy()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            strategy()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        self.stdout.write(f'{label:<28} {len(queries):>3} queries | p50 {p50:9.2f}ms p99 {p99:9.2f}ms')
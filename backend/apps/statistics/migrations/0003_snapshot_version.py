@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statistics', '0002_daily_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboardsnapshot',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped by every invalidation; a recompute only clears is_stale if it is unchanged'),
+        ),
+    ]
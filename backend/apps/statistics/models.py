@@ -0,0 +1,48 @@
+from django.db import models
+
+class DashboardSnapshot(models.Model):
+    """Precomputed dashboard counters, one row per section (see dashboard.SECTIONS)"""
+    name = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(default=dict)
+    is_stale = models.BooleanField(default=True, help_text="Set when a write touched the section's table")
+    version = models.PositiveIntegerField(default=0, help_text="Bumped by every invalidation; a recompute only clears is_stale if it is unchanged")
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return f"{self.name} snapshot ({self.refreshed_at})"
+
+class DailyMetrics(models.Model):
+    """Per-day rollup of marketplace activity (local calendar days)"""
+    date = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    order_value = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Total price of all orders placed")
+    paid_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Total price of paid orders")
+    new_users = models.PositiveIntegerField(default=0)
+    new_items = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-date']
+        verbose_name_plural = 'Daily metrics'
+    
+    def __str__(self):
+        return f"Metrics for {self.date}"
+
+class DailyCategoryMetrics(models.Model):
+    """Per-day, per-category rollup of new items and orders"""
+    date = models.DateField()
+    category = models.CharField(max_length=100, blank=True)
+    new_items = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date', 'category']
+        unique_together = ['date', 'category']
+        verbose_name_plural = 'Daily category metrics'
+    
+    def __str__(self):
+        return f"{self.category or 'uncategorized'} on {self.date}"
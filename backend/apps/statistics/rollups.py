@@ -0,0 +1,120 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum, Q, F
+from django.db.models.functions import Greatest, TruncDate, TruncMonth
+from django.utils import timezone
+from apps.items.models import Item
+from apps.orders.models import Order
+from apps.users.models import User
+from .models import DailyMetrics, DailyCategoryMetrics
+
+def local_date(value):
+    return timezone.localtime(value).date()
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+def _bump(model, lookup, deltas):
+    """Add deltas to one rollup row with F() expressions, creating the row if needed"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    # Rows written before the rollups existed are not counted, so a decrement can
+    # outrun the stored total; clamp at zero instead of tripping the CHECK constraint
+    changes = {
+        name: F(name) + delta if delta > 0 else Greatest(F(name) + delta, 0, output_field=model._meta.get_field(name))
+        for name, delta in deltas.items()
+    }
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        # Nothing recorded for that day yet, so there is nothing to take back
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another request created the row first
+        model.objects.filter(**lookup).update(**changes)
+
+def bump_day(day, **deltas):
+    _bump(DailyMetrics, {'date': day}, deltas)
+
+def bump_category(day, category, **deltas):
+    _bump(DailyCategoryMetrics, {'date': day, 'category': category or ''}, deltas)
+
+def order_deltas(order, sign=1):
+    paid = order.payment_status == 'paid'
+    total = order.total_price or Decimal('0')
+    return {
+        'paid_orders': sign if paid else 0,
+        'revenue': sign * total if paid else 0,
+    }
+
+def compute_days(first_day, last_day):
+    """Recompute rollup rows for an inclusive range of days straight from the source tables"""
+    start, end = day_start(first_day), day_start(last_day + timedelta(days=1))
+    day = TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+    joined_day = TruncDate('date_joined', tzinfo=timezone.get_current_timezone())
+
+    metrics = {}
+    def row(date):
+        return metrics.setdefault(date, DailyMetrics(date=date))
+
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=end).annotate(day=day)
+    for entry in orders.values('day').annotate(
+        orders=Count('id'),
+        order_value=Sum('total_price'),
+        paid_orders=Count('id', filter=Q(payment_status='paid')),
+        revenue=Sum('total_price', filter=Q(payment_status='paid')),
+    ).order_by():
+        metrics_row = row(entry['day'])
+        metrics_row.orders = entry['orders']
+        metrics_row.order_value = entry['order_value'] or 0
+        metrics_row.paid_orders = entry['paid_orders']
+        metrics_row.revenue = entry['revenue'] or 0
+
+    users = User.objects.filter(date_joined__gte=start, date_joined__lt=end).annotate(day=joined_day)
+    for entry in users.values('day').annotate(count=Count('id')).order_by():
+        row(entry['day']).new_users = entry['count']
+
+    categories = {}
+    items = Item.objects.filter(created_at__gte=start, created_at__lt=end).annotate(day=day)
+    for entry in items.values('day', 'category').annotate(count=Count('id')).order_by():
+        row(entry['day']).new_items += entry['count']
+        key = (entry['day'], entry['category'])
+        categories[key] = DailyCategoryMetrics(date=entry['day'], category=entry['category'], new_items=entry['count'])
+    for entry in orders.values('day', 'item__category').annotate(count=Count('id')).order_by():
+        key = (entry['day'], entry['item__category'])
+        categories.setdefault(key, DailyCategoryMetrics(date=key[0], category=key[1])).orders = entry['count']
+
+    return list(metrics.values()), list(categories.values())
+
+def rebuild_days(first_day, last_day, batch_size=1000):
+    metrics, categories = compute_days(first_day, last_day)
+    with transaction.atomic():
+        DailyMetrics.objects.filter(date__range=(first_day, last_day)).delete()
+        DailyCategoryMetrics.objects.filter(date__range=(first_day, last_day)).delete()
+        DailyMetrics.objects.bulk_create(metrics, batch_size=batch_size)
+        DailyCategoryMetrics.objects.bulk_create(categories, batch_size=batch_size)
+    return len(metrics)
+
+def daily_series(days, fields):
+    """Last `days` local days (oldest first) with zero-filled rollup values"""
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+    rows = {
+        entry['date']: entry
+        for entry in DailyMetrics.objects.filter(date__gte=first_day).values('date', *fields)
+    }
+    return [
+        {'date': day, **{field: rows.get(day, {}).get(field, 0) for field in fields}}
+        for day in (first_day + timedelta(days=offset) for offset in range(days))
+    ]
+
+def monthly_totals(since, **sums):
+    """Sum rollup columns per month, e.g. monthly_totals(since, count='orders')"""
+    return DailyMetrics.objects.filter(date__gte=since).annotate(month=TruncMonth('date')).values('month').annotate(
+        **{name: Sum(column) for name, column in sums.items()}
+    ).order_by('month')
@@ -0,0 +1,91 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from apps.items.models import Item
+from apps.orders.models import Order
+from apps.users.models import User
+from .dashboard import SECTION_MODELS, affects_dashboard, mark_stale
+from .rollups import local_date, bump_day, bump_category, order_deltas
+
+def invalidate_dashboard(sender, raw=False, created=False, update_fields=None, **kwargs):
+    if raw or not (created or affects_dashboard(sender, update_fields)):
+        return
+    mark_stale(SECTION_MODELS[sender])
+
+# Daily rollups are kept current with F() increments; bulk writes bypass
+# signals and are picked up by the backfill_daily_metrics command
+
+def remember_order(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if raw or not instance.pk:
+        return
+    instance._rollup_previous = Order.objects.filter(pk=instance.pk).only(
+        'payment_status', 'total_price', 'created_at'
+    ).first()
+
+def rollup_order_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    day = local_date(instance.created_at)
+    if created:
+        bump_day(day, orders=1, order_value=instance.total_price, **order_deltas(instance))
+        bump_category(day, instance.item.category, orders=1)
+        return
+    previous = instance._rollup_previous
+    if previous is None:
+        return
+    before, after = order_deltas(previous), order_deltas(instance)
+    bump_day(
+        day,
+        order_value=instance.total_price - previous.total_price,
+        **{name: after[name] - before[name] for name in after}
+    )
+
+def rollup_order_deleted(sender, instance, **kwargs):
+    day = local_date(instance.created_at)
+    bump_day(day, orders=-1, order_value=-instance.total_price, **order_deltas(instance, sign=-1))
+    category = Item.objects.filter(pk=instance.item_id).values_list('category', flat=True).first()
+    if category is not None:
+        bump_category(day, category, orders=-1)
+
+def remember_item_category(sender, instance, raw=False, **kwargs):
+    instance._rollup_category = None
+    if raw or not instance.pk:
+        return
+    instance._rollup_category = Item.objects.filter(pk=instance.pk).values_list('category', flat=True).first()
+
+def rollup_item_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    day = local_date(instance.created_at)
+    if created:
+        bump_day(day, new_items=1)
+        bump_category(day, instance.category, new_items=1)
+    elif instance._rollup_category is not None and instance._rollup_category != instance.category:
+        bump_category(day, instance._rollup_category, new_items=-1)
+        bump_category(day, instance.category, new_items=1)
+
+def rollup_item_deleted(sender, instance, **kwargs):
+    day = local_date(instance.created_at)
+    bump_day(day, new_items=-1)
+    bump_category(day, instance.category, new_items=-1)
+
+def rollup_user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    bump_day(local_date(instance.date_joined), new_users=1)
+
+def rollup_user_deleted(sender, instance, **kwargs):
+    bump_day(local_date(instance.date_joined), new_users=-1)
+
+def connect_signals():
+    for model in SECTION_MODELS:
+        post_save.connect(invalidate_dashboard, sender=model, dispatch_uid=f'dashboard_save_{model._meta.label}')
+        post_delete.connect(invalidate_dashboard, sender=model, dispatch_uid=f'dashboard_delete_{model._meta.label}')
+
+    pre_save.connect(remember_order, sender=Order, dispatch_uid='rollup_order_pre_save')
+    post_save.connect(rollup_order_saved, sender=Order, dispatch_uid='rollup_order_save')
+    post_delete.connect(rollup_order_deleted, sender=Order, dispatch_uid='rollup_order_delete')
+    pre_save.connect(remember_item_category, sender=Item, dispatch_uid='rollup_item_pre_save')
+    post_save.connect(rollup_item_saved, sender=Item, dispatch_uid='rollup_item_save')
+    post_delete.connect(rollup_item_deleted, sender=Item, dispatch_uid='rollup_item_delete')
+    post_save.connect(rollup_user_saved, sender=User, dispatch_uid='rollup_user_save')
+    post_delete.connect(rollup_user_deleted, sender=User, dispatch_uid='rollup_user_delete')
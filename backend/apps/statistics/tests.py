@@ -0,0 +1,145 @@
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth.models import update_last_login
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.items.models import Item
+from apps.orders.models import Order
+from apps.users.models import User
+from .dashboard import SECTIONS, get_dashboard, mark_stale, top_selling_items
+from .models import DailyCategoryMetrics, DailyMetrics, DashboardSnapshot
+
+
+class RollupDecrementTests(TestCase):
+    """Rows created before the rollups (or a backfill) existed must not drive a counter below zero"""
+
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', email='seller@ait.ac.th', password='password123')
+        self.buyer = User.objects.create_user(username='buyer', email='buyer@ait.ac.th', password='password123')
+        self.item = Item.objects.create(owner=self.seller, title='Desk lamp', price=Decimal('100'), category='home')
+        self.order = Order.objects.create(
+            buyer=self.buyer, seller=self.seller, item=self.item, quantity=1,
+            total_price=Decimal('100'), payment_status='paid', shipping_address='AIT Campus',
+        )
+        # As if all of the above predates the rollups: the day's rows exist but count none of it
+        DailyMetrics.objects.update(orders=0, order_value=0, paid_orders=0, revenue=0, new_users=0, new_items=0)
+        DailyCategoryMetrics.objects.update(new_items=0, orders=0)
+        self.today = timezone.localdate()
+
+    def test_editing_and_deleting_old_rows_clamps_at_zero(self):
+        self.item.category = 'books'
+        self.item.save()
+        self.order.payment_status = 'refunded'
+        self.order.save()
+        self.order.delete()
+        self.buyer.delete()
+        self.item.delete()
+
+        metrics = DailyMetrics.objects.get(date=self.today)
+        for name in ('orders', 'order_value', 'paid_orders', 'revenue', 'new_users', 'new_items'):
+            self.assertEqual(getattr(metrics, name), 0, name)
+        self.assertFalse(DailyCategoryMetrics.objects.filter(new_items__gt=0).exists())
+        self.assertFalse(DailyCategoryMetrics.objects.filter(orders__gt=0).exists())
+
+    def test_increments_still_count(self):
+        Item.objects.create(owner=self.seller, title='Chair', category='home')
+        self.assertEqual(DailyMetrics.objects.get(date=self.today).new_items, 1)
+        self.assertEqual(DailyCategoryMetrics.objects.get(date=self.today, category='home').new_items, 1)
+
+
+class DashboardSnapshotTests(TestCase):
+    SECTIONS = ['items', 'users', 'orders', 'barter', 'want_to_buy', 'popular_categories']
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@ait.ac.th', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def seed(self, count):
+        Item.objects.bulk_create([
+            Item(owner=self.admin, title=f'Item {n}', price=Decimal('10'), category=f'cat{n % 3}') for n in range(count)
+        ])
+
+    def test_dashboard_query_counts(self):
+        # Cold: per section a get_or_create (select, savepoint, insert, release), the aggregate and the store
+        with self.assertNumQueries(1 + 6 * len(self.SECTIONS)):
+            self.assertEqual(self.client.get('/api/statistics/dashboard/').status_code, 200)
+        # Warm: one read of the snapshot rows, whatever the table sizes
+        self.seed(50)
+        DashboardSnapshot.objects.update(is_stale=False)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/statistics/dashboard/').status_code, 200)
+        # A stale section costs its aggregate and the store
+        mark_stale(['items'])
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/statistics/dashboard/')
+        self.assertEqual(response.data['overview']['total_items'], 50)
+
+    def test_saves_that_touch_no_counted_column_do_not_invalidate(self):
+        get_dashboard(['users'])
+        version = DashboardSnapshot.objects.get(name='users').version
+        update_last_login(None, self.admin)
+        snapshot = DashboardSnapshot.objects.get(name='users')
+        self.assertEqual((snapshot.is_stale, snapshot.version), (False, version))
+
+        self.admin.is_verified = True
+        self.admin.save(update_fields=['is_verified'])
+        self.assertTrue(DashboardSnapshot.objects.get(name='users').is_stale)
+
+    def test_invalidation_during_a_recompute_is_kept(self):
+        compute_items = SECTIONS['items']
+
+        def compute_while_an_item_is_written(now):
+            data = compute_items(now)
+            Item.objects.create(owner=self.admin, title='Listed mid-recompute')
+            return data
+
+        with patch.dict(SECTIONS, {'items': compute_while_an_item_is_written}):
+            self.assertEqual(get_dashboard(['items'])['items']['total'], 0)
+        self.assertTrue(DashboardSnapshot.objects.get(name='items').is_stale)
+        self.assertEqual(get_dashboard(['items'])['items']['total'], 1)
+
+
+class TopSellingItemsTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller2', email='seller2@ait.ac.th')
+        self.buyer = User.objects.create_user(username='buyer2', email='buyer2@ait.ac.th')
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def sell(self, items, orders_per_item):
+        created = Item.objects.bulk_create([
+            Item(owner=self.seller, title=f'Item {n}', price=Decimal('20'), category='books') for n in range(items)
+        ])
+        Order.objects.bulk_create([
+            Order(buyer=self.buyer, seller=self.seller, item=item, total_price=Decimal('20'),
+                  payment_status='paid' if n % 2 else 'pending', shipping_address='AIT Campus')
+            for index, item in enumerate(created) for n in range(orders_per_item + index)
+        ])
+        return created
+
+    def test_top_sellers_cost_one_query_however_many_items_sold(self):
+        for items in (1, 10, 50):
+            with self.subTest(items=items):
+                Order.objects.all().delete()
+                created = self.sell(items, orders_per_item=2)
+                with self.assertNumQueries(1):
+                    top = top_selling_items(limit=10)
+                self.assertEqual(len(top), min(items, 10))
+                # The item sold most (the last one created) comes first, with only paid orders as revenue
+                best = created[-1]
+                orders = 2 + items - 1
+                self.assertEqual(top[0], {
+                    'id': best.pk, 'title': best.title, 'order_count': orders, 'total_revenue': 20.0 * (orders // 2),
+                })
+
+    def test_sales_analytics_query_count_is_constant(self):
+        for items in (1, 25):
+            Order.objects.all().delete()
+            self.sell(items, orders_per_item=1)
+            # Orders by status, the monthly rollup, orders by category and the top sellers
+            with self.assertNumQueries(4):
+                response = self.client.get('/api/statistics/sales/?top=100')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['top_items']), items)
@@ -10,60 +10,37 @@ from apps.orders.models import Order
 from apps.users.models import User
 from apps.wishlist.models import WantToBuy
 from apps.barter.models import BarterTransaction
+from .dashboard import get_dashboard, top_selling_items
+from .models import DailyCategoryMetrics
+from .rollups import monthly_totals
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dashboard_stats(request):
     """Get general dashboard statistics"""
     
-    # Basic counts
-    total_items = Item.objects.filter(is_available=True).count()
-    total_users = User.objects.filter(is_verified=True).count()
-    total_orders = Order.objects.count()
-    total_barter_requests = BarterTransaction.objects.count()
-    total_want_to_buy = WantToBuy.objects.filter(status='active').count()
-    
-    # Recent activity (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_items = Item.objects.filter(created_at__gte=thirty_days_ago).count()
-    recent_orders = Order.objects.filter(created_at__gte=thirty_days_ago).count()
-    recent_users = User.objects.filter(date_joined__gte=thirty_days_ago).count()
-    
-    # Revenue stats
-    total_revenue = Order.objects.filter(
-        payment_status='paid'
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    monthly_revenue = Order.objects.filter(
-        payment_status='paid',
-        created_at__gte=thirty_days_ago
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    # Popular categories
-    popular_categories = Item.objects.filter(
-        is_available=True
-    ).values('category').annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
+    # Counters come from precomputed snapshot rows (one conditional aggregate per table on refresh)
+    data = get_dashboard(['items', 'users', 'orders', 'barter', 'want_to_buy', 'popular_categories'])
+    items, users, orders = data['items'], data['users'], data['orders']
     
     return Response({
         'overview': {
-            'total_items': total_items,
-            'total_users': total_users,
-            'total_orders': total_orders,
-            'total_barter_requests': total_barter_requests,
-            'total_want_to_buy': total_want_to_buy,
+            'total_items': items['available'],
+            'total_users': users['verified'],
+            'total_orders': orders['total'],
+            'total_barter_requests': data['barter']['total'],
+            'total_want_to_buy': data['want_to_buy']['active'],
         },
         'recent_activity': {
-            'recent_items': recent_items,
-            'recent_orders': recent_orders,
-            'recent_users': recent_users,
+            'recent_items': items['created_30d'],
+            'recent_orders': orders['created_30d'],
+            'recent_users': users['created_30d'],
         },
         'revenue': {
-            'total_revenue': float(total_revenue),
-            'monthly_revenue': float(monthly_revenue),
+            'total_revenue': orders['revenue'],
+            'monthly_revenue': orders['revenue_30d'],
         },
-        'popular_categories': list(popular_categories)
+        'popular_categories': data['popular_categories']['top'][:5]
     })
 
 @api_view(['GET'])
@@ -134,36 +111,33 @@ def sales_analytics(request):
         count=Count('id')
     ).order_by('-count')
     
-    # Sales by month (last 12 months)
-    twelve_months_ago = timezone.now() - timedelta(days=365)
-    monthly_sales = Order.objects.filter(
-        created_at__gte=twelve_months_ago
-    ).extra(
-        select={'month': "DATE_TRUNC('month', created_at)"}
-    ).values('month').annotate(
-        count=Count('id'),
-        revenue=Sum('total_price')
-    ).order_by('month')
-    
-    # Top selling items
-    top_items = Item.objects.annotate(
-        order_count=Count('orders')
-    ).filter(order_count__gt=0).order_by('-order_count')[:10]
-    
-    top_items_data = []
-    for item in top_items:
-        top_items_data.append({
-            'id': item.id,
-            'title': item.title,
-            'order_count': item.order_count,
-            'total_revenue': float(Order.objects.filter(
-                item=item, payment_status='paid'
-            ).aggregate(total=Sum('total_price'))['total'] or 0)
-        })
+    # Sales by month (last 12 months), summed from the daily rollup rows
+    twelve_months_ago = timezone.localdate() - timedelta(days=365)
+    monthly_sales = [
+        {'month': row['month'], 'count': row['count'], 'revenue': float(row['revenue'] or 0)}
+        for row in monthly_totals(twelve_months_ago, count='orders', revenue='order_value')
+    ]
+    
+    # Orders by category over the same window
+    sales_by_category = DailyCategoryMetrics.objects.filter(
+        date__gte=twelve_months_ago, orders__gt=0
+    ).values('category').annotate(
+        count=Sum('orders')
+    ).order_by('-count')
+    
+    # Top selling items (?top=N, optionally limited to the last ?days=D)
+    try:
+        top_n = max(1, min(int(request.query_params.get('top', 10)), 100))
+        days = request.query_params.get('days')
+        since = timezone.now() - timedelta(days=int(days)) if days else None
+    except ValueError:
+        return Response({'error': 'top and days must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    top_items_data = top_selling_items(top_n, since)
     
     return Response({
         'sales_by_status': list(sales_by_status),
-        'monthly_sales': list(monthly_sales),
+        'monthly_sales': monthly_sales,
+        'sales_by_category': list(sales_by_category),
         'top_items': top_items_data
     })
 
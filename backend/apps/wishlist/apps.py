@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class WishlistConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.wishlist'
+
+    def ready(self):
+        from marketplace.response_cache import invalidate_on
+        from .models import WantToBuy
+        invalidate_on(WantToBuy, 'want_to_buy')
@@ -0,0 +1,33 @@
+from decimal import Decimal
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.items.models import Item
+from apps.users.models import User
+from .models import Wishlist, WishlistItem
+
+
+class WishlistQueryCountTests(TestCase):
+    """The wishlist response costs the same number of queries however many items it has"""
+
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller', email='seller@ait.ac.th')
+
+    def client_with_wishlist(self, lines):
+        user = User.objects.create_user(username=f'student{lines}', email=f'student{lines}@ait.ac.th')
+        items = Item.objects.bulk_create([
+            Item(owner=self.seller, title=f'Desk lamp {n}', price=Decimal('99.00'), category='Home') for n in range(lines)
+        ])
+        wishlist = Wishlist.objects.create(user=user)
+        WishlistItem.objects.bulk_create([WishlistItem(wishlist=wishlist, item=item) for item in items])
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_wishlist_queries_are_constant(self):
+        for lines in (1, 10, 100):
+            with self.subTest(lines=lines):
+                client = self.client_with_wishlist(lines)
+                with self.assertNumQueries(2):
+                    response = client.get('/api/wishlist/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['items']), lines)
@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from marketplace.prefetch import prefetch_for
 from .models import Wishlist, WishlistItem, WantToBuy
 from .serializers import (
     WishlistSerializer, AddToWishlistSerializer, 
@@ -15,7 +16,7 @@ class WishlistView(generics.RetrieveAPIView):
     
     def get_object(self):
         wishlist, created = Wishlist.objects.get_or_create(user=self.request.user)
-        return wishlist
+        return prefetch_for(wishlist, WishlistSerializer)
 
 class WantToBuyListView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
@@ -67,7 +68,7 @@ def add_to_wishlist(request):
         if not created:
             return Response({'error': 'Item already in wishlist'}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response(WishlistSerializer(wishlist).data, status=status.HTTP_201_CREATED)
+        return Response(WishlistSerializer(prefetch_for(wishlist, WishlistSerializer)).data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -78,7 +79,7 @@ def remove_from_wishlist(request, item_id):
     wishlist_item = get_object_or_404(WishlistItem, wishlist=wishlist, item_id=item_id)
     wishlist_item.delete()
     
-    return Response(WishlistSerializer(wishlist).data)
+    return Response(WishlistSerializer(prefetch_for(wishlist, WishlistSerializer)).data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -0,0 +1,25 @@
+import os
+from django.core.asgi import get_asgi_application
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marketplace.settings')
+django_application = get_asgi_application()
+
+# Imported after setup so app models are loaded
+from channels.auth import AuthMiddlewareStack
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
+from apps.notifications.consumers import PushTicketAuthMiddleware
+from apps.notifications.routing import websocket_urlpatterns
+
+application = ProtocolTypeRouter({
+    'http': django_application,
+    # Push ticket (?ticket=) first; browser sessions from the admin pages fall back to the cookie
+    'websocket': AllowedHostsOriginValidator(
+        PushTicketAuthMiddleware(AuthMiddlewareStack(URLRouter(websocket_urlpatterns)))
+    ),
+})
+
+# Per-process warm-up of in-memory indexes
+from apps.search.suggestions import warm_up_suggestion_index
+warm_up_suggestion_index()
+from apps.advertisements.serving import warm_up_ad_index
+warm_up_ad_index()
@@ -0,0 +1,173 @@
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class CursorValueEncoder(json.JSONEncoder):
+    """JSON encoder for sort values that keeps full datetime precision"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, (decimal.Decimal, uuid.UUID)):
+            return str(o)
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination for every list endpoint.
+
+    Pages are keyed on the queryset's ordering (``-created_at`` for most
+    models) with the primary key as tie-breaker. The cursor is an opaque
+    token holding the sort values of the last row served, so fetching the
+    next page is a single indexed range scan and deep pages cost the same as
+    the first one. Counting is opt-in (``?count=true``) and capped.
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    count_cap = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.count = None
+
+        if request.query_params.get(self.count_query_param, '').lower() == 'true':
+            # Counting past the cap would bring back the full scan we are avoiding
+            self.count = queryset.order_by()[:self.count_cap + 1].count()
+
+        queryset = queryset.order_by(*[self.order_expression(key) for key in self.ordering])
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.seek_filter(cursor))
+
+        results = list(queryset[:self.limit + 1])
+        self.has_next = len(results) > self.limit
+        self.page = results[:self.limit]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({**self.get_page_metadata(), 'results': data})
+
+    def get_page_metadata(self):
+        metadata = {'next': self.get_next_link()}
+        if self.count is not None:
+            metadata['count'] = min(self.count, self.count_cap)
+            metadata['count_is_approximate'] = self.count > self.count_cap
+        return metadata
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_is_approximate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        """Return (name, descending, nullable, field) for each sort key, ending with the pk"""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering or ['-pk'])
+        opts = queryset.model._meta
+        keys = []
+        for entry in ordering:
+            if not isinstance(entry, str) or '__' in entry or entry == '?':
+                raise ImproperlyConfigured(
+                    f'{self.__class__.__name__} needs plain field names to order by, got {entry!r}'
+                )
+            descending = entry.startswith('-')
+            name = entry.lstrip('-')
+            if name == 'pk':
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                field = None  # annotation
+            keys.append((name, descending, bool(field and field.null), field))
+        if not any(key[0] == opts.pk.name for key in keys):
+            keys.append((opts.pk.name, keys[0][1] if keys else True, False, opts.pk))
+        return keys
+
+    def order_expression(self, key):
+        name, descending, nullable, field = key
+        if not nullable:
+            return f'-{name}' if descending else name
+        # NULLs go last in both directions so the seek filter is portable across databases
+        return F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+
+    def seek_filter(self, values):
+        """Rows strictly after the cursor position, i.e. a lexicographic comparison"""
+        condition = None
+        for (name, descending, nullable, field), value in reversed(list(zip(self.ordering, values))):
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            if value is None:
+                after = None
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{lookup: value})
+                if nullable:
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if condition is None:
+                condition = after if after is not None else Q(pk__in=[])
+            elif after is None:
+                condition = same & condition
+            else:
+                condition = after | (same & condition)
+        return condition
+
+    def encode_cursor(self, obj):
+        # Model instances hold a foreign key's value in its attname (owner_id); values_list() rows under the name
+        values = [
+            getattr(obj, field.attname) if field is not None and hasattr(obj, field.attname) else getattr(obj, name)
+            for name, _, _, field in self.ordering
+        ]
+        payload = json.dumps(values, cls=CursorValueEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                value if value is None or field is None else field.to_python(value)
+                for (name, _, _, field), value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
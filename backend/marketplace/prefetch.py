@@ -0,0 +1,102 @@
+import functools
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+class QueryPlan:
+    """The select_related paths and prefetch_related lookups one serializer needs to render without extra queries"""
+
+    def __init__(self, select=(), prefetch=()):
+        self.select = list(dict.fromkeys(select))
+        self.prefetch = list(prefetch)
+
+    def apply(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*self.select)
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*self.prefetch)
+        return queryset
+
+    def nested(self, prefix):
+        """This plan seen from a parent reached through the forward relation `prefix`"""
+        return QueryPlan(
+            [f'{prefix}__{path}' for path in self.select],
+            [
+                Prefetch(f'{prefix}__{lookup.prefetch_through}', queryset=lookup.queryset, to_attr=lookup.to_attr)
+                if isinstance(lookup, Prefetch) else f'{prefix}__{lookup}'
+                for lookup in self.prefetch
+            ],
+        )
+
+
+def forward_path(model, attrs):
+    """The select_related path for a chain of forward FK/one-to-one attributes, as far as it goes"""
+    path = []
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not (field.is_relation and (field.many_to_one or field.one_to_one) and field.concrete):
+            break
+        path.append(attr)
+        model = field.related_model
+    return '__'.join(path)
+
+
+def build_plan(serializer, model):
+    meta = getattr(serializer, 'Meta', None)
+    select = list(getattr(meta, 'select_related', ()))
+    prefetch = list(getattr(meta, 'prefetch_related', ()))
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        many = isinstance(field, ListSerializer)
+        child = field.child if many else field
+        if not isinstance(child, BaseSerializer):
+            # Dotted sources such as owner.username read through forward relations
+            path = forward_path(model, field.source_attrs[:-1])
+            if path:
+                select.append(path)
+            continue
+        try:
+            relation = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        child_model = relation.related_model
+        child_plan = build_plan(child, child_model)
+        if relation.many_to_one or (relation.one_to_one and relation.concrete):
+            nested = child_plan.nested(field.source)
+            select += [field.source] + nested.select
+            prefetch += nested.prefetch
+        else:
+            # Reverse FK / many-to-many: one query for every parent row, related rows joined in
+            prefetch.append(Prefetch(field.source, queryset=child_plan.apply(child_model._default_manager.all())))
+    return QueryPlan(select, prefetch)
+
+
+@functools.lru_cache(maxsize=None)
+def plan_for(serializer_class):
+    """The QueryPlan of a ModelSerializer class, derived from its nested serializers and dotted sources"""
+    if not hasattr(getattr(serializer_class, 'Meta', None), 'model'):
+        return QueryPlan()
+    return build_plan(serializer_class(), serializer_class.Meta.model)
+
+
+def optimize(queryset, serializer_class):
+    return plan_for(serializer_class).apply(queryset)
+
+
+def prefetch_for(instance, serializer_class):
+    """Load what serializer_class needs for an already fetched instance (select_related paths become prefetches)"""
+    plan = plan_for(serializer_class)
+    prefetch_related_objects([instance], *plan.select, *plan.prefetch)
+    return instance
+
+
+class QueryPlanMixin:
+    """Generic views: querysets are optimized for the view's serializer before listing or get_object()"""
+
+    def filter_queryset(self, queryset):
+        return optimize(super().filter_queryset(queryset), self.get_serializer_class())
@@ -0,0 +1,284 @@
+import contextvars
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.urls import Resolver404, resolve
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_store = None
+_store_lock = threading.Lock()
+_current_stats = contextvars.ContextVar('perf_stats', default=None)
+
+
+class QueryStats:
+    """connection.execute_wrapper() counting queries, SQL time and how often each SQL text repeats"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        self.render_started = None
+        self.render_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            # ORM SQL keeps values in params, so one query per row repeats the exact same text
+            self.shapes[sql] += 1
+
+    def rendered(self, response):
+        self.render_seconds = time.perf_counter() - self.render_started
+
+    def repeated(self, threshold):
+        return [(sql, count) for sql, count in self.shapes.most_common() if count >= threshold]
+
+
+class PerfStore:
+    """
+    The last PERF_BUFFER_SIZE sampled requests (for /manage/perf/) and
+    per-endpoint totals since start (for the Prometheus endpoint), per process.
+    """
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def record(self, sample):
+        key = (sample['endpoint'], sample['method'])
+        with self.lock:
+            self.samples.append(sample)
+            totals = self.totals.get(key)
+            if totals is None:
+                totals = self.totals[key] = {
+                    'requests': 0, 'seconds': 0.0, 'queries': 0, 'sql_seconds': 0.0, 'serialize_seconds': 0.0,
+                    'render_seconds': 0.0, 'bytes': 0, 'n_plus_one': 0, 'buckets': [0] * len(DURATION_BUCKETS),
+                }
+            seconds = sample['duration_ms'] / 1000
+            totals['requests'] += 1
+            totals['seconds'] += seconds
+            totals['queries'] += sample['queries']
+            totals['sql_seconds'] += sample['sql_ms'] / 1000
+            totals['serialize_seconds'] += sample['serialize_ms'] / 1000
+            totals['render_seconds'] += sample['render_ms'] / 1000
+            totals['bytes'] += sample['bytes']
+            totals['n_plus_one'] += bool(sample['n_plus_one'])
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    totals['buckets'][index] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.samples), {key: dict(value, buckets=list(value['buckets'])) for key, value in self.totals.items()}
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.totals.clear()
+
+
+@contextmanager
+def timing_serialization():
+    """
+    Add the enclosed time, less the SQL run inside it (lazy querysets), to
+    the profiled request's serializer time; nested blocks count once.
+    """
+    stats = _current_stats.get()
+    if stats is None or stats.serializing:
+        yield
+        return
+    stats.serializing = True
+    started, sql_started = time.perf_counter(), stats.seconds
+    try:
+        yield
+    finally:
+        stats.serialize_seconds += time.perf_counter() - started - (stats.seconds - sql_started)
+        stats.serializing = False
+
+
+class SerializationTimingMixin:
+    """list() and retrieve() of a generic view timed as serializer time for ProfilingMiddleware"""
+
+    def list(self, request, *args, **kwargs):
+        with timing_serialization():
+            return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        with timing_serialization():
+            return super().retrieve(request, *args, **kwargs)
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PerfStore(getattr(settings, 'PERF_BUFFER_SIZE', 2000))
+        return _store
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def endpoint_report(samples):
+    """Per-endpoint latency percentiles, query counts, SQL/serialize/render time, size and N+1 flags, slowest total first"""
+    grouped = {}
+    for sample in samples:
+        grouped.setdefault((sample['endpoint'], sample['method']), []).append(sample)
+    rows = []
+    for (endpoint, method), group in grouped.items():
+        durations = [sample['duration_ms'] for sample in group]
+        flagged = [sample for sample in group if sample['n_plus_one']]
+        requests = len(group)
+        rows.append({
+            'endpoint': endpoint, 'method': method, 'requests': requests,
+            'p50_ms': percentile(durations, 50), 'p95_ms': percentile(durations, 95), 'max_ms': max(durations),
+            'total_ms': sum(durations),
+            'avg_queries': sum(sample['queries'] for sample in group) / requests,
+            'max_queries': max(sample['queries'] for sample in group),
+            'avg_sql_ms': sum(sample['sql_ms'] for sample in group) / requests,
+            'avg_serialize_ms': sum(sample['serialize_ms'] for sample in group) / requests,
+            'avg_render_ms': sum(sample['render_ms'] for sample in group) / requests,
+            'avg_kb': sum(sample['bytes'] for sample in group) / requests / 1024,
+            'n_plus_one': len(flagged),
+            'n_plus_one_example': flagged[-1]['n_plus_one'][0] if flagged else None,
+        })
+    return sorted(rows, key=lambda row: -row['total_ms'])
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(totals):
+    """Prometheus text exposition (version 0.0.4) of the per-endpoint totals"""
+    lines = [
+        '# HELP marketplace_perf_sample_rate Fraction of requests profiled; scale the totals below by its inverse',
+        '# TYPE marketplace_perf_sample_rate gauge',
+        f"marketplace_perf_sample_rate {getattr(settings, 'PERF_SAMPLE_RATE', 0)}",
+    ]
+    counters = [
+        ('requests', 'marketplace_http_requests_sampled_total', 'Profiled requests'),
+        ('queries', 'marketplace_db_queries_total', 'SQL queries run by profiled requests'),
+        ('sql_seconds', 'marketplace_db_query_seconds_total', 'Time spent in SQL by profiled requests'),
+        ('serialize_seconds', 'marketplace_serialize_seconds_total', 'Time spent in serializers turning objects into primitives'),
+        ('render_seconds', 'marketplace_render_seconds_total', 'Time spent rendering serialized data to the response body'),
+        ('bytes', 'marketplace_response_bytes_total', 'Response body bytes of profiled requests'),
+        ('n_plus_one', 'marketplace_n_plus_one_requests_total', 'Profiled requests that repeated one SQL query'),
+    ]
+    for field, name, help_text in counters:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (endpoint, method), values in sorted(totals.items()):
+            lines.append(f'{name}{{endpoint="{escape_label(endpoint)}",method="{method}"}} {values[field]}')
+
+    name = 'marketplace_http_request_duration_seconds'
+    lines += [f'# HELP {name} Latency of profiled requests', f'# TYPE {name} histogram']
+    for (endpoint, method), values in sorted(totals.items()):
+        labels = f'endpoint="{escape_label(endpoint)}",method="{method}"'
+        for bound, count in zip(DURATION_BUCKETS, values['buckets']):
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {values["requests"]}')
+        lines.append(f'{name}_sum{{{labels}}} {values["seconds"]}')
+        lines.append(f'{name}_count{{{labels}}} {values["requests"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def is_async_view(request):
+    try:
+        match = resolve(request.path_info, getattr(request, 'urlconf', None))
+    except Resolver404:
+        return False
+    return iscoroutinefunction(match.func)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a PERF_SAMPLE_RATE fraction of requests: query count, SQL time,
+    serializer time (views with SerializationTimingMixin and the compiled
+    item lists, SQL excluded), render time (JSON encoding), response size
+    and SQL repeated PERF_N_PLUS_ONE_THRESHOLD times or more (an N+1
+    pattern), kept in the per-process PerfStore. Unsampled requests cost
+    one random() call. Under ASGI async views (the SSE stream) are not
+    profiled, so they run without sync adaptation.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'PERF_N_PLUS_ONE_THRESHOLD', 5)
+        self.exclude = tuple(getattr(settings, 'PERF_EXCLUDE_PREFIXES', ('/manage/perf/', '/static/', '/media/')))
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def sampled(self, request):
+        return random.random() < self.sample_rate and not request.path.startswith(self.exclude)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled(request):
+            return self.get_response(request)
+        return self.profile(request, self.get_response)
+
+    async def __acall__(self, request):
+        if not self.sampled(request) or is_async_view(request):
+            return await self.get_response(request)
+        # Sync views run on the thread-sensitive worker; profiling from it puts the
+        # execute_wrapper on the connection their SQL uses
+        return await sync_to_async(self.profile)(request, async_to_sync(self.get_response))
+
+    def profile(self, request, get_response):
+        stats = request._perf_stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats):
+                response = get_response(request)
+        finally:
+            _current_stats.reset(token)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        get_store().record({
+            'endpoint': (match.view_name or match.route) if match else 'unresolved',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'at': time.time(),
+            'duration_ms': duration * 1000,
+            'queries': stats.count,
+            'sql_ms': stats.seconds * 1000,
+            'serialize_ms': stats.serialize_seconds * 1000,
+            'render_ms': stats.render_seconds * 1000,
+            'bytes': 0 if response.streaming else len(response.content),
+            'n_plus_one': stats.repeated(self.threshold),
+        })
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (encoded to JSON) after this hook; time it with a post-render callback
+        stats = getattr(request, '_perf_stats', None)
+        if stats is not None:
+            stats.render_started = time.perf_counter()
+            response.add_post_render_callback(stats.rendered)
+        return response
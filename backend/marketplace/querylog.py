@@ -0,0 +1,85 @@
+import json
+import re
+import threading
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, connections
+
+_write_lock = threading.Lock()
+
+# Plan lines that read a whole table, or sort because no index gives the order
+FULL_SCAN_PATTERNS = [
+    re.compile(r'^SCAN (?:TABLE )?(?P<table>\S+)(?: AS \S+)?$'),  # SQLite
+    re.compile(r'Seq Scan on (?P<table>\S+)'),  # PostgreSQL
+]
+SORT_PATTERNS = [
+    re.compile(r'USE TEMP B-TREE FOR (?:ORDER BY|RIGHT PART OF ORDER BY)'),
+    re.compile(r'^\s*(?:->\s*)?Sort\b'),
+]
+
+
+class QueryRecorder:
+    """connection.execute_wrapper() appending every SELECT as a JSON line: {"sql", "params", "path"}"""
+
+    def __init__(self, log_path, request_path=''):
+        self.log_path = log_path
+        self.request_path = request_path
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            line = json.dumps(
+                {'sql': sql, 'params': list(params or ()), 'path': self.request_path}, default=str
+            )
+            with _write_lock, open(self.log_path, 'a') as log:
+                log.write(line + '\n')
+        return execute(sql, params, many, context)
+
+
+class QueryLogMiddleware:
+    """Record the SELECTs of every request to QUERY_LOG_PATH for `manage.py explain_query_log`"""
+
+    def __init__(self, get_response):
+        self.log_path = getattr(settings, 'QUERY_LOG_PATH', '')
+        if not self.log_path:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connection.execute_wrapper(QueryRecorder(self.log_path, request.path)):
+            return self.get_response(request)
+
+
+def read_log(path):
+    """Recorded queries grouped by SQL text: {sql: {'params': first params, 'count', 'paths'}}"""
+    queries = {}
+    with open(path) as log:
+        for line in log:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            query = queries.setdefault(entry['sql'], {'params': entry.get('params') or [], 'count': 0, 'paths': set()})
+            query['count'] += 1
+            if entry.get('path'):
+                query['paths'].add(entry['path'])
+    return queries
+
+
+def explain(sql, params=(), using='default'):
+    """The database's plan for one query, one line per plan step"""
+    conn = connections[using]
+    with conn.cursor() as cursor:
+        cursor.execute(f'{conn.ops.explain_query_prefix()} {sql}', params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+
+
+def plan_problems(plan):
+    """(kind, detail) for each plan line that scans a whole table or sorts without an index"""
+    problems = []
+    for line in plan:
+        for pattern in FULL_SCAN_PATTERNS:
+            match = pattern.search(line.strip())
+            if match:
+                problems.append(('full scan', match.group('table')))
+        if any(pattern.search(line) for pattern in SORT_PATTERNS):
+            problems.append(('sort', line.strip()))
+    return problems
@@ -0,0 +1,136 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+VERSION_KEY = 'rc:version:{}'
+
+
+class CacheStats:
+    """Per-namespace hit/miss counters for this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def record(self, namespace, outcome):
+        with self.lock:
+            counters = self.counters.setdefault(namespace, {'hits': 0, 'misses': 0, 'invalidations': 0})
+            counters[outcome] += 1
+
+    def snapshot(self):
+        with self.lock:
+            data = {namespace: dict(counters) for namespace, counters in self.counters.items()}
+        for counters in data.values():
+            lookups = counters['hits'] + counters['misses']
+            counters['hit_rate'] = round(counters['hits'] / lookups, 3) if lookups else None
+        return data
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'responses')]
+
+
+def namespace_versions(cache, namespaces):
+    """Current version of each namespace; a missing version starts from the clock so evicted keys never repeat"""
+    keys = [VERSION_KEY.format(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*namespaces):
+    """Bump namespace versions; entries stored under the old version are never read again"""
+    cache = get_cache()
+    for namespace in namespaces:
+        key = VERSION_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+        stats.record(namespace, 'invalidations')
+
+
+def make_key(request, view_name, namespaces, versions):
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    versions = '.'.join(f'{namespace}{version}' for namespace, version in zip(namespaces, versions))
+    # Cached data holds absolute URLs (images, `next` links) built from the scheme and host
+    origin = f'{request.scheme}://{request.get_host()}'
+    digest = hashlib.sha1(f'{origin}{request.path}?{urlencode(params)}'.encode()).hexdigest()
+    return f'rc:{view_name}:{versions}:{digest}'
+
+
+def cache_response(*namespaces, timeout=None, bypass_params=()):
+    """
+    Cache successful GET responses of a DRF view under the given namespaces.
+
+    The key covers the view, the scheme and host, the path and the
+    normalized query string, plus the current version of every namespace,
+    so a write that bumps a namespace (see ``invalidate_on``) retires all
+    affected entries at once.
+    Works on function views (below ``@api_view``) and view methods; the
+    wrapped view must not depend on the requesting user. Requests carrying
+    any of ``bypass_params`` always go to the view.
+    """
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request = next(arg for arg in args if isinstance(arg, Request))
+            if request.method not in ('GET', 'HEAD') or any(p in request.query_params for p in bypass_params):
+                return view(*args, **kwargs)
+
+            cache = get_cache()
+            key = make_key(request, view_name, namespaces, namespace_versions(cache, namespaces))
+            cached = cache.get(key)
+            if cached is not None:
+                stats.record(namespaces[0], 'hits')
+                status_code, data = cached
+                response = Response(data, status=status_code)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            stats.record(namespaces[0], 'misses')
+            response = view(*args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, (response.status_code, response.data), timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_on(model, *namespaces, ignore_fields=()):
+    """
+    Bump ``namespaces`` whenever ``model`` is saved or deleted.
+
+    Saves restricted to ``ignore_fields`` (e.g. counters bumped on every
+    impression) leave cached responses in place until they expire.
+    """
+    ignore_fields = frozenset(ignore_fields)
+
+    def handler(sender, raw=False, update_fields=None, **kwargs):
+        if raw or (update_fields and ignore_fields.issuperset(update_fields)):
+            return
+        invalidate(*namespaces)
+
+    uid = f'response_cache_{model._meta.label}_{"_".join(namespaces)}'
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}_save')
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}_delete')
@@ -8,6 +8,8 @@ DEBUG = os.getenv("DJANGO_DEBUG", "0") == "1"
 ALLOWED_HOSTS = ["*"]
 
 INSTALLED_APPS = [
+    # First, so `manage.py runserver` serves marketplace.asgi (WebSocket and SSE push) instead of WSGI
+    "daphne",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -36,6 +38,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "marketplace.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -44,6 +47,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "marketplace.querylog.QueryLogMiddleware",
 ]
 
 CORS_ALLOWED_ORIGINS = [
@@ -108,6 +112,8 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_PAGINATION_CLASS": "marketplace.pagination.KeysetPagination",
+    "PAGE_SIZE": 20,
 }
 
 # Email configuration
@@ -118,3 +124,180 @@ EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", "1025"))
 EMAIL_USE_TLS = False
 DEFAULT_FROM_EMAIL = "no-reply@ait-marketplace.local"
+
+# Item search
+# SQLiteFTSBackend keeps an FTS5 inverted index in sync with Item; its table
+# only exists on SQLite, so other databases default to DatabaseSearchBackend
+# (`manage.py check` reports search.E001 for the FTS backend off SQLite).
+SEARCH_BACKEND = os.getenv(
+    "SEARCH_BACKEND",
+    "apps.search.backends.SQLiteFTSBackend"
+    if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3"
+    else "apps.search.backends.DatabaseSearchBackend",
+)
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "500"))
+# Autocomplete suggestions are served from an in-process prefix index;
+# entries beyond the cap evict the least popular, and the index is reloaded
+# from the database in a background thread after SUGGESTIONS_MAX_AGE seconds.
+SUGGESTIONS_MAX_ENTRIES = int(os.getenv("SUGGESTIONS_MAX_ENTRIES", "50000"))
+SUGGESTIONS_MAX_AGE = int(os.getenv("SUGGESTIONS_MAX_AGE", "3600"))
+
+# Dashboard counters are served from DashboardSnapshot rows; a section is
+# recomputed when a write marks it stale or it is older than this (seconds).
+DASHBOARD_SNAPSHOT_MAX_AGE = int(os.getenv("DASHBOARD_SNAPSHOT_MAX_AGE", "300"))
+
+# Caches
+# "responses" stores rendered public catalogue responses (marketplace.response_cache).
+# locmem is per-process, so invalidation only reaches the process that saw
+# the write; use "file" (or a shared backend's dotted path) with several workers.
+RESPONSE_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+}
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "locmem")
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "default",
+    },
+    "responses": {
+        "BACKEND": RESPONSE_CACHE_BACKENDS.get(RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_BACKEND),
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", str(BASE_DIR / "cache" / "responses")
+                              if RESPONSE_CACHE_BACKEND == "file" else "responses"),
+        "TIMEOUT": RESPONSE_CACHE_TIMEOUT,
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))},
+    },
+}
+
+# Uploaded media
+# Item images arrive as base64 data URLs and are stored content-addressed
+# under MEDIA_ROOT/items/; MEDIA_HOST prefixes the stored /media/ paths in
+# URLs built without a request (signals, workers) and must be set when DEBUG
+# is off. Django serves /media/ itself only in DEBUG (or with MEDIA_SERVE=1);
+# in production the front web server must serve MEDIA_ROOT at /media/.
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", str(BASE_DIR / "media"))
+MEDIA_HOST = os.getenv("MEDIA_HOST", "http://localhost:8000" if DEBUG else "")
+MEDIA_SERVE = os.getenv("MEDIA_SERVE", "1" if DEBUG else "0") == "1"
+ITEM_IMAGE_MAX_BYTES = int(os.getenv("ITEM_IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+# Stored item images get WebP thumbnails (longest side, px) rendered by a
+# background thread pool; list responses use ITEM_LIST_THUMBNAIL_SIZE.
+# Rendering needs Pillow; without it items keep serving their originals.
+ITEM_THUMBNAIL_SIZES = [int(size) for size in os.getenv("ITEM_THUMBNAIL_SIZES", "200,400").split(",")]
+ITEM_LIST_THUMBNAIL_SIZE = int(os.getenv("ITEM_LIST_THUMBNAIL_SIZE", "400"))
+ITEM_THUMBNAIL_QUALITY = int(os.getenv("ITEM_THUMBNAIL_QUALITY", "80"))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+
+# Ad impression/click beacons are buffered and written in batches (bulk
+# inserts plus F() counter updates) every AD_EVENT_FLUSH_SIZE events or
+# AD_EVENT_FLUSH_INTERVAL seconds. Events are also appended to a per-process
+# spool file under AD_EVENT_SPOOL_DIR (empty disables it) so a crash loses
+# nothing; beyond AD_EVENT_MAX_PENDING queued events beacons get a 503.
+# Events the database rejects are moved to dead-letter.jsonl in that directory.
+AD_EVENT_FLUSH_SIZE = int(os.getenv("AD_EVENT_FLUSH_SIZE", "500"))
+AD_EVENT_FLUSH_INTERVAL = float(os.getenv("AD_EVENT_FLUSH_INTERVAL", "2"))
+AD_EVENT_MAX_PENDING = int(os.getenv("AD_EVENT_MAX_PENDING", "20000"))
+AD_EVENT_SPOOL_DIR = os.getenv("AD_EVENT_SPOOL_DIR", str(BASE_DIR / "spool"))
+AD_EVENT_SPOOL_FSYNC = os.getenv("AD_EVENT_SPOOL_FSYNC", "0") == "1"
+# compact_ad_events retention: raw per-event rows and hourly buckets are
+# pruned after these many days; daily AdStatBucket rows are kept.
+AD_RAW_EVENT_RETENTION_DAYS = int(os.getenv("AD_RAW_EVENT_RETENTION_DAYS", "30"))
+AD_HOURLY_BUCKET_RETENTION_DAYS = int(os.getenv("AD_HOURLY_BUCKET_RETENTION_DAYS", "14"))
+# Public ads are selected from an in-process index, reloaded after ad writes
+# in this process and at least every AD_INDEX_MAX_AGE seconds.
+AD_INDEX_MAX_AGE = int(os.getenv("AD_INDEX_MAX_AGE", "60"))
+# Forum post views are counted in memory and added to view_count with one
+# F() update per post every FORUM_VIEW_FLUSH_INTERVAL seconds (0 writes each
+# view immediately). Likes and replies are always atomic F() updates.
+FORUM_VIEW_FLUSH_INTERVAL = float(os.getenv("FORUM_VIEW_FLUSH_INTERVAL", "5"))
+
+# Real-time push: WebSocket at /ws/push/ and an SSE fallback at
+# /api/notifications/stream/, both served by marketplace.asgi (daphne/uvicorn).
+# Events fan out per user through a channel layer: in-process by default
+# (PushChannelLayer, a single ASGI process serving API and sockets), or Redis
+# (PUSH_CHANNEL_LAYER=redis) when several processes or a separate WSGI API
+# publish to the same subscribers.
+ASGI_APPLICATION = "marketplace.asgi.application"
+PUSH_CHANNEL_LAYER = os.getenv("PUSH_CHANNEL_LAYER", "memory")
+if PUSH_CHANNEL_LAYER == "redis":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [os.getenv("REDIS_URL", "redis://localhost:6379/0")]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "apps.notifications.layers.PushChannelLayer",
+            "CONFIG": {"capacity": int(os.getenv("PUSH_CHANNEL_CAPACITY", "100"))},
+        },
+    }
+PUSH_KEEPALIVE_SECONDS = int(os.getenv("PUSH_KEEPALIVE_SECONDS", "15"))
+PUSH_SSE_MAX_SECONDS = int(os.getenv("PUSH_SSE_MAX_SECONDS", "300"))
+PUSH_SSE_RETRY_MS = int(os.getenv("PUSH_SSE_RETRY_MS", "3000"))
+# Browsers authenticate sockets and streams with a single-use ticket from
+# POST /api/notifications/push-ticket/ instead of putting the access token in
+# the URL (and so in access logs). Tickets live PUSH_TICKET_SECONDS in the
+# PUSH_TICKET_CACHE_ALIAS cache, which must be shared by all ASGI processes.
+PUSH_TICKET_SECONDS = int(os.getenv("PUSH_TICKET_SECONDS", "30"))
+PUSH_TICKET_CACHE_ALIAS = os.getenv("PUSH_TICKET_CACHE_ALIAS", "default")
+
+# Per-user unread counters (notifications in total and per type, chat) live in
+# the "counters" cache, adjusted on create/read and recounted from the
+# database on a miss or after UNREAD_COUNTER_TIMEOUT seconds. locmem is
+# per-process; several workers need a shared backend ("redis" or a dotted path).
+UNREAD_COUNTER_BACKEND = os.getenv("UNREAD_COUNTER_BACKEND", "locmem")
+UNREAD_COUNTER_TIMEOUT = int(os.getenv("UNREAD_COUNTER_TIMEOUT", "300"))
+CACHES["counters"] = {
+    "BACKEND": {
+        "locmem": "django.core.cache.backends.locmem.LocMemCache",
+        "redis": "django.core.cache.backends.redis.RedisCache",
+    }.get(UNREAD_COUNTER_BACKEND, UNREAD_COUNTER_BACKEND),
+    "LOCATION": os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    if UNREAD_COUNTER_BACKEND == "redis" else "counters",
+    "TIMEOUT": UNREAD_COUNTER_TIMEOUT,
+    "OPTIONS": {"MAX_ENTRIES": int(os.getenv("UNREAD_COUNTER_MAX_ENTRIES", "100000"))}
+    if UNREAD_COUNTER_BACKEND == "locmem" else {},
+}
+
+# Notification broadcasts (system announcements, wishlist matches) are
+# bulk-inserted by NOTIFICATION_FANOUT_WORKERS background threads in chunks
+# of NOTIFICATION_FANOUT_CHUNK_SIZE recipients. A worker leases the broadcast
+# for NOTIFICATION_FANOUT_LEASE_SECONDS per chunk; run_broadcasts takes over
+# a running broadcast only once its worker's lease has run out.
+NOTIFICATION_FANOUT_WORKERS = int(os.getenv("NOTIFICATION_FANOUT_WORKERS", "1"))
+NOTIFICATION_FANOUT_CHUNK_SIZE = int(os.getenv("NOTIFICATION_FANOUT_CHUNK_SIZE", "2000"))
+NOTIFICATION_FANOUT_LEASE_SECONDS = int(os.getenv("NOTIFICATION_FANOUT_LEASE_SECONDS", "300"))
+
+# Notification emails go through the EmailOutbox table: queued in the same
+# transaction as the notification, sent in batches of EMAIL_OUTBOX_BATCH_SIZE
+# by EMAIL_OUTBOX_WORKERS background threads over one kept-open connection
+# each (0 workers: run `manage.py send_email_outbox` instead). Non-urgent mail
+# waits EMAIL_DIGEST_WINDOW seconds so several for one user become a digest.
+# Failures retry with exponential backoff up to EMAIL_OUTBOX_MAX_ATTEMPTS.
+EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", "1"))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "100"))
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", "10"))
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+EMAIL_OUTBOX_RETRY_SECONDS = int(os.getenv("EMAIL_OUTBOX_RETRY_SECONDS", "30"))
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = int(os.getenv("EMAIL_OUTBOX_RETRY_MAX_SECONDS", "3600"))
+EMAIL_DIGEST_WINDOW = int(os.getenv("EMAIL_DIGEST_WINDOW", "60"))
+
+# Set QUERY_LOG_PATH to append every SELECT the API runs to that file (JSON
+# lines); `manage.py explain_query_log` replays it through EXPLAIN and flags
+# full table scans and index-less sorts. Unset, the middleware is skipped.
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "")
+
+# ProfilingMiddleware profiles a PERF_SAMPLE_RATE fraction of requests (0
+# disables it): query count, SQL, serializer and render time, response size and SQL
+# repeated PERF_N_PLUS_ONE_THRESHOLD times in one request (N+1). The last
+# PERF_BUFFER_SIZE samples feed /manage/perf/; totals are exported at
+# /manage/perf/metrics/ for Prometheus, which authenticates with
+# "Authorization: Bearer $PERF_METRICS_TOKEN". Both are per process.
+PERF_SAMPLE_RATE = float(os.getenv("PERF_SAMPLE_RATE", "0.05"))
+PERF_BUFFER_SIZE = int(os.getenv("PERF_BUFFER_SIZE", "2000"))
+PERF_N_PLUS_ONE_THRESHOLD = int(os.getenv("PERF_N_PLUS_ONE_THRESHOLD", "5"))
+PERF_METRICS_TOKEN = os.getenv("PERF_METRICS_TOKEN", "")
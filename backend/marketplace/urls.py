@@ -1,11 +1,12 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
+from django.views.static import serve
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
 from apps.items.views import ItemViewSet
 from apps.barter.views import BarterViewSet
-from apps.chat.views import MessageViewSet
+from apps.chat.views import ConversationViewSet, MessageViewSet
 from apps.users.views import RegisterView, ProfileView, MembershipView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -13,6 +14,7 @@ router = DefaultRouter()
 router.register(r'items', ItemViewSet, basename='item')
 router.register(r'barter', BarterViewSet, basename='barter')
 router.register(r'chat/messages', MessageViewSet, basename='message')
+router.register(r'chat/conversations', ConversationViewSet, basename='conversation')
 
 # Customize admin site
 admin.site.site_header = "🛡️ AIT Marketplace Administration"
@@ -48,3 +50,9 @@ urlpatterns = [
 # Serve static files in development
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.BASE_DIR / "static")
+
+# Serve uploaded media in development; django.views.static.serve is not meant for production
+if settings.MEDIA_SERVE:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve, {'document_root': settings.MEDIA_ROOT}),
+    ]
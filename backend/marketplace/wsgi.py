@@ -2,3 +2,9 @@ import os
 from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'marketplace.settings')
 application = get_wsgi_application()
+
+# Per-process warm-up of in-memory indexes
+from apps.search.suggestions import warm_up_suggestion_index
+warm_up_suggestion_index()
+from apps.advertisements.serving import warm_up_ad_index
+warm_up_ad_index()
@@ -43,7 +43,7 @@ function OrdersPageContent() {
       })
       if (res.ok) {
         const data = await res.json()
-        setOrders(Array.isArray(data) ? data : [])
+        setOrders(Array.isArray(data) ? data : (data?.results || []))
       }
     } catch (err) {
       console.error(err)